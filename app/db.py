@@ -1,10 +1,14 @@
 import os
 import time
 import logging
+import threading
+from typing import Callable, Optional
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient
 from pymongo.errors import PyMongoError
 
+from app.services.indexes import ensure_indexes
+
 
 logger = logging.getLogger(__name__)
 
@@ -18,14 +22,31 @@ db = None
 scans_col = None
 pages_col = None
 reports_col = None
+blobs_col = None
+batches_col = None
+schedules_col = None
+diffs_col = None
+beacons_col = None
+checkpoints_col = None
+meta_col = None
+tag_libraries_col = None
+delete_jobs_col = None
+
+MONGO_CONNECT_IN_BACKGROUND = os.getenv("MONGO_CONNECT_IN_BACKGROUND", "1").strip().lower() not in ("0", "false", "no")
+MONGO_BACKGROUND_RETRY_SECONDS = float(os.getenv("MONGO_BACKGROUND_RETRY_SECONDS", "30"))
+
+connection_state = "disconnected"
+_connect_thread: Optional[threading.Thread] = None
+_connect_stop = threading.Event()
 
 
 def connect_to_mongo() -> None:
-    global client, db, scans_col, pages_col, reports_col
+    global connection_state, client, db, scans_col, pages_col, reports_col, blobs_col, batches_col, schedules_col, diffs_col, beacons_col, checkpoints_col, meta_col, tag_libraries_col, delete_jobs_col
 
     max_retries = int(os.getenv("MONGO_MAX_RETRIES", "5"))
     base_delay_seconds = float(os.getenv("MONGO_RETRY_DELAY_SECONDS", "2"))
 
+    connection_state = "connecting"
     for attempt in range(1, max_retries + 1):
         try:
             client = MongoClient(
@@ -42,14 +63,22 @@ def connect_to_mongo() -> None:
             scans_col = db["scans"]
             pages_col = db["pages"]
             reports_col = db["reports"]
+            blobs_col = db["payload_blobs"]
+            batches_col = db["batches"]
+            schedules_col = db["schedules"]
+            diffs_col = db["diffs"]
+            beacons_col = db["beacons"]
+            checkpoints_col = db["scan_checkpoints"]
+            meta_col = db["meta"]
+            tag_libraries_col = db["tag_libraries"]
+            delete_jobs_col = db["delete_jobs"]
 
             try:
-                scans_col.create_index([("created_at", ASCENDING)])
-                pages_col.create_index([("scan_id", ASCENDING)])
-                reports_col.create_index([("scan_id", ASCENDING)])
+                ensure_indexes(db)
             except Exception as idx_err:
                 logger.warning(f"Could not create indexes: {idx_err}")
 
+            connection_state = "connected"
             return
         except PyMongoError as e:
             logger.error(f"Failed to connect to MongoDB (attempt {attempt}/{max_retries}): {e}")
@@ -67,10 +96,56 @@ def connect_to_mongo() -> None:
     scans_col = None
     pages_col = None
     reports_col = None
+    blobs_col = None
+    batches_col = None
+    schedules_col = None
+    diffs_col = None
+    beacons_col = None
+    checkpoints_col = None
+    meta_col = None
+    tag_libraries_col = None
+    delete_jobs_col = None
+    connection_state = "failed"
+
+
+def _connect_loop(on_connected: Optional[Callable[[], None]]) -> None:
+    while not _connect_stop.is_set():
+        connect_to_mongo()
+        if scans_col is not None:
+            break
+        logger.error(f"MongoDB unavailable; retrying in {MONGO_BACKGROUND_RETRY_SECONDS}s")
+        if _connect_stop.wait(MONGO_BACKGROUND_RETRY_SECONDS):
+            return
+
+    if on_connected is not None and scans_col is not None:
+        try:
+            on_connected()
+        except Exception as e:
+            logger.error(f"Post-connect startup tasks failed: {e}", exc_info=True)
+
+
+def start_mongo_connection(on_connected: Optional[Callable[[], None]] = None) -> None:
+    # Connecting in a thread lets the API start serving (and report not-ready
+    # on /ready) while MongoDB is still being reached.
+    global _connect_thread
+    if not MONGO_CONNECT_IN_BACKGROUND:
+        connect_to_mongo()
+        if on_connected is not None and scans_col is not None:
+            on_connected()
+        return
+
+    _connect_stop.clear()
+    _connect_thread = threading.Thread(target=_connect_loop, args=(on_connected,), name="mongo-connect", daemon=True)
+    _connect_thread.start()
+
+
+def is_ready() -> bool:
+    return connection_state == "connected" and scans_col is not None
 
 
 def close_mongo_connection() -> None:
     global client
+    _connect_stop.set()
     if client is not None:
         try:
             client.close()
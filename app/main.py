@@ -7,6 +7,17 @@ from app import db
 from app.routes.scans import router as scans_router
 from app.routes.reports import router as reports_router
 from app.routes.ui import router as ui_router
+from app.routes.metrics import router as metrics_router
+from app.routes.batches import router as batches_router
+from app.routes.schedules import router as schedules_router
+from app.routes.diffs import router as diffs_router
+from app.routes.beacons import router as beacons_router
+from app.routes.tag_libraries import router as tag_libraries_router
+from app.services.checkpoints import recover_stale_scans
+from app.services.delete_jobs import start_delete_worker, stop_delete_worker
+from app.services.retention import start_retention_sweeper, stop_retention_sweeper
+from app.services.scan_queue import requeue_pending_scans, scan_queue
+from app.services.scheduler import start_scheduler, stop_scheduler
 
 
 logging.basicConfig(
@@ -35,16 +46,34 @@ app.add_middleware(
 )
 
 
+def _after_mongo_connected() -> None:
+    requeue_pending_scans()
+    recover_stale_scans()
+
+
 @app.on_event("startup")
 def _startup_connect_mongo() -> None:
-    db.connect_to_mongo()
+    db.start_mongo_connection(on_connected=_after_mongo_connected)
+    start_retention_sweeper()
+    start_delete_worker()
+    start_scheduler()
 
 
 @app.on_event("shutdown")
 def _shutdown_close_mongo() -> None:
+    stop_scheduler()
+    stop_retention_sweeper()
+    stop_delete_worker()
+    scan_queue.stop()
     db.close_mongo_connection()
 
 
 app.include_router(scans_router)
 app.include_router(reports_router)
 app.include_router(ui_router)
+app.include_router(metrics_router)
+app.include_router(batches_router)
+app.include_router(schedules_router)
+app.include_router(diffs_router)
+app.include_router(beacons_router)
+app.include_router(tag_libraries_router)
@@ -0,0 +1,135 @@
+import sys
+import logging
+import argparse
+
+from pymongo import UpdateOne
+
+from app import db
+from app.services import compression
+from app.services.beacon_index import reindex_scan_beacons
+from app.services.compression import compress_beacons, compress_value, is_compressed
+from app.services.indexes import ensure_indexes, explain_query_paths
+
+
+logger = logging.getLogger(__name__)
+
+
+def _flush(col, ops) -> int:
+    if not ops:
+        return 0
+    col.bulk_write(ops, ordered=False)
+    count = len(ops)
+    ops.clear()
+    return count
+
+
+def compress_pages(batch_size: int, codec: str) -> int:
+    updated = 0
+    ops = []
+    cursor = db.pages_col.find({}, {"load_beacons": 1, "click_events": 1}, batch_size=batch_size)
+    for page in cursor:
+        load_beacons = page.get("load_beacons", [])
+        click_events = page.get("click_events", [])
+        before = [(b.get("payload"), b.get("response_payload")) for b in load_beacons]
+        before += [(b.get("payload"), b.get("response_payload")) for c in click_events for b in c.get("beacons", [])]
+
+        compress_beacons(load_beacons, codec)
+        for click in click_events:
+            compress_beacons(click.get("beacons", []), codec)
+
+        after = [(b.get("payload"), b.get("response_payload")) for b in load_beacons]
+        after += [(b.get("payload"), b.get("response_payload")) for c in click_events for b in c.get("beacons", [])]
+        if before == after:
+            continue
+
+        ops.append(UpdateOne({"_id": page["_id"]}, {"$set": {"load_beacons": load_beacons, "click_events": click_events}}))
+        if len(ops) >= batch_size:
+            updated += _flush(db.pages_col, ops)
+    updated += _flush(db.pages_col, ops)
+    return updated
+
+
+def compress_blobs(batch_size: int, codec: str) -> int:
+    updated = 0
+    ops = []
+    for blob in db.blobs_col.find({"body": {"$type": "string"}}, {"body": 1}, batch_size=batch_size):
+        body = compress_value(blob["body"], codec)
+        if not is_compressed(body):
+            continue
+        ops.append(UpdateOne({"_id": blob["_id"]}, {"$set": {"body": body}}))
+        if len(ops) >= batch_size:
+            updated += _flush(db.blobs_col, ops)
+    updated += _flush(db.blobs_col, ops)
+    return updated
+
+
+def compress_reports(codec: str) -> int:
+    updated = 0
+    for report in db.reports_col.find({"data": {"$type": "array"}}, {"_id": 1}):
+        doc = db.reports_col.find_one({"_id": report["_id"]}, {"data": 1})
+        data = compress_value(doc.get("data", []), codec)
+        if not is_compressed(data):
+            continue
+        db.reports_col.update_one({"_id": report["_id"]}, {"$set": {"data": data}})
+        updated += 1
+    return updated
+
+
+def reindex_beacons() -> int:
+    indexed = 0
+    for scan in db.scans_col.find({"status": "completed"}, {"_id": 1}).sort("created_at", 1):
+        indexed += reindex_scan_beacons(scan["_id"])
+    return indexed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrate", description="Database maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compress_cmd = sub.add_parser("compress-storage", help="Compress existing beacon payloads, payload blobs and report rows")
+    compress_cmd.add_argument("--codec", choices=["zlib", "zstd"], default=compression.STORAGE_COMPRESSION or "zlib")
+    compress_cmd.add_argument("--batch-size", type=int, default=500)
+
+    sub.add_parser("ensure-indexes", help="Create, update and drop indexes to match the declared index specs")
+    sub.add_parser("check-indexes", help="Explain every known query path and flag collection scans")
+    sub.add_parser("reindex-beacons", help="Rebuild the cross-scan beacon index from stored pages")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    db.connect_to_mongo()
+    if db.pages_col is None:
+        logger.error("Database not connected. Set MONGO_URI and try again.")
+        return 1
+
+    try:
+        if args.command == "compress-storage":
+            if args.codec == "zstd" and compression.zstandard is None:
+                logger.error("--codec zstd needs the zstandard package")
+                return 1
+            logger.info(f"Compressed {compress_pages(args.batch_size, args.codec)} page documents")
+            logger.info(f"Compressed {compress_blobs(args.batch_size, args.codec)} payload blobs")
+            logger.info(f"Compressed {compress_reports(args.codec)} reports")
+        elif args.command == "ensure-indexes":
+            ensure_indexes(db.db)
+        elif args.command == "check-indexes":
+            collscans = 0
+            for result in explain_query_paths(db.db):
+                if result.get("error"):
+                    logger.error(f"{result['query']}: explain failed: {result['error']}")
+                    collscans += 1
+                elif result["collscan"]:
+                    logger.warning(f"{result['query']}: COLLSCAN ({' <- '.join(result['stages'])})")
+                    collscans += 1
+                else:
+                    logger.info(f"{result['query']}: {' <- '.join(result['stages'])}")
+            return 1 if collscans else 0
+        elif args.command == "reindex-beacons":
+            logger.info(f"Indexed {reindex_beacons()} beacons")
+    finally:
+        db.close_mongo_connection()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
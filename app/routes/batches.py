@@ -0,0 +1,91 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app import db
+from app.services.batches import batch_progress, batch_report_rows, batch_summary, create_batch
+from app.services.exports import batch_report_to_xlsx
+from app.services.scan_queue import scan_queue
+
+
+router = APIRouter()
+
+
+class BatchRequest(BaseModel):
+    sites: List[str] = Field(..., min_length=1, max_length=1000)
+    name: Optional[str] = None
+    max_pages: int = Field(10, ge=1)
+    max_clicks_per_page: int = Field(5, ge=0)
+    samples_per_template: int = Field(0, ge=0)
+
+
+def _require_db() -> None:
+    if db.scans_col is None or db.pages_col is None or db.reports_col is None or db.batches_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+
+def _get_batch(batch_id: str):
+    batch = db.batches_col.find_one({"_id": batch_id})
+    if not batch:
+        raise HTTPException(404, "Batch not found")
+    return batch
+
+
+@router.post("/batch")
+def start_batch(request: BatchRequest):
+    _require_db()
+
+    sites = [s.strip() for s in request.sites if s and s.strip()]
+    invalid = [s for s in sites if not s.startswith(("http://", "https://"))]
+    if invalid:
+        raise HTTPException(400, f"Invalid URL(s): {', '.join(invalid[:5])}")
+    if not sites:
+        raise HTTPException(400, "No sites given")
+
+    out = create_batch(sites, request.max_pages, request.max_clicks_per_page, request.samples_per_template, request.name)
+    return {**out, "message": f"Batch queued with {len(out['scan_ids'])} scans"}
+
+
+@router.get("/batches")
+def list_batches(limit: int = Query(20, ge=1, le=100)):
+    _require_db()
+
+    batches = list(db.batches_col.find({}).sort("created_at", -1).limit(limit))
+    return {"batches": [batch_progress(b) for b in batches], "queue": scan_queue.stats()}
+
+
+@router.get("/batch/{batch_id}")
+def get_batch(batch_id: str):
+    _require_db()
+
+    batch = _get_batch(batch_id)
+    scans = list(db.scans_col.find(
+        {"batch_id": batch_id},
+        {"start_url": 1, "status": 1, "pages_scanned": 1, "total_pages": 1, "started_at": 1, "completed_at": 1, "duration_seconds": 1},
+    ).sort("created_at", 1))
+    return {**batch_progress(batch), "options": batch.get("options", {}), "scans": scans}
+
+
+@router.get("/batch/{batch_id}/summary")
+def get_batch_summary(batch_id: str):
+    _require_db()
+
+    batch = _get_batch(batch_id)
+    return {**batch_progress(batch), "sites": batch_summary(batch_id)}
+
+
+@router.get("/batch/{batch_id}/report")
+def download_batch_report(batch_id: str):
+    _require_db()
+
+    _get_batch(batch_id)
+    output = batch_report_to_xlsx(batch_summary(batch_id), batch_report_rows(batch_id))
+
+    headers = {"Content-Disposition": f"attachment; filename=adobe_analytics_batch_report_{batch_id}.xlsx"}
+    return StreamingResponse(
+        output,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers=headers,
+    )
@@ -0,0 +1,65 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app import db
+from app.services.beacon_index import BEACON_GROUP_FIELDS, beacon_query, find_beacons, summarize_beacons
+
+
+router = APIRouter()
+
+
+def _require_db() -> None:
+    if db.beacons_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+
+@router.get("/beacons")
+def list_beacons(
+    report_suite: Optional[str] = None,
+    tracking_server: Optional[str] = None,
+    beacon_type: Optional[str] = None,
+    site: Optional[str] = None,
+    scan_id: Optional[str] = None,
+    page_url: Optional[str] = None,
+    since: Optional[float] = Query(None, description="Only beacons captured at or after this Unix timestamp"),
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
+):
+    _require_db()
+
+    query = beacon_query({
+        "report_suite": report_suite,
+        "tracking_server": tracking_server.lower() if tracking_server else None,
+        "beacon_type": beacon_type,
+        "site": site.lower() if site else None,
+        "scan_id": scan_id,
+        "page_url": page_url,
+    }, since)
+    return {"beacons": find_beacons(query, limit, skip), "limit": limit, "skip": skip}
+
+
+@router.get("/beacons/summary")
+def beacon_summary(
+    group_by: str = Query("site", description=f"One of: {', '.join(BEACON_GROUP_FIELDS)}"),
+    report_suite: Optional[str] = None,
+    tracking_server: Optional[str] = None,
+    beacon_type: Optional[str] = None,
+    site: Optional[str] = None,
+    scan_id: Optional[str] = None,
+    since: Optional[float] = Query(None, description="Only beacons captured at or after this Unix timestamp"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    _require_db()
+
+    if group_by not in BEACON_GROUP_FIELDS:
+        raise HTTPException(400, f"group_by must be one of: {', '.join(BEACON_GROUP_FIELDS)}")
+
+    query = beacon_query({
+        "report_suite": report_suite,
+        "tracking_server": tracking_server.lower() if tracking_server else None,
+        "beacon_type": beacon_type,
+        "site": site.lower() if site else None,
+        "scan_id": scan_id,
+    }, since)
+    return {"group_by": group_by, "groups": summarize_beacons(query, group_by, limit)}
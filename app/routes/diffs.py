@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from app import db
+from app.services.diffs import get_scan_diff
+
+
+router = APIRouter()
+
+
+@router.get("/diff")
+def diff_scans(
+    base: str = Query(..., description="Earlier scan ID"),
+    target: str = Query(..., description="Later scan ID"),
+    refresh: bool = Query(False, description="Recompute even if a cached diff exists"),
+):
+    if db.scans_col is None or db.pages_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+    fields = {"status": 1, "start_url": 1, "completed_at": 1, "updated_at": 1}
+    base_scan = db.scans_col.find_one({"_id": base}, fields)
+    target_scan = db.scans_col.find_one({"_id": target}, fields)
+    if not base_scan or not target_scan:
+        raise HTTPException(404, "Scan not found")
+
+    return get_scan_diff(base_scan, target_scan, refresh=refresh)
@@ -1,57 +1,82 @@
-import io
+from typing import Any, Dict, Optional
 
-import pandas as pd
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
 from app import db
+from app.services.exports import report_to_xlsx, simple_report_to_xlsx
+from app.services.report_viewer import cached_report, page_rows
+from app.services.reporting import load_report_rows
 
 
 router = APIRouter()
 
+# Cancelled scans store a report of the pages scanned before they stopped.
+REPORT_STATUSES = ("completed", "cancelled")
+# Enough to check the viewer cache without transferring the report rows.
+REPORT_HEADER_FIELDS = {"generated_at": 1, "total_rows": 1}
 
-@router.get("/report/{scan_id}/data")
-def get_report_data(scan_id: str):
+
+def _stored_report(scan_id: str, projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     if db.scans_col is None or db.reports_col is None:
         raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
 
-    scan = db.scans_col.find_one({"_id": scan_id})
+    scan = db.scans_col.find_one({"_id": scan_id}, {"status": 1})
     if not scan:
         raise HTTPException(404, "Scan not found")
-    if scan["status"] != "completed":
+    if scan["status"] not in REPORT_STATUSES:
         raise HTTPException(400, "Scan not completed yet")
 
-    report = db.reports_col.find_one({"_id": scan_id})
+    report = db.reports_col.find_one({"_id": scan_id}, projection)
     if not report:
         raise HTTPException(404, "Report not found")
+    return report
+
+
+@router.get("/report/{scan_id}/data")
+def get_report_data(scan_id: str):
+    report = _stored_report(scan_id)
 
     return {
         "scan_id": scan_id,
         "generated_at": report["generated_at"],
         "total_rows": report["total_rows"],
-        "data": report["data"],
+        "data": load_report_rows(report),
+        "template_coverage": report.get("template_coverage", []),
     }
 
 
-@router.get("/report/{scan_id}")
-def download_report(scan_id: str):
-    if db.scans_col is None or db.reports_col is None:
-        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+@router.get("/report/{scan_id}/rows")
+def get_report_rows(
+    scan_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    q: str = Query("", description="Case-insensitive text to search for in any column"),
+    max_chars: int = Query(200, ge=20, le=5000, description="Longer cell values are truncated"),
+):
+    entry = cached_report(_stored_report(scan_id, REPORT_HEADER_FIELDS))
+    return {"scan_id": scan_id, **page_rows(entry, offset, limit, q, max_chars)}
 
-    scan = db.scans_col.find_one({"_id": scan_id})
-    if not scan:
-        raise HTTPException(404, "Scan not found")
-    if scan["status"] != "completed":
-        raise HTTPException(400, "Scan not completed yet")
 
-    report = db.reports_col.find_one({"_id": scan_id})
-    if not report:
-        raise HTTPException(404, "Report not found")
+@router.get("/report/{scan_id}/rows/{row_index}")
+def get_report_row(scan_id: str, row_index: int, column: Optional[str] = None):
+    entry = cached_report(_stored_report(scan_id, REPORT_HEADER_FIELDS))
+    if row_index < 0 or row_index >= len(entry["rows"]):
+        raise HTTPException(404, "Row not found")
+
+    row = entry["rows"][row_index]
+    if column is None:
+        return {"scan_id": scan_id, "index": row_index, "row": row}
+    if column not in row:
+        raise HTTPException(404, "Column not found")
+    return {"scan_id": scan_id, "index": row_index, "column": column, "value": row[column]}
+
+
+@router.get("/report/{scan_id}")
+def download_report(scan_id: str):
+    report = _stored_report(scan_id)
 
-    df = pd.DataFrame(report["data"])
-    output = io.BytesIO()
-    df.to_excel(output, index=False)
-    output.seek(0)
+    output = report_to_xlsx(load_report_rows(report), report.get("template_coverage"))
 
     headers = {"Content-Disposition": f"attachment; filename=adobe_analytics_report_{scan_id}.xlsx"}
     return StreamingResponse(
@@ -63,39 +88,9 @@ def download_report(scan_id: str):
 
 @router.get("/report/{scan_id}/simple")
 def download_simple_report(scan_id: str):
-    if db.scans_col is None or db.reports_col is None:
-        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
-
-    scan = db.scans_col.find_one({"_id": scan_id})
-    if not scan:
-        raise HTTPException(404, "Scan not found")
-    if scan["status"] != "completed":
-        raise HTTPException(400, "Scan not completed yet")
-
-    report = db.reports_col.find_one({"_id": scan_id})
-    if not report:
-        raise HTTPException(404, "Report not found")
+    report = _stored_report(scan_id)
 
-    df = pd.DataFrame(report["data"])
-    keep_cols = [
-        "Scan ID",
-        "Page URL",
-        "Page Title",
-        "Beacon URL",
-        "Request Method",
-        "Request Payload",
-    ]
-    if "Response Payload" in df.columns:
-        keep_cols.append("Response Payload")
-
-    existing = [c for c in keep_cols if c in df.columns]
-    df = df[existing]
-    if "Beacon URL" in df.columns:
-        df = df[df["Beacon URL"].astype(str).str.len() > 0]
-
-    output = io.BytesIO()
-    df.to_excel(output, index=False)
-    output.seek(0)
+    output = simple_report_to_xlsx(load_report_rows(report))
 
     headers = {"Content-Disposition": f"attachment; filename=adobe_analytics_simple_report_{scan_id}.xlsx"}
     return StreamingResponse(
@@ -1,22 +1,36 @@
 import time
 import uuid
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from app import db
-from app.services.scanner import run_scan
+from app.services.archives import SCAN_RECORD_TRAFFIC, archive_parts
+from app.services.changes import bump_scans_version, cached_listing, scans_version, store_listing
+from app.services.checkpoints import is_stale, load_checkpoint, queue_resume
+from app.services.delete_jobs import create_delete_job, find_delete_job_for_scan, list_delete_jobs
+from app.services.scan_queue import cancel_scan_run, enqueue_scan, scan_options
 
 
 router = APIRouter()
 
 
 @router.post("/scan")
-def start_scan(start_url: str, max_pages: int = 10, max_clicks_per_page: int = 5, background_tasks: BackgroundTasks = None):
+def start_scan(
+    start_url: str,
+    max_pages: int = 10,
+    max_clicks_per_page: int = 5,
+    samples_per_template: int = Query(0, ge=0),
+    max_duration_seconds: float = Query(0, ge=0, description="Stop the scan after this many seconds (0 = no limit)"),
+    max_navigations: int = Query(0, ge=0, description="Stop after this many page loads and clicks (0 = no limit)"),
+    max_bytes: int = Query(0, ge=0, description="Stop after this many bytes were downloaded (0 = no limit)"),
+    record: bool = Query(False, description="Record the scan's network traffic so it can be replayed"),
+):
     if not start_url.startswith(("http://", "https://")):
         raise HTTPException(400, "Invalid URL")
     if db.scans_col is None or db.pages_col is None or db.reports_col is None:
         raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
 
+    record = record or SCAN_RECORD_TRAFFIC
     scan_id = str(uuid.uuid4())
     db.scans_col.insert_one({
         "_id": scan_id,
@@ -26,60 +40,104 @@ def start_scan(start_url: str, max_pages: int = 10, max_clicks_per_page: int = 5
         "total_pages": 0,
         "max_pages": max_pages,
         "max_clicks_per_page": max_clicks_per_page,
+        "samples_per_template": samples_per_template,
+        "budgets": {"max_duration_seconds": max_duration_seconds, "max_navigations": max_navigations, "max_bytes": max_bytes},
+        "record": record,
         "created_at": time.time()
     })
-
-    background_tasks.add_task(run_scan, scan_id, start_url, max_pages, max_clicks_per_page)
-    return {"scan_id": scan_id, "message": "Scan started in background"}
+    bump_scans_version()
+
+    enqueue_scan(
+        scan_id,
+        start_url,
+        max_pages,
+        max_clicks_per_page,
+        samples_per_template=samples_per_template,
+        max_duration_seconds=max_duration_seconds,
+        max_navigations=max_navigations,
+        max_bytes=max_bytes,
+        record=record,
+    )
+    return {"scan_id": scan_id, "message": "Scan queued"}
 
 
 @router.get("/scans")
-def list_scans(limit: int = Query(50, ge=1, le=200)):
+def list_scans(request: Request, response: Response, limit: int = Query(50, ge=1, le=200)):
     if db.scans_col is None:
         raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
 
-    docs = list(
-        db.scans_col.find(
-            {},
-            {
-                "_id": 1,
-                "start_url": 1,
-                "status": 1,
-                "pages_scanned": 1,
-                "total_pages": 1,
-                "created_at": 1,
-                "max_pages": 1,
-                "max_clicks_per_page": 1,
-                "started_at": 1,
-                "completed_at": 1,
-                "duration_seconds": 1,
-            },
-        ).sort("created_at", -1).limit(limit)
-    )
-
+    version = scans_version()
+    etag = f'W/"scans-{version}-{limit}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    docs = cached_listing(version, limit)
+    if docs is None:
+        docs = list(
+            db.scans_col.find(
+                {},
+                {
+                    "_id": 1,
+                    "start_url": 1,
+                    "status": 1,
+                    "pages_scanned": 1,
+                    "total_pages": 1,
+                    "created_at": 1,
+                    "max_pages": 1,
+                    "max_clicks_per_page": 1,
+                    "samples_per_template": 1,
+                    "started_at": 1,
+                    "completed_at": 1,
+                    "duration_seconds": 1,
+                    "stop_reason": 1,
+                },
+            ).sort("created_at", -1).limit(limit)
+        )
+        store_listing(version, limit, docs)
+
+    response.headers.update(headers)
     return {"scans": docs}
 
 
 @router.delete("/scans")
 def delete_all_scans():
-    if db.scans_col is None or db.pages_col is None or db.reports_col is None:
+    if db.scans_col is None or db.pages_col is None or db.reports_col is None or db.delete_jobs_col is None:
         raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
 
-    pages_deleted = db.pages_col.delete_many({}).deleted_count
-    reports_deleted = db.reports_col.delete_many({}).deleted_count
-    scans_deleted = db.scans_col.delete_many({}).deleted_count
+    job = create_delete_job()
+    return {"deleted": True, "scheduled": True, "scans_to_delete": job["progress"]["scans_total"], "job_id": job["_id"]}
+
+
+@router.get("/delete-jobs")
+def get_delete_jobs(limit: int = Query(20, ge=1, le=100)):
+    if db.delete_jobs_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
 
-    return {"deleted": True, "scans_deleted": scans_deleted, "pages_deleted": pages_deleted, "reports_deleted": reports_deleted}
+    return {"jobs": list_delete_jobs(limit)}
+
+
+@router.get("/delete-jobs/{job_id}")
+def get_delete_job(job_id: str):
+    if db.delete_jobs_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+    job = db.delete_jobs_col.find_one({"_id": job_id})
+    if not job:
+        raise HTTPException(404, "Delete job not found")
+    return job
 
 
 @router.post("/scan/{scan_id}/retry")
-def retry_scan(scan_id: str, background_tasks: BackgroundTasks = None):
+def retry_scan(scan_id: str):
     if db.scans_col is None or db.pages_col is None or db.reports_col is None:
         raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
 
     scan = db.scans_col.find_one({"_id": scan_id})
     if not scan:
         raise HTTPException(404, "Scan not found")
+    if scan.get("status") == "deleting":
+        raise HTTPException(409, "Scan is being deleted")
 
     start_url = scan.get("start_url")
     if not start_url:
@@ -87,6 +145,7 @@ def retry_scan(scan_id: str, background_tasks: BackgroundTasks = None):
 
     max_pages = int(scan.get("max_pages") or 10)
     max_clicks_per_page = int(scan.get("max_clicks_per_page") or 5)
+    samples_per_template = int(scan.get("samples_per_template") or 0)
 
     new_scan_id = str(uuid.uuid4())
     db.scans_col.insert_one({
@@ -97,16 +156,21 @@ def retry_scan(scan_id: str, background_tasks: BackgroundTasks = None):
         "total_pages": 0,
         "max_pages": max_pages,
         "max_clicks_per_page": max_clicks_per_page,
+        "samples_per_template": samples_per_template,
         "created_at": time.time(),
+        "budgets": scan.get("budgets") or {},
+        "record": bool(scan.get("record")),
         "retried_from": scan_id,
+        **({"replay_of": scan["replay_of"]} if scan.get("replay_of") else {}),
     })
+    bump_scans_version()
 
-    background_tasks.add_task(run_scan, new_scan_id, start_url, max_pages, max_clicks_per_page)
-    return {"scan_id": new_scan_id, "message": "Retry scan started"}
+    enqueue_scan(new_scan_id, start_url, max_pages, max_clicks_per_page, **scan_options(scan, resume=False))
+    return {"scan_id": new_scan_id, "message": "Retry scan queued"}
 
 
-@router.delete("/scan/{scan_id}")
-def delete_scan(scan_id: str):
+@router.post("/scan/{scan_id}/replay")
+def replay_scan(scan_id: str):
     if db.scans_col is None or db.pages_col is None or db.reports_col is None:
         raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
 
@@ -114,11 +178,96 @@ def delete_scan(scan_id: str):
     if not scan:
         raise HTTPException(404, "Scan not found")
 
-    pages_deleted = db.pages_col.delete_many({"scan_id": scan_id}).deleted_count
-    report_deleted = db.reports_col.delete_one({"_id": scan_id}).deleted_count
-    scan_deleted = db.scans_col.delete_one({"_id": scan_id}).deleted_count
+    if scan.get("status") == "deleting":
+        raise HTTPException(409, "Scan is being deleted")
+
+    # Replaying a replay reads the archive it was replayed from.
+    source_id = scan_id if archive_parts(scan_id) else scan.get("replay_of")
+    if not source_id or not archive_parts(source_id):
+        raise HTTPException(404, "No traffic archive recorded for this scan")
+
+    max_pages = int(scan.get("max_pages") or 10)
+    max_clicks_per_page = int(scan.get("max_clicks_per_page") or 5)
+    samples_per_template = int(scan.get("samples_per_template") or 0)
+
+    new_scan_id = str(uuid.uuid4())
+    db.scans_col.insert_one({
+        "_id": new_scan_id,
+        "start_url": scan["start_url"],
+        "status": "queued",
+        "pages_scanned": 0,
+        "total_pages": 0,
+        "max_pages": max_pages,
+        "max_clicks_per_page": max_clicks_per_page,
+        "samples_per_template": samples_per_template,
+        "created_at": time.time(),
+        "replay_of": source_id,
+    })
+    bump_scans_version()
+
+    enqueue_scan(
+        new_scan_id,
+        scan["start_url"],
+        max_pages,
+        max_clicks_per_page,
+        samples_per_template=samples_per_template,
+        replay_of=source_id,
+    )
+    return {"scan_id": new_scan_id, "replay_of": source_id, "message": "Replay scan queued"}
+
+
+@router.post("/scan/{scan_id}/cancel")
+def cancel_scan(scan_id: str):
+    if db.scans_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+    scan = db.scans_col.find_one({"_id": scan_id}, {"status": 1})
+    if not scan:
+        raise HTTPException(404, "Scan not found")
+    if scan.get("status") not in ("queued", "running"):
+        raise HTTPException(409, f"Scan is {scan.get('status')}")
+
+    status = cancel_scan_run(scan_id)
+    return {"scan_id": scan_id, "status": status, "message": "Scan cancelled" if status == "cancelled" else "Cancellation requested"}
+
+
+@router.post("/scan/{scan_id}/resume")
+def resume_scan(scan_id: str):
+    if db.scans_col is None or db.pages_col is None or db.reports_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+    scan = db.scans_col.find_one({"_id": scan_id})
+    if not scan:
+        raise HTTPException(404, "Scan not found")
+    if not scan.get("start_url"):
+        raise HTTPException(400, "Scan is missing start_url")
+
+    status = scan.get("status")
+    if status == "completed":
+        raise HTTPException(409, "Scan already completed")
+    if status in ("queued", "deleting") or (status == "running" and not is_stale(scan)):
+        raise HTTPException(409, f"Scan is {status}")
+
+    if not queue_resume(scan):
+        raise HTTPException(409, "Scan state changed, try again")
+    return {"scan_id": scan_id, "message": "Scan resume queued", "from_checkpoint": load_checkpoint(scan_id) is not None}
+
+
+@router.delete("/scan/{scan_id}")
+def delete_scan(scan_id: str):
+    if db.scans_col is None or db.pages_col is None or db.reports_col is None or db.delete_jobs_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+    scan = db.scans_col.find_one({"_id": scan_id}, {"status": 1})
+    if not scan:
+        raise HTTPException(404, "Scan not found")
+
+    # Deleting twice reports the job that is already running.
+    job = find_delete_job_for_scan(scan_id) if scan.get("status") == "deleting" else None
+    if job is None:
+        job = create_delete_job(scan_id)
 
-    return {"scan_id": scan_id, "deleted": bool(scan_deleted), "pages_deleted": pages_deleted, "report_deleted": report_deleted}
+    return {"scan_id": scan_id, "deleted": True, "scheduled": True, "job_id": job["_id"]}
 
 
 @router.get("/scan/{scan_id}")
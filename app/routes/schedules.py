@@ -0,0 +1,124 @@
+import time
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from app import db
+from app.services.cron import CronError
+from app.services.scheduler import next_run_at, validate_schedule
+
+
+router = APIRouter()
+
+
+class ScheduleRequest(BaseModel):
+    start_url: str
+    cron: str
+    timezone: str = "UTC"
+    jitter_seconds: int = Field(0, ge=0, le=3600)
+    name: Optional[str] = None
+    enabled: bool = True
+    max_pages: int = Field(10, ge=1)
+    max_clicks_per_page: int = Field(5, ge=0)
+    samples_per_template: int = Field(0, ge=0)
+
+
+class ScheduleUpdate(BaseModel):
+    cron: Optional[str] = None
+    timezone: Optional[str] = None
+    jitter_seconds: Optional[int] = Field(None, ge=0, le=3600)
+    name: Optional[str] = None
+    enabled: Optional[bool] = None
+    max_pages: Optional[int] = Field(None, ge=1)
+    max_clicks_per_page: Optional[int] = Field(None, ge=0)
+    samples_per_template: Optional[int] = Field(None, ge=0)
+
+
+def _require_db() -> None:
+    if db.scans_col is None or db.schedules_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+
+def _get_schedule(schedule_id: str):
+    schedule = db.schedules_col.find_one({"_id": schedule_id})
+    if not schedule:
+        raise HTTPException(404, "Schedule not found")
+    return schedule
+
+
+@router.post("/schedules")
+def create_schedule(request: ScheduleRequest):
+    _require_db()
+
+    if not request.start_url.startswith(("http://", "https://")):
+        raise HTTPException(400, "Invalid URL")
+    try:
+        validate_schedule(request.cron, request.timezone)
+        first_run_at = next_run_at(request.cron, request.timezone, request.jitter_seconds)
+    except CronError as e:
+        raise HTTPException(400, str(e))
+
+    schedule_id = str(uuid.uuid4())
+    schedule = {
+        "_id": schedule_id,
+        **request.model_dump(),
+        "next_run_at": first_run_at,
+        "runs": 0,
+        "skipped_runs": 0,
+        "created_at": time.time(),
+    }
+    db.schedules_col.insert_one(schedule)
+    return schedule
+
+
+@router.get("/schedules")
+def list_schedules(limit: int = Query(50, ge=1, le=200)):
+    _require_db()
+
+    return {"schedules": list(db.schedules_col.find({}).sort("next_run_at", 1).limit(limit))}
+
+
+@router.get("/schedules/{schedule_id}")
+def get_schedule(schedule_id: str, runs: int = Query(10, ge=0, le=100)):
+    _require_db()
+
+    schedule = _get_schedule(schedule_id)
+    recent = list(db.scans_col.find(
+        {"schedule_id": schedule_id},
+        {"status": 1, "pages_scanned": 1, "created_at": 1, "completed_at": 1, "duration_seconds": 1},
+    ).sort("created_at", -1).limit(runs)) if runs else []
+    return {**schedule, "recent_scans": recent}
+
+
+@router.patch("/schedules/{schedule_id}")
+def update_schedule(schedule_id: str, request: ScheduleUpdate):
+    _require_db()
+
+    schedule = _get_schedule(schedule_id)
+    changes = request.model_dump(exclude_none=True)
+    if not changes:
+        return schedule
+
+    merged = {**schedule, **changes}
+    if {"cron", "timezone", "jitter_seconds", "enabled"} & changes.keys():
+        try:
+            validate_schedule(merged["cron"], merged.get("timezone", "UTC"))
+            changes["next_run_at"] = next_run_at(merged["cron"], merged.get("timezone", "UTC"), merged.get("jitter_seconds") or 0)
+        except CronError as e:
+            raise HTTPException(400, str(e))
+        changes["error"] = None
+
+    db.schedules_col.update_one({"_id": schedule_id}, {"$set": changes})
+    return db.schedules_col.find_one({"_id": schedule_id})
+
+
+@router.delete("/schedules/{schedule_id}")
+def delete_schedule(schedule_id: str):
+    _require_db()
+
+    result = db.schedules_col.delete_one({"_id": schedule_id})
+    if result.deleted_count == 0:
+        raise HTTPException(404, "Schedule not found")
+    return {"deleted": True, "schedule_id": schedule_id}
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+
+from app import db
+from app.services.tag_libraries import scan_tag_libraries
+
+
+router = APIRouter()
+
+
+def _require_db() -> None:
+    if db.tag_libraries_col is None or db.pages_col is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Set MONGO_URI and restart the server.")
+
+
+@router.get("/scan/{scan_id}/tag-libraries")
+def list_scan_tag_libraries(scan_id: str):
+    _require_db()
+
+    if not db.scans_col.find_one({"_id": scan_id}, {"_id": 1}):
+        raise HTTPException(404, "Scan not found")
+    return {"scan_id": scan_id, "libraries": scan_tag_libraries(scan_id)}
+
+
+@router.get("/tag-libraries/{library_id}")
+def get_tag_library(library_id: str):
+    _require_db()
+
+    library = db.tag_libraries_col.find_one({"_id": library_id}, {"etag": 0, "last_modified": 0})
+    if not library:
+        raise HTTPException(404, "Tag library not found")
+    return library
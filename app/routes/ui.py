@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 
 from app import db
 from app.ui import UI_HTML
@@ -13,6 +13,12 @@ def root():
     return HTMLResponse(UI_HTML)
 
 
+@router.get("/ready")
+def ready():
+    body = {"ready": db.is_ready(), "mongo": db.connection_state}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
 @router.get("/health")
 def health():
     return {
@@ -23,8 +29,32 @@ def health():
             "list_scans": "GET /scans",
             "delete_scan": "DELETE /scan/{scan_id}",
             "check_status": "GET /scan/{scan_id}",
+            "delete_jobs": "GET /delete-jobs",
+            "delete_job_status": "GET /delete-jobs/{job_id}",
+            "cancel_scan": "POST /scan/{scan_id}/cancel",
+            "resume_scan": "POST /scan/{scan_id}/resume",
+            "replay_scan": "POST /scan/{scan_id}/replay",
             "get_report_data": "GET /report/{scan_id}/data",
+            "get_report_rows": "GET /report/{scan_id}/rows?offset=0&limit=100&q=",
+            "get_report_row": "GET /report/{scan_id}/rows/{row_index}?column=",
             "download_excel": "GET /report/{scan_id}",
             "download_simple_excel": "GET /report/{scan_id}/simple",
+            "start_batch": "POST /batch",
+            "list_batches": "GET /batches",
+            "batch_status": "GET /batch/{batch_id}",
+            "batch_summary": "GET /batch/{batch_id}/summary",
+            "download_batch_excel": "GET /batch/{batch_id}/report",
+            "create_schedule": "POST /schedules",
+            "list_schedules": "GET /schedules",
+            "schedule_status": "GET /schedules/{schedule_id}",
+            "update_schedule": "PATCH /schedules/{schedule_id}",
+            "delete_schedule": "DELETE /schedules/{schedule_id}",
+            "diff_scans": "GET /diff?base={scan_id}&target={scan_id}",
+            "list_beacons": "GET /beacons",
+            "beacon_summary": "GET /beacons/summary?group_by=site",
+            "scan_tag_libraries": "GET /scan/{scan_id}/tag-libraries",
+            "get_tag_library": "GET /tag-libraries/{library_id}",
+            "metrics": "GET /metrics",
+            "ready": "GET /ready",
         },
     }
@@ -0,0 +1,37 @@
+import os
+import glob
+import shutil
+import logging
+from typing import Any, Dict, List
+
+
+logger = logging.getLogger(__name__)
+
+SCAN_ARCHIVE_DIR = os.getenv("SCAN_ARCHIVE_DIR", "scan_archives")
+SCAN_RECORD_TRAFFIC = os.getenv("SCAN_RECORD_TRAFFIC", "").strip().lower() in ("1", "true", "yes")
+
+
+def archive_dir(scan_id: str) -> str:
+    return os.path.join(SCAN_ARCHIVE_DIR, os.path.basename(scan_id))
+
+
+def archive_parts(scan_id: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(archive_dir(scan_id), "part-*.har.zip")))
+
+
+def next_archive_part(scan_id: str) -> str:
+    # One HAR per browser context; a recycled or resumed scan adds parts.
+    os.makedirs(archive_dir(scan_id), exist_ok=True)
+    return os.path.join(archive_dir(scan_id), f"part-{len(archive_parts(scan_id)):04d}.har.zip")
+
+
+def archive_info(scan_id: str) -> Dict[str, Any]:
+    parts = archive_parts(scan_id)
+    return {"parts": len(parts), "bytes": sum(os.path.getsize(p) for p in parts)}
+
+
+def delete_archive(scan_id: str) -> None:
+    path = archive_dir(scan_id)
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Deleted traffic archive for scan {scan_id}")
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from app.services.metrics import ASSET_CACHE_BYTES, ASSET_CACHE_REQUESTS
+
+
+logger = logging.getLogger(__name__)
+
+SCANNER_ASSET_CACHE_DIR = os.getenv("SCANNER_ASSET_CACHE_DIR", "")
+SCANNER_ASSET_CACHE_MAX_MB = float(os.getenv("SCANNER_ASSET_CACHE_MAX_MB", "512"))
+SCANNER_ASSET_CACHE_MAX_ITEM_MB = float(os.getenv("SCANNER_ASSET_CACHE_MAX_ITEM_MB", "10"))
+SCANNER_ASSET_CACHE_TYPES = {
+    t.strip().lower() for t in os.getenv("SCANNER_ASSET_CACHE_TYPES", "script,stylesheet,font").split(",") if t.strip()
+}
+
+# Dropped when storing: the body is stored decoded, and cookies must not leak
+# from one scan into another.
+_UNSTORED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive", "set-cookie"}
+
+_cache: Optional["AssetCache"] = None
+_cache_lock = threading.Lock()
+
+
+def _directives(headers: Dict[str, str]) -> Dict[str, str]:
+    directives = {}
+    for part in (headers.get("cache-control") or "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name] = value.strip('"')
+    return directives
+
+
+def _fresh_until(headers: Dict[str, str], now: float) -> Optional[float]:
+    directives = _directives(headers)
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return now
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return now + max(0, int(directives[name]))
+            except ValueError:
+                return now
+    if headers.get("expires"):
+        try:
+            return parsedate_to_datetime(headers["expires"]).timestamp()
+        except (TypeError, ValueError):
+            return now
+    return now
+
+
+class AssetCache:
+    def __init__(self, directory: str, max_bytes: int, max_item_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def _load(self) -> None:
+        # Body mtimes record the last use, so LRU order survives restarts.
+        found = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            try:
+                with open(self._path(key, "json")) as fh:
+                    meta = json.load(fh)
+                used_at = os.path.getmtime(self._path(key, "body"))
+            except (OSError, ValueError):
+                self._remove_files(key)
+                continue
+            found.append((used_at, key, meta))
+        for _used_at, key, meta in sorted(found, key=lambda item: item[0]):
+            self._entries[key] = meta
+            self._size += int(meta.get("size") or 0)
+        ASSET_CACHE_BYTES.set(self._size)
+        logger.info(f"Asset cache at {self.directory}: {len(self._entries)} entries, {self._size / 1024 / 1024:.1f} MB")
+
+    def _remove_files(self, key: str) -> None:
+        for suffix in ("body", "json"):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _drop(self, key: str) -> None:
+        meta = self._entries.pop(key, None)
+        if meta is not None:
+            self._size -= int(meta.get("size") or 0)
+        self._remove_files(key)
+
+    def cacheable(self, request) -> bool:
+        return request.method == "GET" and request.resource_type in SCANNER_ASSET_CACHE_TYPES
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        key = hashlib.sha256(url.encode("utf-8", errors="replace")).hexdigest()
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is None:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key, "body"), "rb") as fh:
+                body = fh.read()
+            os.utime(self._path(key, "body"))
+        except OSError:
+            with self._lock:
+                self._drop(key)
+            return None
+        return {**meta, "key": key, "body": body}
+
+    def store(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        now = time.time()
+        fresh_until = _fresh_until(headers, now)
+        validators = {name: headers[name] for name in ("etag", "last-modified") if headers.get(name)}
+        if status != 200 or fresh_until is None or len(body) > self.max_item_bytes:
+            return False
+        if "*" in (headers.get("vary") or ""):
+            return False
+        # Without a freshness lifetime or a validator every use would be a full download.
+        if fresh_until <= now and not validators:
+            return False
+
+        key = hashlib.sha256(url.encode("utf-8", errors="replace")).hexdigest()
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _UNSTORED_HEADERS},
+            "validators": validators,
+            "stored_at": now,
+            "fresh_until": fresh_until,
+            "size": len(body),
+        }
+        try:
+            tmp = self._path(key, f"{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as fh:
+                fh.write(body)
+            os.replace(tmp, self._path(key, "body"))
+            self._write_meta(key, meta)
+        except OSError as e:
+            logger.warning(f"Could not store {url} in the asset cache: {e}")
+            return False
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= int(previous.get("size") or 0)
+            self._entries[key] = meta
+            self._size += len(body)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+            ASSET_CACHE_BYTES.set(self._size)
+        return True
+
+    def _write_meta(self, key: str, meta: Dict[str, Any]) -> None:
+        tmp = self._path(key, f"{os.getpid()}.{threading.get_ident()}.json.tmp")
+        with open(tmp, "w") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, self._path(key, "json"))
+
+    def revalidated(self, entry: Dict[str, Any], headers: Dict[str, str]) -> None:
+        now = time.time()
+        fresh_until = _fresh_until({**entry["headers"], **headers}, now)
+        meta = {k: v for k, v in entry.items() if k not in ("key", "body")}
+        meta.update({"stored_at": now, "fresh_until": fresh_until if fresh_until is not None else now})
+        try:
+            self._write_meta(entry["key"], meta)
+        except OSError:
+            return
+        with self._lock:
+            if entry["key"] in self._entries:
+                self._entries[entry["key"]] = meta
+
+    async def handle(self, route, request) -> None:
+        entry = self.lookup(request.url)
+        if entry is not None and entry["fresh_until"] > time.time():
+            ASSET_CACHE_REQUESTS.labels("hit").inc()
+            await route.fulfill(status=entry["status"], headers=entry["headers"], body=entry["body"])
+            return
+
+        headers = None
+        if entry is not None:
+            headers = await request.all_headers()
+            if entry["validators"].get("etag"):
+                headers["if-none-match"] = entry["validators"]["etag"]
+            if entry["validators"].get("last-modified"):
+                headers["if-modified-since"] = entry["validators"]["last-modified"]
+
+        try:
+            response = await route.fetch(headers=headers)
+            if entry is not None and response.status == 304:
+                self.revalidated(entry, response.headers)
+                ASSET_CACHE_REQUESTS.labels("revalidated").inc()
+                await route.fulfill(status=entry["status"], headers=entry["headers"], body=entry["body"])
+                return
+            body = await response.body()
+        except Exception:
+            ASSET_CACHE_REQUESTS.labels("error").inc()
+            await route.fallback()
+            return
+
+        stored = self.store(request.url, response.status, response.headers, body)
+        ASSET_CACHE_REQUESTS.labels("miss" if stored else "uncacheable").inc()
+        fulfilled_headers = {k: v for k, v in response.headers.items() if k.lower() not in _UNSTORED_HEADERS - {"set-cookie"}}
+        await route.fulfill(status=response.status, headers=fulfilled_headers, body=body)
+
+
+def get_asset_cache() -> Optional[AssetCache]:
+    global _cache
+    if not SCANNER_ASSET_CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = AssetCache(
+                SCANNER_ASSET_CACHE_DIR,
+                int(SCANNER_ASSET_CACHE_MAX_MB * 1024 * 1024),
+                int(SCANNER_ASSET_CACHE_MAX_ITEM_MB * 1024 * 1024),
+            )
+        return _cache
@@ -0,0 +1,152 @@
+import time
+import uuid
+import logging
+from typing import Any, Dict, List, Optional
+
+from app import db
+from app.services.changes import bump_scans_version
+from app.services.reporting import load_report_rows
+from app.services.scan_queue import enqueue_scan
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def create_batch(sites: List[str], max_pages: int, max_clicks_per_page: int, samples_per_template: int = 0, name: Optional[str] = None) -> Dict[str, Any]:
+    batch_id = str(uuid.uuid4())
+    now = time.time()
+
+    scan_docs = []
+    for site in dict.fromkeys(sites):
+        scan_docs.append({
+            "_id": str(uuid.uuid4()),
+            "start_url": site,
+            "status": "queued",
+            "pages_scanned": 0,
+            "total_pages": 0,
+            "max_pages": max_pages,
+            "max_clicks_per_page": max_clicks_per_page,
+            "samples_per_template": samples_per_template,
+            "created_at": now,
+            "batch_id": batch_id,
+        })
+
+    batch = {
+        "_id": batch_id,
+        "name": name or f"Batch of {len(scan_docs)} sites",
+        "created_at": now,
+        "total_scans": len(scan_docs),
+        "options": {
+            "max_pages": max_pages,
+            "max_clicks_per_page": max_clicks_per_page,
+            "samples_per_template": samples_per_template,
+        },
+    }
+    db.batches_col.insert_one(batch)
+    if scan_docs:
+        db.scans_col.insert_many(scan_docs)
+        bump_scans_version()
+
+    for scan in scan_docs:
+        enqueue_scan(scan["_id"], scan["start_url"], max_pages, max_clicks_per_page, samples_per_template=samples_per_template)
+
+    logger.info(f"Created batch {batch_id} with {len(scan_docs)} scans")
+    return {"batch_id": batch_id, "scan_ids": [s["_id"] for s in scan_docs]}
+
+
+def batch_progress(batch: Dict[str, Any]) -> Dict[str, Any]:
+    pipeline = [
+        {"$match": {"batch_id": batch["_id"]}},
+        {"$group": {
+            "_id": "$status",
+            "scans": {"$sum": 1},
+            "pages_scanned": {"$sum": "$pages_scanned"},
+            "total_pages": {"$sum": "$total_pages"},
+            "started_at": {"$min": "$started_at"},
+            "completed_at": {"$max": "$completed_at"},
+        }},
+    ]
+    by_status: Dict[str, int] = {}
+    pages_scanned = 0
+    total_pages = 0
+    started_at = None
+    completed_at = None
+    for group in db.scans_col.aggregate(pipeline):
+        by_status[group["_id"]] = group["scans"]
+        pages_scanned += group.get("pages_scanned") or 0
+        total_pages += group.get("total_pages") or 0
+        if group.get("started_at"):
+            started_at = min(started_at or group["started_at"], group["started_at"])
+        if group.get("completed_at"):
+            completed_at = max(completed_at or group["completed_at"], group["completed_at"])
+
+    total = sum(by_status.values())
+    finished = sum(by_status.get(s, 0) for s in TERMINAL_STATUSES)
+    if total and finished == total:
+        status = "completed" if not by_status.get("failed") else "completed_with_errors"
+    elif by_status.get("queued", 0) == total:
+        status = "queued"
+    else:
+        status = "running"
+
+    return {
+        "batch_id": batch["_id"],
+        "name": batch.get("name"),
+        "status": status,
+        "created_at": batch.get("created_at"),
+        "started_at": started_at,
+        "completed_at": completed_at if status.startswith("completed") else None,
+        "total_scans": total,
+        "finished_scans": finished,
+        "scans_by_status": by_status,
+        "pages_scanned": pages_scanned,
+        "total_pages": total_pages,
+    }
+
+
+def batch_summary(batch_id: str) -> List[Dict[str, Any]]:
+    scans = list(db.scans_col.find(
+        {"batch_id": batch_id},
+        {"start_url": 1, "status": 1, "pages_scanned": 1, "duration_seconds": 1, "error": 1},
+    ).sort("created_at", 1))
+
+    tagged_by_scan: Dict[str, Dict[str, int]] = {}
+    pipeline = [
+        {"$match": {"scan_id": {"$in": [s["_id"] for s in scans]}}},
+        {"$group": {
+            "_id": "$scan_id",
+            "pages": {"$sum": 1},
+            "tagged_pages": {"$sum": {"$cond": ["$has_tagging", 1, 0]}},
+            "load_beacons": {"$sum": {"$size": {"$ifNull": ["$load_beacons", []]}}},
+        }},
+    ]
+    for group in db.pages_col.aggregate(pipeline):
+        tagged_by_scan[group["_id"]] = group
+
+    summary = []
+    for scan in scans:
+        stats = tagged_by_scan.get(scan["_id"], {})
+        summary.append({
+            "Scan ID": scan["_id"],
+            "Site": scan.get("start_url", ""),
+            "Status": scan.get("status", ""),
+            "Pages Scanned": stats.get("pages", scan.get("pages_scanned", 0)),
+            "Pages With Adobe Launch": stats.get("tagged_pages", 0),
+            "Page Load Beacons": stats.get("load_beacons", 0),
+            "Duration (s)": scan.get("duration_seconds", ""),
+            "Error": scan.get("error", ""),
+        })
+    return summary
+
+
+def batch_report_rows(batch_id: str) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for scan in db.scans_col.find({"batch_id": batch_id, "status": "completed"}, {"start_url": 1}).sort("created_at", 1):
+        report = db.reports_col.find_one({"_id": scan["_id"]})
+        if not report:
+            continue
+        for row in load_report_rows(report):
+            rows.append({"Site": scan.get("start_url", ""), **row})
+    return rows
@@ -0,0 +1,100 @@
+import time
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from app import db
+
+
+logger = logging.getLogger(__name__)
+
+BEACON_FILTER_FIELDS = ("scan_id", "site", "page_url", "report_suite", "tracking_server", "beacon_type", "variables_hash")
+BEACON_GROUP_FIELDS = ("site", "report_suite", "tracking_server", "beacon_type", "scan_id", "page_url")
+
+
+def site_of(url: str) -> str:
+    return urlparse(url or "").netloc.lower()
+
+
+def beacon_index_docs(scan_id: str, site: str, page_url: str, fingerprint: Dict[str, Any], captured_at: float) -> List[Dict[str, Any]]:
+    docs = []
+    for beacon in fingerprint.get("beacons", []):
+        source = beacon["key"].split("|", 1)[0]
+        docs.append({
+            "scan_id": scan_id,
+            "site": site,
+            "page_url": page_url,
+            "source": source,
+            "beacon_type": beacon.get("type"),
+            "report_suite": beacon.get("report_suite"),
+            "tracking_server": (beacon.get("tracking_server") or "").lower() or None,
+            "variables_hash": beacon.get("hash"),
+            "captured_at": captured_at,
+        })
+    return docs
+
+
+def index_page_beacons(scan_id: str, site: str, page_url: str, fingerprint: Dict[str, Any], captured_at: Optional[float] = None) -> int:
+    if db.beacons_col is None:
+        return 0
+    docs = beacon_index_docs(scan_id, site, page_url, fingerprint, captured_at or time.time())
+    if docs:
+        db.beacons_col.insert_many(docs, ordered=False)
+    return len(docs)
+
+
+def beacon_query(filters: Dict[str, Any], since: Optional[float] = None) -> Dict[str, Any]:
+    query = {k: v for k, v in filters.items() if k in BEACON_FILTER_FIELDS and v is not None}
+    if since is not None:
+        query["captured_at"] = {"$gte": since}
+    return query
+
+
+def find_beacons(query: Dict[str, Any], limit: int = 100, skip: int = 0) -> List[Dict[str, Any]]:
+    cursor = db.beacons_col.find(query, {"_id": 0}).sort("captured_at", -1).skip(skip).limit(limit)
+    return list(cursor)
+
+
+def summarize_beacons(query: Dict[str, Any], group_by: str, limit: int = 100) -> List[Dict[str, Any]]:
+    pipeline = [
+        {"$match": query},
+        {"$group": {
+            "_id": f"${group_by}",
+            "beacons": {"$sum": 1},
+            "sites": {"$addToSet": "$site"},
+            "scans": {"$addToSet": "$scan_id"},
+            "pages": {"$addToSet": "$page_url"},
+            "last_seen_at": {"$max": "$captured_at"},
+        }},
+        {"$project": {
+            "_id": 0,
+            group_by: "$_id",
+            "beacons": 1,
+            "sites": {"$size": "$sites"},
+            "scans": {"$size": "$scans"},
+            "pages": {"$size": "$pages"},
+            "last_seen_at": 1,
+        }},
+        {"$sort": {"beacons": -1}},
+        {"$limit": limit},
+    ]
+    return list(db.beacons_col.aggregate(pipeline, allowDiskUse=True))
+
+
+def reindex_scan_beacons(scan_id: str) -> int:
+    from app.services.diffs import FINGERPRINT_VERSION, page_fingerprint
+
+    scan = db.scans_col.find_one({"_id": scan_id}, {"start_url": 1, "completed_at": 1, "created_at": 1})
+    if not scan:
+        return 0
+    site = site_of(scan.get("start_url", ""))
+    captured_at = scan.get("completed_at") or scan.get("created_at") or time.time()
+
+    db.beacons_col.delete_many({"scan_id": scan_id})
+    indexed = 0
+    for page in db.pages_col.find({"scan_id": scan_id}):
+        fingerprint = page.get("fingerprint") or {}
+        if fingerprint.get("v") != FINGERPRINT_VERSION:
+            fingerprint = page_fingerprint(page.get("has_tagging", False), page.get("load_beacons", []), page.get("click_events", []))
+        indexed += index_page_beacons(scan_id, site, page.get("url", ""), fingerprint, captured_at)
+    return indexed
@@ -0,0 +1,99 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+from app import db
+
+
+logger = logging.getLogger(__name__)
+
+SCAN_MAX_DURATION_SECONDS = float(os.getenv("SCAN_MAX_DURATION_SECONDS", "0"))
+SCAN_MAX_NAVIGATIONS = int(os.getenv("SCAN_MAX_NAVIGATIONS", "0"))
+SCAN_MAX_BYTES = int(os.getenv("SCAN_MAX_BYTES", "0"))
+CANCEL_POLL_SECONDS = float(os.getenv("SCAN_CANCEL_POLL_SECONDS", "5"))
+
+_cancelled: Dict[str, str] = {}
+_cancelled_lock = threading.Lock()
+
+
+def request_cancel(scan_id: str, reason: str = "cancelled") -> None:
+    with _cancelled_lock:
+        _cancelled[scan_id] = reason
+    # The flag on the scan document reaches workers in other processes.
+    db.scans_col.update_one({"_id": scan_id}, {"$set": {"cancel_requested": True}})
+
+
+def clear_cancel(scan_id: str) -> None:
+    with _cancelled_lock:
+        _cancelled.pop(scan_id, None)
+
+
+def cancel_reason(scan_id: str) -> Optional[str]:
+    with _cancelled_lock:
+        return _cancelled.get(scan_id)
+
+
+class ScanBudget:
+    def __init__(self, scan_id: str, max_duration_seconds: float = 0, max_navigations: int = 0, max_bytes: int = 0):
+        self.scan_id = scan_id
+        self.max_duration_seconds = float(max_duration_seconds or SCAN_MAX_DURATION_SECONDS)
+        self.max_navigations = int(max_navigations or SCAN_MAX_NAVIGATIONS)
+        self.max_bytes = int(max_bytes or SCAN_MAX_BYTES)
+        self.started_at = time.time()
+        self.navigations = 0
+        self.bytes = 0
+        self.stop_reason: Optional[str] = None
+        self._polled_at = self.started_at
+
+    def restore(self, usage: Optional[dict]) -> None:
+        # A resumed scan continues from what it spent before it was interrupted.
+        if not usage:
+            return
+        self.started_at = time.time() - float(usage.get("elapsed_seconds") or 0)
+        self.navigations = int(usage.get("navigations") or 0)
+        self.bytes = int(usage.get("bytes") or 0)
+
+    def add_navigation(self) -> None:
+        self.navigations += 1
+
+    def add_bytes(self, count: float) -> None:
+        self.bytes += int(count or 0)
+
+    def _poll_db(self) -> Optional[str]:
+        now = time.time()
+        if now - self._polled_at < CANCEL_POLL_SECONDS:
+            return None
+        self._polled_at = now
+        scan = db.scans_col.find_one({"_id": self.scan_id}, {"cancel_requested": 1, "status": 1})
+        if scan is None or scan.get("status") == "deleting":
+            return "deleted"
+        if scan.get("cancel_requested"):
+            return "cancelled"
+        return None
+
+    def check(self) -> Optional[str]:
+        if self.stop_reason:
+            return self.stop_reason
+        reason = cancel_reason(self.scan_id)
+        if reason:
+            self.stop_reason = reason
+        elif self.max_duration_seconds and time.time() - self.started_at >= self.max_duration_seconds:
+            self.stop_reason = "max_duration"
+        elif self.max_navigations and self.navigations >= self.max_navigations:
+            self.stop_reason = "max_navigations"
+        elif self.max_bytes and self.bytes >= self.max_bytes:
+            self.stop_reason = "max_bytes"
+        else:
+            self.stop_reason = self._poll_db()
+        if self.stop_reason:
+            logger.info(f"Stopping scan {self.scan_id}: {self.stop_reason}")
+        return self.stop_reason
+
+    def usage(self) -> dict:
+        return {
+            "elapsed_seconds": round(time.time() - self.started_at, 2),
+            "navigations": self.navigations,
+            "bytes": self.bytes,
+        }
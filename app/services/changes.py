@@ -0,0 +1,58 @@
+import os
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import db
+
+
+SCANS_VERSION_TTL_SECONDS = float(os.getenv("SCANS_VERSION_TTL_SECONDS", "1"))
+_LISTING_CACHE_SIZE = 8
+
+_lock = threading.Lock()
+_version: Optional[int] = None
+_version_read_at = 0.0
+_listings: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+
+
+def bump_scans_version() -> None:
+    # Called after every write that changes what GET /scans returns. The
+    # shared counter lets other processes notice; the local reset makes this
+    # process re-read it immediately.
+    global _version
+    if db.meta_col is not None:
+        db.meta_col.update_one({"_id": "scans"}, {"$inc": {"version": 1}}, upsert=True)
+    with _lock:
+        _version = None
+        _listings.clear()
+
+
+def scans_version() -> int:
+    global _version, _version_read_at
+    now = time.monotonic()
+    with _lock:
+        if _version is not None and now - _version_read_at < SCANS_VERSION_TTL_SECONDS:
+            return _version
+
+    doc = db.meta_col.find_one({"_id": "scans"}, {"version": 1}) if db.meta_col is not None else None
+    version = int((doc or {}).get("version", 0))
+    with _lock:
+        if version != _version:
+            _listings.clear()
+        _version = version
+        _version_read_at = now
+    return version
+
+
+def cached_listing(version: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+    with _lock:
+        return _listings.get((version, limit))
+
+
+def store_listing(version: int, limit: int, docs: List[Dict[str, Any]]) -> None:
+    with _lock:
+        if _version != version:
+            return
+        if len(_listings) >= _LISTING_CACHE_SIZE:
+            _listings.clear()
+        _listings[(version, limit)] = docs
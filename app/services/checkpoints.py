@@ -0,0 +1,118 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from app import db
+from app.services.cancellation import ScanBudget, clear_cancel
+from app.services.changes import bump_scans_version
+
+
+logger = logging.getLogger(__name__)
+
+SCAN_CHECKPOINT_EVERY_PAGES = int(os.getenv("SCAN_CHECKPOINT_EVERY_PAGES", "5"))
+SCAN_CHECKPOINT_EVERY_SECONDS = float(os.getenv("SCAN_CHECKPOINT_EVERY_SECONDS", "30"))
+SCAN_HEARTBEAT_TIMEOUT_SECONDS = float(os.getenv("SCAN_HEARTBEAT_TIMEOUT_SECONDS", "300"))
+SCAN_HEARTBEAT_INTERVAL_SECONDS = max(1.0, SCAN_HEARTBEAT_TIMEOUT_SECONDS / 5)
+
+
+class ScanCheckpointer:
+    def __init__(self, scan_id: str, budget: Optional[ScanBudget] = None):
+        self.scan_id = scan_id
+        self.budget = budget
+        self.pages_since = 0
+        self.saved_at = time.time()
+
+    def page_done(self, queue: List[str], visited: Iterable[str], sampler_state: Optional[Dict[str, Any]] = None) -> bool:
+        self.pages_since += 1
+        due = self.pages_since >= SCAN_CHECKPOINT_EVERY_PAGES or time.time() - self.saved_at >= SCAN_CHECKPOINT_EVERY_SECONDS
+        if due:
+            self.save(queue, visited, sampler_state)
+        return due
+
+    def save(self, queue: List[str], visited: Iterable[str], sampler_state: Optional[Dict[str, Any]] = None) -> None:
+        if db.checkpoints_col is None:
+            return
+        now = time.time()
+        # dict.fromkeys keeps frontier order while dropping duplicate links.
+        db.checkpoints_col.replace_one(
+            {"_id": self.scan_id},
+            {
+                "_id": self.scan_id,
+                "queue": list(dict.fromkeys(queue)),
+                "visited": sorted(visited),
+                "sampler": sampler_state,
+                "budget_usage": self.budget.usage() if self.budget is not None else None,
+                "saved_at": now,
+            },
+            upsert=True,
+        )
+        db.scans_col.update_one({"_id": self.scan_id}, {"$set": {"checkpointed_at": now, "heartbeat_at": now}})
+        self.pages_since = 0
+        self.saved_at = now
+
+
+def heartbeat(scan_id: str) -> None:
+    db.scans_col.update_one({"_id": scan_id}, {"$set": {"heartbeat_at": time.time()}})
+
+
+async def heartbeat_loop(scan_id: str) -> None:
+    # Runs beside the crawl so one slow page cannot make a live scan look dead.
+    while True:
+        await asyncio.sleep(SCAN_HEARTBEAT_INTERVAL_SECONDS)
+        try:
+            heartbeat(scan_id)
+        except Exception as e:
+            logger.warning(f"Heartbeat failed for scan {scan_id}: {e}")
+
+
+def load_checkpoint(scan_id: str) -> Optional[Dict[str, Any]]:
+    if db.checkpoints_col is None:
+        return None
+    return db.checkpoints_col.find_one({"_id": scan_id})
+
+
+def delete_checkpoint(scan_id: str) -> None:
+    if db.checkpoints_col is not None:
+        db.checkpoints_col.delete_one({"_id": scan_id})
+
+
+def is_stale(scan: Dict[str, Any], now: Optional[float] = None) -> bool:
+    now = now if now is not None else time.time()
+    last_alive = scan.get("heartbeat_at") or scan.get("started_at") or scan.get("created_at") or 0
+    return scan.get("status") == "running" and now - last_alive > SCAN_HEARTBEAT_TIMEOUT_SECONDS
+
+
+def queue_resume(scan: Dict[str, Any]) -> bool:
+    from app.services.scan_queue import enqueue_scan, scan_options
+
+    claimed = db.scans_col.update_one(
+        {"_id": scan["_id"], "status": scan.get("status")},
+        {"$set": {"status": "queued", "resume_requested": True}, "$inc": {"resume_count": 1}, "$unset": {"error": "", "cancel_requested": "", "stop_reason": ""}},
+    ).modified_count
+    if not claimed:
+        return False
+    bump_scans_version()
+    clear_cancel(scan["_id"])
+    options = {**scan_options(scan), "resume": True}
+    enqueue_scan(scan["_id"], scan["start_url"], int(scan.get("max_pages") or 10), int(scan.get("max_clicks_per_page") or 5), **options)
+    return True
+
+
+def recover_stale_scans() -> int:
+    if db.scans_col is None:
+        return 0
+
+    cutoff = time.time() - SCAN_HEARTBEAT_TIMEOUT_SECONDS
+    recovered = 0
+    for scan in db.scans_col.find({"status": "running", "heartbeat_at": {"$lt": cutoff}}):
+        if scan.get("start_url") and queue_resume(scan):
+            logger.warning(f"Resuming scan {scan['_id']}: no heartbeat since {scan.get('heartbeat_at')}")
+            recovered += 1
+    # Scans started before heartbeats existed never get one.
+    for scan in db.scans_col.find({"status": "running", "heartbeat_at": {"$exists": False}, "started_at": {"$lt": cutoff}}):
+        if scan.get("start_url") and queue_resume(scan):
+            logger.warning(f"Resuming scan {scan['_id']}: started before heartbeats and still marked running")
+            recovered += 1
+    return recovered
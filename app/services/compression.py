@@ -0,0 +1,98 @@
+import os
+import json
+import zlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from bson.binary import Binary
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logger = logging.getLogger(__name__)
+
+STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION", "").strip().lower()
+STORAGE_COMPRESSION_MIN_BYTES = int(os.getenv("STORAGE_COMPRESSION_MIN_BYTES", "1024"))
+STORAGE_COMPRESSION_LEVEL = int(os.getenv("STORAGE_COMPRESSION_LEVEL", "6"))
+
+COMPRESSED_SUBTYPE = 0x80
+
+_CODEC_ZLIB = b"z"
+_CODEC_ZSTD = b"s"
+_KIND_TEXT = b"t"
+_KIND_JSON = b"j"
+
+
+def _resolve_codec(name: str) -> bytes | None:
+    if name == "zstd":
+        if zstandard is not None:
+            return _CODEC_ZSTD
+        logger.warning("zstd compression requested but the zstandard package is not installed; using zlib")
+        return _CODEC_ZLIB
+    if name == "zlib":
+        return _CODEC_ZLIB
+    return None
+
+
+_ACTIVE_CODEC = _resolve_codec(STORAGE_COMPRESSION)
+
+
+def is_compressed(value: Any) -> bool:
+    return isinstance(value, Binary) and value.subtype == COMPRESSED_SUBTYPE
+
+
+def compress_value(value: Any, codec: Optional[str] = None) -> Any:
+    # codec overrides STORAGE_COMPRESSION, e.g. for migrations.
+    codec = _ACTIVE_CODEC if codec is None else _resolve_codec(codec)
+    if codec is None or value is None or is_compressed(value):
+        return value
+
+    if isinstance(value, str):
+        kind = _KIND_TEXT
+        raw = value.encode("utf-8", errors="surrogatepass")
+    elif isinstance(value, (dict, list)):
+        kind = _KIND_JSON
+        raw = json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+    else:
+        return value
+
+    if len(raw) < STORAGE_COMPRESSION_MIN_BYTES:
+        return value
+
+    if codec == _CODEC_ZSTD:
+        packed = zstandard.ZstdCompressor(level=STORAGE_COMPRESSION_LEVEL).compress(raw)
+    else:
+        packed = zlib.compress(raw, STORAGE_COMPRESSION_LEVEL)
+
+    if len(packed) >= len(raw):
+        return value
+    return Binary(codec + kind + packed, COMPRESSED_SUBTYPE)
+
+
+def decompress_value(value: Any) -> Any:
+    if not is_compressed(value):
+        return value
+
+    data = bytes(value)
+    codec, kind, packed = data[:1], data[1:2], data[2:]
+    if codec == _CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Stored value is zstd-compressed but the zstandard package is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(packed)
+    else:
+        raw = zlib.decompress(packed)
+
+    text = raw.decode("utf-8", errors="surrogatepass")
+    if kind == _KIND_JSON:
+        return json.loads(text)
+    return text
+
+
+def compress_beacons(beacons: List[Dict[str, Any]], codec: Optional[str] = None) -> None:
+    for beacon in beacons:
+        for field in ("payload", "response_payload"):
+            if field in beacon:
+                beacon[field] = compress_value(beacon[field], codec)
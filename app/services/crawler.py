@@ -30,7 +30,7 @@ def normalize_url(url: str, base_url: str = '') -> str:
     return url
 
 
-def collect_urls(start_url: str, max_pages: int = 10) -> List[str]:
+def collect_urls(start_url: str, max_pages: int = 10, delay_seconds: float = 1.0) -> List[str]:
     if not is_valid_url(start_url):
         raise ValueError(f"Invalid start URL: {start_url}")
 
@@ -66,7 +66,8 @@ def collect_urls(start_url: str, max_pages: int = 10) -> List[str]:
         visited.add(current_url)
 
         try:
-            time.sleep(1)
+            if delay_seconds > 0:
+                time.sleep(delay_seconds)
 
             logger.info(f"Crawling: {current_url}")
 
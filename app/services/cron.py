@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from typing import List, Set
+
+
+FIELD_RANGES = [
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+]
+
+_MONTH_NAMES = {name: i + 1 for i, name in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+_WEEKDAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+_MAX_SEARCH_DAYS = 366 * 5
+
+
+class CronError(ValueError):
+    pass
+
+
+def _parse_value(token: str, field: str) -> int:
+    lowered = token.lower()
+    if field == "month" and lowered in _MONTH_NAMES:
+        return _MONTH_NAMES[lowered]
+    if field == "weekday" and lowered in _WEEKDAY_NAMES:
+        return _WEEKDAY_NAMES[lowered]
+    try:
+        return int(token)
+    except ValueError:
+        raise CronError(f"Invalid {field} value: {token}")
+
+
+def _parse_field(expr: str, field: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in expr.split(","):
+        step = 1
+        if "/" in part:
+            part, step_s = part.split("/", 1)
+            try:
+                step = int(step_s)
+            except ValueError:
+                raise CronError(f"Invalid {field} step: {step_s}")
+            if step < 1:
+                raise CronError(f"Invalid {field} step: {step_s}")
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = _parse_value(a, field), _parse_value(b, field)
+        else:
+            start = _parse_value(part, field)
+            end = high if step > 1 else start
+
+        if start < low or end > high or start > end:
+            raise CronError(f"{field} out of range: {part}")
+        values.update(range(start, end + 1, step))
+
+    if field == "weekday":
+        values = {v % 7 for v in values}
+    return values
+
+
+class CronExpression:
+    def __init__(self, expr: str):
+        parts = expr.split()
+        if len(parts) != 5:
+            raise CronError("Cron expression must have 5 fields: minute hour day month weekday")
+        self.expr = expr
+        fields: List[Set[int]] = [
+            _parse_field(part, name, low, high) for part, (name, low, high) in zip(parts, FIELD_RANGES)
+        ]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = fields
+        # As in Vixie cron, a field starting with "*" (including "*/2") does
+        # not restrict, so the two day fields are only OR-ed when neither does.
+        self.day_restricted = not parts[2].startswith("*")
+        self.weekday_restricted = not parts[4].startswith("*")
+
+    def _day_matches(self, dt: datetime) -> bool:
+        cron_weekday = (dt.weekday() + 1) % 7
+        day_ok = dt.day in self.days
+        weekday_ok = cron_weekday in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=_MAX_SEARCH_DAYS)
+        while dt <= limit:
+            if dt.month not in self.months:
+                year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+                dt = dt.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+                continue
+            if dt.minute not in self.minutes:
+                dt = dt + timedelta(minutes=1)
+                continue
+            return dt
+        raise CronError(f"Cron expression never fires: {self.expr}")
@@ -0,0 +1,175 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from app import db
+from app.services.cancellation import cancel_reason
+from app.services.changes import bump_scans_version
+from app.services.retention import DELETE_BATCH_SIZE, delete_orphaned_data, delete_scan_data
+from app.services.scan_queue import cancel_scan_run
+
+
+logger = logging.getLogger(__name__)
+
+DELETE_JOB_POLL_SECONDS = float(os.getenv("DELETE_JOB_POLL_SECONDS", "5"))
+DELETE_JOB_STALE_SECONDS = float(os.getenv("DELETE_JOB_STALE_SECONDS", "300"))
+DELETE_WAIT_FOR_SCAN_SECONDS = float(os.getenv("DELETE_WAIT_FOR_SCAN_SECONDS", "60"))
+
+_worker_thread: Optional[threading.Thread] = None
+_worker_stop = threading.Event()
+_worker_wake = threading.Event()
+
+
+def create_delete_job(scan_id: Optional[str] = None) -> Dict[str, Any]:
+    job_id = str(uuid.uuid4())
+    query: Dict[str, Any] = {"status": {"$ne": "deleting"}}
+    if scan_id is not None:
+        query["_id"] = scan_id
+
+    active = [s["_id"] for s in db.scans_col.find({**query, "status": {"$in": ["queued", "running"]}}, {"_id": 1})]
+    for active_id in active:
+        cancel_scan_run(active_id, reason="deleted")
+
+    # Marking is one small update per scan document; the heavy page and
+    # report deletes happen in the worker.
+    marked = db.scans_col.update_many(
+        query,
+        [{"$set": {"status_before_delete": "$status", "status": "deleting", "delete_job_id": job_id}}],
+    ).modified_count
+    now = time.time()
+    job = {
+        "_id": job_id,
+        "scope": "scan" if scan_id is not None else "all",
+        "scan_id": scan_id,
+        "status": "queued",
+        "created_at": now,
+        "updated_at": now,
+        "progress": {"scans_total": marked, "scans_deleted": 0, "pages_deleted": 0, "reports_deleted": 0},
+    }
+    db.delete_jobs_col.insert_one(job)
+    bump_scans_version()
+    _worker_wake.set()
+    return job
+
+
+def find_delete_job_for_scan(scan_id: str) -> Optional[Dict[str, Any]]:
+    scan = db.scans_col.find_one({"_id": scan_id, "status": "deleting"}, {"delete_job_id": 1})
+    if not scan or not scan.get("delete_job_id"):
+        return None
+    return db.delete_jobs_col.find_one({"_id": scan["delete_job_id"]})
+
+
+def list_delete_jobs(limit: int = 20) -> List[Dict[str, Any]]:
+    return list(db.delete_jobs_col.find({}).sort("created_at", -1).limit(limit))
+
+
+def _wait_for_scan_to_stop(scan_id: str) -> None:
+    # A scan running in this process keeps its cancel flag until run_scan
+    # returns, so deleting earlier would race with its last page writes.
+    deadline = time.time() + DELETE_WAIT_FOR_SCAN_SECONDS
+    while cancel_reason(scan_id) == "deleted" and time.time() < deadline and not _worker_stop.is_set():
+        time.sleep(0.5)
+
+
+def _progress(job_id: str, **counts: int) -> None:
+    db.delete_jobs_col.update_one(
+        {"_id": job_id},
+        {"$inc": {f"progress.{k}": v for k, v in counts.items()}, "$set": {"updated_at": time.time()}},
+    )
+
+
+def run_delete_job(job: Dict[str, Any]) -> None:
+    job_id = job["_id"]
+    logger.info(f"Running delete job {job_id} ({job['scope']})")
+    while not _worker_stop.is_set():
+        scans = list(
+            db.scans_col.find({"delete_job_id": job_id}, {"_id": 1, "status_before_delete": 1}).limit(DELETE_BATCH_SIZE)
+        )
+        if not scans:
+            break
+        for scan in scans:
+            if _worker_stop.is_set():
+                return
+            if scan.get("status_before_delete") == "running":
+                _wait_for_scan_to_stop(scan["_id"])
+            counts = delete_scan_data(scan["_id"], on_pages_deleted=lambda n: _progress(job_id, pages_deleted=n))
+            _progress(job_id, scans_deleted=counts["scans_deleted"], reports_deleted=counts["reports_deleted"])
+
+    if _worker_stop.is_set():
+        return
+    # Also catches pages a scan in another process wrote after its data was deleted.
+    if job["scope"] == "all":
+        orphans = delete_orphaned_data()
+        _progress(job_id, pages_deleted=orphans["pages_deleted"], reports_deleted=orphans["reports_deleted"])
+
+    completed_at = time.time()
+    db.delete_jobs_col.update_one(
+        {"_id": job_id},
+        {"$set": {"status": "completed", "completed_at": completed_at, "updated_at": completed_at}},
+    )
+    logger.info(f"Delete job {job_id} completed")
+
+
+def _claim_next_job() -> Optional[Dict[str, Any]]:
+    now = time.time()
+    return db.delete_jobs_col.find_one_and_update(
+        {"$or": [
+            {"status": "queued"},
+            # Jobs left running by a worker that died are picked up again.
+            {"status": "running", "updated_at": {"$lt": now - DELETE_JOB_STALE_SECONDS}},
+        ]},
+        {"$set": {"status": "running", "started_at": now, "updated_at": now}},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def run_pending_delete_jobs() -> int:
+    if db.delete_jobs_col is None or db.scans_col is None:
+        return 0
+
+    ran = 0
+    while not _worker_stop.is_set():
+        job = _claim_next_job()
+        if job is None:
+            break
+        try:
+            run_delete_job(job)
+        except Exception as e:
+            logger.error(f"Delete job {job['_id']} failed: {e}", exc_info=True)
+            db.delete_jobs_col.update_one(
+                {"_id": job["_id"]},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": time.time()}},
+            )
+        ran += 1
+    return ran
+
+
+def _worker_loop() -> None:
+    while not _worker_stop.is_set():
+        try:
+            run_pending_delete_jobs()
+        except Exception as e:
+            logger.error(f"Delete worker failed: {e}")
+        _worker_wake.wait(DELETE_JOB_POLL_SECONDS)
+        _worker_wake.clear()
+
+
+def start_delete_worker() -> None:
+    global _worker_thread
+    if _worker_thread is not None and _worker_thread.is_alive():
+        return
+
+    _worker_stop.clear()
+    _worker_thread = threading.Thread(target=_worker_loop, name="delete-worker", daemon=True)
+    _worker_thread.start()
+
+
+def stop_delete_worker() -> None:
+    _worker_stop.set()
+    _worker_wake.set()
@@ -0,0 +1,219 @@
+import os
+import re
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlparse, parse_qs
+
+
+logger = logging.getLogger(__name__)
+
+CUSTOM_BEACON_HOSTS = [h.strip().lower() for h in os.getenv("SCANNER_CUSTOM_BEACON_HOSTS", "").split(",") if h.strip()]
+
+
+def _flatten_params(params: Dict[str, List[str]]) -> Dict[str, Any]:
+    return {k: v[0] if len(v) == 1 else v for k, v in params.items()}
+
+
+def parse_generic_payload(request_url: str, post_data: Optional[str]) -> Any:
+    if post_data:
+        try:
+            return json.loads(post_data)
+        except (TypeError, ValueError):
+            return post_data
+
+    parsed = urlparse(request_url)
+    if not parsed.query:
+        return ""
+    return _flatten_params(parse_qs(parsed.query))
+
+
+def parse_form_payload(request_url: str, post_data: Optional[str]) -> Any:
+    if post_data:
+        params = parse_qs(post_data, keep_blank_values=True)
+        if params:
+            return _flatten_params(params)
+        return post_data
+    return parse_generic_payload(request_url, None)
+
+
+def _base_info(beacon_type: str, parsed) -> Dict[str, Any]:
+    return {
+        'beacon_type': beacon_type,
+        'report_suite': None,
+        'tracking_server': parsed.netloc,
+        'version': None,
+        'parameters': _flatten_params(parse_qs(parsed.query)),
+    }
+
+
+def extract_legacy(request_url: str, payload: Any = None) -> Dict[str, Any]:
+    parsed = urlparse(request_url)
+    result = _base_info('legacy', parsed)
+    parts = parsed.path.split('/')
+    if len(parts) > 3:
+        result['report_suite'] = parts[3].split(',')[0]
+    if len(parts) > 5 and parts[5].isdigit():
+        result['version'] = parts[5]
+    if isinstance(payload, dict) and not result['parameters']:
+        result['parameters'] = payload
+    return result
+
+
+def extract_websdk(request_url: str, payload: Any = None) -> Dict[str, Any]:
+    parsed = urlparse(request_url)
+    result = _base_info('websdk', parsed)
+    params = result['parameters']
+    if 'configId' in params:
+        result['config_id'] = params['configId']
+    if 'requestId' in params:
+        result['request_id'] = params['requestId']
+    return result
+
+
+def extract_target(request_url: str, payload: Any = None) -> Dict[str, Any]:
+    parsed = urlparse(request_url)
+    result = _base_info('target', parsed)
+    host = parsed.hostname or ''
+    if host.endswith('.tt.omtrdc.net'):
+        result['client_code'] = host[:-len('.tt.omtrdc.net')]
+    mboxes = []
+    if isinstance(payload, dict):
+        for section in ('execute', 'prefetch'):
+            for mbox in (payload.get(section) or {}).get('mboxes', []) or []:
+                if isinstance(mbox, dict) and mbox.get('name'):
+                    mboxes.append(mbox['name'])
+    if '/mbox/json' in parsed.path:
+        mbox_name = result['parameters'].get('mbox')
+        if mbox_name:
+            mboxes.append(mbox_name)
+    if mboxes:
+        result['mboxes'] = mboxes
+    return result
+
+
+def extract_audience_manager(request_url: str, payload: Any = None) -> Dict[str, Any]:
+    parsed = urlparse(request_url)
+    result = _base_info('audience_manager', parsed)
+    params = result['parameters']
+    if 'd_orgid' in params:
+        result['org_id'] = params['d_orgid']
+    return result
+
+
+def extract_custom(request_url: str, payload: Any = None) -> Dict[str, Any]:
+    return _base_info('custom', urlparse(request_url))
+
+
+class BeaconDetector:
+    def __init__(
+        self,
+        name: str,
+        path_pattern: str,
+        hosts: Sequence[str] = (),
+        tokens: Sequence[str] = (),
+        analytics: bool = False,
+        parse_payload: Callable[[str, Optional[str]], Any] = parse_generic_payload,
+        extract: Callable[[str, Any], Dict[str, Any]] = extract_custom,
+    ):
+        self.name = name
+        self.path_pattern = path_pattern
+        self.hosts = tuple(h.lower() for h in hosts)
+        self.tokens = tuple(tokens) or self.hosts
+        self.analytics = analytics
+        self.parse_payload = parse_payload
+        self.extract = extract
+
+    def url_source(self) -> str:
+        if self.hosts:
+            host = "(?:[^/?#]*\\.)?(?:" + "|".join(re.escape(h) for h in self.hosts) + ")"
+        else:
+            host = "[^/?#]+"
+        return f"^https?://{host}(?::\\d+)?(?:{self.path_pattern})"
+
+
+DETECTORS: List[BeaconDetector] = [
+    BeaconDetector(
+        name="aa_legacy",
+        path_pattern="/b/ss/[^/?#]+/",
+        tokens=("/b/ss/",),
+        analytics=True,
+        parse_payload=parse_form_payload,
+        extract=extract_legacy,
+    ),
+    BeaconDetector(
+        name="websdk",
+        path_pattern="/ee/(?:[^/?#]+/)?v\\d+/(?:interact|collect)(?:[/?#]|$)",
+        tokens=("/ee/",),
+        analytics=True,
+        extract=extract_websdk,
+    ),
+    BeaconDetector(
+        name="target",
+        path_pattern="/rest/v1/delivery|/m2/[^/?#]+/mbox/",
+        hosts=("tt.omtrdc.net",),
+        extract=extract_target,
+    ),
+    BeaconDetector(
+        name="audience_manager",
+        path_pattern="/event|/ibs:|/id(?:[/?#]|$)",
+        hosts=("demdex.net",),
+        extract=extract_audience_manager,
+    ),
+]
+
+if CUSTOM_BEACON_HOSTS:
+    DETECTORS.append(BeaconDetector(name="custom", path_pattern="/", hosts=CUSTOM_BEACON_HOSTS))
+
+_DETECTORS_BY_NAME: Dict[str, BeaconDetector] = {d.name: d for d in DETECTORS}
+_default_matcher: Optional["BeaconMatcher"] = None
+
+
+class BeaconMatcher:
+    def __init__(self, detectors: Sequence[BeaconDetector]):
+        self.detectors = list(detectors)
+        self.tokens = tuple({tok for d in self.detectors for tok in d.tokens})
+        # Group-free source that Playwright can hand to the browser driver as a JS regex.
+        self.route_source = "|".join(f"(?:{d.url_source()})" for d in self.detectors)
+        self.route_pattern = re.compile(self.route_source, re.IGNORECASE)
+        self._named = re.compile(
+            "|".join(f"(?P<d{i}>{d.url_source()})" for i, d in enumerate(self.detectors)),
+            re.IGNORECASE,
+        )
+
+    def match(self, url: str) -> Optional[BeaconDetector]:
+        if not url:
+            return None
+        lowered = url.lower()
+        if not any(tok in lowered for tok in self.tokens):
+            return None
+        m = self._named.match(url)
+        if m is None:
+            return None
+        return self.detectors[int(m.lastgroup[1:])]
+
+
+def register_detector(detector: BeaconDetector) -> None:
+    global _default_matcher
+    DETECTORS[:] = [d for d in DETECTORS if d.name != detector.name] + [detector]
+    _DETECTORS_BY_NAME[detector.name] = detector
+    _default_matcher = None
+
+
+def get_detector(name: Optional[str]) -> Optional[BeaconDetector]:
+    if not name:
+        return None
+    return _DETECTORS_BY_NAME.get(name)
+
+
+def compile_matcher(detectors: Optional[Sequence[BeaconDetector]] = None) -> BeaconMatcher:
+    global _default_matcher
+    if detectors is not None:
+        return BeaconMatcher(detectors)
+    if _default_matcher is None:
+        _default_matcher = BeaconMatcher(DETECTORS)
+    return _default_matcher
+
+
+def detect_beacon(url: str, detector_name: Optional[str] = None) -> Optional[BeaconDetector]:
+    return get_detector(detector_name) or compile_matcher().match(url)
@@ -0,0 +1,246 @@
+import re
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app import db
+from app.services.compression import compress_value, decompress_value
+from app.services.reporting import extract_adobe_analytics_info
+
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_VERSION = 2
+DIFF_PAGE_FIELDS = {"url": 1, "has_tagging": 1, "fingerprint": 1}
+
+_EVAR_PARAM_RE = re.compile(r"^v(\d+)$")
+_EVAR_NAME_RE = re.compile(r"^evar(\d+)$", re.IGNORECASE)
+
+
+def _hash(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=12).hexdigest()
+
+
+def normalize_page_url(url: str) -> str:
+    parsed = urlparse(url or "")
+    path = parsed.path.rstrip("/") or "/"
+    query = f"?{parsed.query}" if parsed.query else ""
+    return f"{parsed.netloc.lower()}{path}{query}"
+
+
+def _event_names(value: Any) -> List[str]:
+    if isinstance(value, list):
+        value = ",".join(str(v) for v in value)
+    if not isinstance(value, str):
+        return []
+    # "event3=2" and "event5:serial" carry counters/serials that differ per hit.
+    return sorted({re.split(r"[=:]", e.strip(), 1)[0] for e in value.split(",") if e.strip()})
+
+
+def _websdk_variables(payload: Any) -> Tuple[Dict[str, Any], List[str]]:
+    evars: Dict[str, Any] = {}
+    events: set = set()
+    if not isinstance(payload, dict):
+        return evars, []
+
+    entries = payload.get("events") if isinstance(payload.get("events"), list) else [payload.get("event")]
+    for entry in entries:
+        xdm = (entry or {}).get("xdm") if isinstance(entry, dict) else None
+        if not isinstance(xdm, dict):
+            continue
+        if xdm.get("eventType"):
+            events.add(xdm["eventType"])
+        analytics = (xdm.get("_experience") or {}).get("analytics") or {}
+        for name, value in ((analytics.get("customDimensions") or {}).get("eVars") or {}).items():
+            m = _EVAR_NAME_RE.match(name)
+            evars[f"eVar{m.group(1)}" if m else name] = value
+        for group in (analytics.get("event1to100"), analytics.get("event101to200")):
+            for name in (group or {}):
+                events.add(name)
+    return evars, sorted(events)
+
+
+def beacon_signature(beacon: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    payload = decompress_value(beacon.get("payload", ""))
+    info = extract_adobe_analytics_info(beacon.get("request_url", ""), payload, beacon.get("detector"))
+
+    if info["beacon_type"] == "websdk":
+        evars, events = _websdk_variables(payload)
+    else:
+        params = info.get("parameters") or {}
+        evars = {}
+        for name, value in params.items():
+            m = _EVAR_PARAM_RE.match(name)
+            if m:
+                evars[f"eVar{m.group(1)}"] = value
+        events = _event_names(params.get("events"))
+
+    signature = {
+        "type": info["beacon_type"],
+        "report_suite": info.get("report_suite"),
+        "evars": evars,
+        "events": events,
+    }
+    return signature, info.get("tracking_server")
+
+
+def page_fingerprint(has_tagging: bool, load_beacons: Iterable[Dict[str, Any]], click_events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    beacons = []
+    counters: Dict[str, int] = {}
+    sources = [("load", load_beacons)] + [(f"click:{c.get('element', '')}", c.get("beacons", [])) for c in click_events]
+    for source, source_beacons in sources:
+        for beacon in source_beacons:
+            signature, tracking_server = beacon_signature(beacon)
+            # Beacons are matched across scans by where they fired and their
+            # ordinal among beacons of the same type from that source.
+            slot = f"{source}|{signature['type']}"
+            ordinal = counters.get(slot, 0)
+            counters[slot] = ordinal + 1
+            beacons.append({
+                "key": f"{slot}|{ordinal}",
+                "hash": _hash(signature),
+                "tracking_server": tracking_server,
+                **signature,
+            })
+
+    return {
+        "v": FINGERPRINT_VERSION,
+        "hash": _hash([has_tagging, [(b["key"], b["hash"]) for b in beacons]]),
+        "beacons": beacons,
+    }
+
+
+def _load_fingerprints(scan_id: str) -> Dict[str, Dict[str, Any]]:
+    pages: Dict[str, Dict[str, Any]] = {}
+    legacy_urls = []
+    for page in db.pages_col.find({"scan_id": scan_id}, DIFF_PAGE_FIELDS):
+        fingerprint = page.get("fingerprint")
+        if not fingerprint or fingerprint.get("v") != FINGERPRINT_VERSION:
+            legacy_urls.append(page["url"])
+            continue
+        pages[normalize_page_url(page["url"])] = {"url": page["url"], "has_tagging": page.get("has_tagging", False), "fingerprint": fingerprint}
+
+    # Pages stored before fingerprints existed are fingerprinted once and backfilled.
+    for page in db.pages_col.find({"scan_id": scan_id, "url": {"$in": legacy_urls}}) if legacy_urls else []:
+        fingerprint = page_fingerprint(page.get("has_tagging", False), page.get("load_beacons", []), page.get("click_events", []))
+        db.pages_col.update_one({"_id": page["_id"]}, {"$set": {"fingerprint": fingerprint}})
+        pages[normalize_page_url(page["url"])] = {"url": page["url"], "has_tagging": page.get("has_tagging", False), "fingerprint": fingerprint}
+    return pages
+
+
+def _diff_beacons(base: List[Dict[str, Any]], target: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    base_by_key = {b["key"]: b for b in base}
+    target_by_key = {b["key"]: b for b in target}
+    out: Dict[str, List[Dict[str, Any]]] = {"added": [], "removed": [], "changed": []}
+
+    for key, beacon in target_by_key.items():
+        if key not in base_by_key:
+            out["added"].append({"key": key, "type": beacon["type"], "report_suite": beacon["report_suite"]})
+    for key, old in base_by_key.items():
+        new = target_by_key.get(key)
+        if new is None:
+            out["removed"].append({"key": key, "type": old["type"], "report_suite": old["report_suite"]})
+            continue
+        if new["hash"] == old["hash"]:
+            continue
+
+        change: Dict[str, Any] = {"key": key, "type": new["type"]}
+        if old["report_suite"] != new["report_suite"]:
+            change["report_suite"] = {"from": old["report_suite"], "to": new["report_suite"]}
+        evar_changes = {
+            name: {"from": old["evars"].get(name), "to": new["evars"].get(name)}
+            for name in sorted(set(old["evars"]) | set(new["evars"]))
+            if old["evars"].get(name) != new["evars"].get(name)
+        }
+        if evar_changes:
+            change["evars"] = evar_changes
+        added_events = sorted(set(new["events"]) - set(old["events"]))
+        removed_events = sorted(set(old["events"]) - set(new["events"]))
+        if added_events or removed_events:
+            change["events"] = {"added": added_events, "removed": removed_events}
+        out["changed"].append(change)
+    return out
+
+
+def compute_scan_diff(base_scan_id: str, target_scan_id: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    base = _load_fingerprints(base_scan_id)
+    target = _load_fingerprints(target_scan_id)
+
+    pages_added = sorted(target[k]["url"] for k in target.keys() - base.keys())
+    pages_removed = sorted(base[k]["url"] for k in base.keys() - target.keys())
+    tagging_gained, tagging_lost, beacon_changes = [], [], []
+
+    for key in sorted(base.keys() & target.keys()):
+        old, new = base[key], target[key]
+        if old["fingerprint"]["hash"] == new["fingerprint"]["hash"]:
+            continue
+        if new["has_tagging"] and not old["has_tagging"]:
+            tagging_gained.append(new["url"])
+        elif old["has_tagging"] and not new["has_tagging"]:
+            tagging_lost.append(new["url"])
+
+        beacons = _diff_beacons(old["fingerprint"]["beacons"], new["fingerprint"]["beacons"])
+        if any(beacons.values()):
+            beacon_changes.append({"url": new["url"], **beacons})
+
+    return {
+        "base_scan_id": base_scan_id,
+        "target_scan_id": target_scan_id,
+        "summary": {
+            "base_pages": len(base),
+            "target_pages": len(target),
+            "pages_added": len(pages_added),
+            "pages_removed": len(pages_removed),
+            "tagging_gained": len(tagging_gained),
+            "tagging_lost": len(tagging_lost),
+            "pages_with_beacon_changes": len(beacon_changes),
+        },
+        "pages_added": pages_added,
+        "pages_removed": pages_removed,
+        "tagging_gained": tagging_gained,
+        "tagging_lost": tagging_lost,
+        "beacon_changes": beacon_changes,
+        "duration_seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def _cache_version(scan: Dict[str, Any]) -> Any:
+    return scan.get("completed_at") or scan.get("updated_at")
+
+
+def get_scan_diff(base_scan: Dict[str, Any], target_scan: Dict[str, Any], refresh: bool = False) -> Dict[str, Any]:
+    diff_id = f"{base_scan['_id']}:{target_scan['_id']}"
+    versions = [_cache_version(base_scan), _cache_version(target_scan)]
+    cacheable = base_scan.get("status") == "completed" and target_scan.get("status") == "completed"
+
+    if cacheable and not refresh and db.diffs_col is not None:
+        cached = db.diffs_col.find_one({"_id": diff_id})
+        if cached and cached.get("versions") == versions:
+            return {**decompress_value(cached["diff"]), "cached": True}
+
+    diff = compute_scan_diff(base_scan["_id"], target_scan["_id"])
+    if cacheable and db.diffs_col is not None:
+        db.diffs_col.replace_one(
+            {"_id": diff_id},
+            {
+                "_id": diff_id,
+                "base_scan_id": base_scan["_id"],
+                "target_scan_id": target_scan["_id"],
+                "versions": versions,
+                "created_at": time.time(),
+                "diff": compress_value(diff),
+            },
+            upsert=True,
+        )
+    return {**diff, "cached": False}
+
+
+def delete_scan_diffs(scan_id: str) -> int:
+    if db.diffs_col is None:
+        return 0
+    return db.diffs_col.delete_many({"$or": [{"base_scan_id": scan_id}, {"target_scan_id": scan_id}]}).deleted_count
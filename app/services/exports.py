@@ -0,0 +1,62 @@
+import io
+from typing import Any, Dict, List, Optional
+
+
+SIMPLE_REPORT_COLUMNS = [
+    "Scan ID",
+    "Page URL",
+    "Page Title",
+    "Beacon URL",
+    "Request Method",
+    "Request Payload",
+    "Response Payload",
+]
+
+
+def report_to_xlsx(rows: List[Dict[str, Any]], template_coverage: Optional[List[Dict[str, Any]]] = None) -> io.BytesIO:
+    # pandas adds about a second to API start-up and is only needed for xlsx downloads.
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    output = io.BytesIO()
+    with pd.ExcelWriter(output) as writer:
+        df.to_excel(writer, index=False)
+        if template_coverage:
+            coverage_df = pd.DataFrame([
+                {
+                    "Template": c.get("template", ""),
+                    "Pages Sampled": c.get("sampled", 0),
+                    "Pages Skipped": c.get("skipped", 0),
+                    "Sample URLs": "\n".join(c.get("sample_urls", [])),
+                }
+                for c in template_coverage
+            ])
+            coverage_df.to_excel(writer, sheet_name="Template Coverage", index=False)
+    output.seek(0)
+    return output
+
+
+def simple_report_to_xlsx(rows: List[Dict[str, Any]]) -> io.BytesIO:
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    existing = [c for c in SIMPLE_REPORT_COLUMNS if c in df.columns]
+    df = df[existing]
+    if "Beacon URL" in df.columns:
+        df = df[df["Beacon URL"].astype(str).str.len() > 0]
+
+    output = io.BytesIO()
+    df.to_excel(output, index=False)
+    output.seek(0)
+    return output
+
+
+def batch_report_to_xlsx(summary: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> io.BytesIO:
+    import pandas as pd
+
+    output = io.BytesIO()
+    with pd.ExcelWriter(output) as writer:
+        pd.DataFrame(summary).to_excel(writer, sheet_name="Summary", index=False)
+        pd.DataFrame(rows).to_excel(writer, sheet_name="Beacons", index=False)
+    output.seek(0)
+    return output
@@ -0,0 +1,232 @@
+import logging
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_SPECS: Dict[str, List[Dict[str, Any]]] = {
+    "scans": [
+        {"name": "created_at_desc", "keys": [("created_at", DESCENDING)]},
+        {"name": "status_created_at", "keys": [("status", ASCENDING), ("created_at", DESCENDING)]},
+        {"name": "start_url_created_at", "keys": [("start_url", ASCENDING), ("created_at", DESCENDING)]},
+        {
+            "name": "retried_from",
+            "keys": [("retried_from", ASCENDING)],
+            "partialFilterExpression": {"retried_from": {"$exists": True}},
+        },
+        {
+            "name": "batch_id",
+            "keys": [("batch_id", ASCENDING), ("created_at", ASCENDING)],
+            "partialFilterExpression": {"batch_id": {"$exists": True}},
+        },
+        {
+            "name": "schedule_id",
+            "keys": [("schedule_id", ASCENDING), ("created_at", DESCENDING)],
+            "partialFilterExpression": {"schedule_id": {"$exists": True}},
+        },
+        {
+            "name": "delete_job_id",
+            "keys": [("delete_job_id", ASCENDING)],
+            "partialFilterExpression": {"delete_job_id": {"$exists": True}},
+        },
+    ],
+    "pages": [
+        {"name": "scan_id_url", "keys": [("scan_id", ASCENDING), ("url", ASCENDING)]},
+    ],
+    "reports": [],
+    "payload_blobs": [
+        {"name": "last_seen_at", "keys": [("last_seen_at", ASCENDING)]},
+    ],
+    "batches": [
+        {"name": "created_at_desc", "keys": [("created_at", DESCENDING)]},
+    ],
+    "beacons": [
+        {"name": "scan_id", "keys": [("scan_id", ASCENDING)]},
+        {"name": "report_suite_site", "keys": [("report_suite", ASCENDING), ("site", ASCENDING), ("captured_at", DESCENDING)]},
+        {"name": "tracking_server_site", "keys": [("tracking_server", ASCENDING), ("site", ASCENDING), ("captured_at", DESCENDING)]},
+        {"name": "site_captured_at", "keys": [("site", ASCENDING), ("captured_at", DESCENDING)]},
+        {"name": "beacon_type_captured_at", "keys": [("beacon_type", ASCENDING), ("captured_at", DESCENDING)]},
+        {"name": "variables_hash", "keys": [("variables_hash", ASCENDING)]},
+    ],
+    "diffs": [
+        {"name": "base_scan_id", "keys": [("base_scan_id", ASCENDING)]},
+        {"name": "target_scan_id", "keys": [("target_scan_id", ASCENDING)]},
+    ],
+    "delete_jobs": [
+        {"name": "status_created_at", "keys": [("status", ASCENDING), ("created_at", ASCENDING)]},
+        {"name": "created_at_desc", "keys": [("created_at", DESCENDING)]},
+    ],
+    "schedules": [
+        {"name": "enabled_next_run_at", "keys": [("enabled", ASCENDING), ("next_run_at", ASCENDING)]},
+    ],
+}
+
+# Indexes created by earlier releases that are now covered by INDEX_SPECS.
+LEGACY_INDEXES: Dict[str, List[str]] = {
+    "scans": ["created_at_1", "status_1_created_at_1"],
+    "pages": ["scan_id_1"],
+    "reports": ["scan_id_1"],
+    "payload_blobs": ["last_seen_at_1"],
+}
+
+_INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _matches(existing: Dict[str, Any], spec: Dict[str, Any]) -> bool:
+    if [tuple(k) for k in existing.get("key", [])] != [tuple(k) for k in spec["keys"]]:
+        return False
+    return all(existing.get(opt) == spec.get(opt) for opt in _INDEX_OPTIONS)
+
+
+def ensure_indexes(database) -> Dict[str, List[str]]:
+    changes: Dict[str, List[str]] = {"created": [], "dropped": []}
+
+    for col_name, specs in INDEX_SPECS.items():
+        col = database[col_name]
+        try:
+            existing = col.index_information()
+        except PyMongoError as e:
+            logger.warning(f"Could not read indexes for {col_name}: {e}")
+            continue
+
+        for spec in specs:
+            current = existing.get(spec["name"])
+            if current is not None and _matches(current, spec):
+                continue
+            if current is not None:
+                col.drop_index(spec["name"])
+                changes["dropped"].append(f"{col_name}.{spec['name']}")
+
+            options = {opt: spec[opt] for opt in _INDEX_OPTIONS if opt in spec}
+            col.create_index(spec["keys"], name=spec["name"], **options)
+            changes["created"].append(f"{col_name}.{spec['name']}")
+
+        for legacy_name in LEGACY_INDEXES.get(col_name, []):
+            if legacy_name in existing:
+                col.drop_index(legacy_name)
+                changes["dropped"].append(f"{col_name}.{legacy_name}")
+
+    if changes["created"] or changes["dropped"]:
+        logger.info(f"Reconciled indexes: created={changes['created']} dropped={changes['dropped']}")
+    return changes
+
+
+def _query_paths(database) -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": "list_scans",
+            "cursor": database["scans"].find({}, {"status": 1, "created_at": 1}).sort("created_at", -1).limit(50),
+        },
+        {
+            "name": "scans_by_status",
+            "cursor": database["scans"].find({"status": "completed", "created_at": {"$lt": 0}}),
+        },
+        {
+            "name": "scans_by_start_url",
+            "cursor": database["scans"].find({"start_url": ""}).sort("created_at", -1),
+        },
+        {
+            "name": "scan_by_id",
+            "cursor": database["scans"].find({"_id": ""}),
+        },
+        {
+            "name": "pages_by_scan",
+            "cursor": database["pages"].find({"scan_id": ""}),
+        },
+        {
+            "name": "page_by_scan_and_url",
+            "cursor": database["pages"].find({"scan_id": "", "url": ""}),
+        },
+        {
+            "name": "scans_by_batch",
+            "cursor": database["scans"].find({"batch_id": ""}).sort("created_at", 1),
+        },
+        {
+            "name": "list_batches",
+            "cursor": database["batches"].find({}, {"name": 1}).sort("created_at", -1).limit(50),
+        },
+        {
+            "name": "scans_by_schedule",
+            "cursor": database["scans"].find({"schedule_id": ""}).sort("created_at", -1),
+        },
+        {
+            "name": "due_schedules",
+            "cursor": database["schedules"].find({"enabled": True, "next_run_at": {"$lte": 0}}).sort("next_run_at", 1),
+        },
+        {
+            "name": "page_fingerprints_by_scan",
+            "cursor": database["pages"].find({"scan_id": ""}, {"url": 1, "has_tagging": 1, "fingerprint": 1}),
+        },
+        {
+            "name": "diffs_by_scan",
+            "cursor": database["diffs"].find({"$or": [{"base_scan_id": ""}, {"target_scan_id": ""}]}, {"_id": 1}),
+        },
+        {
+            "name": "beacons_by_report_suite",
+            "cursor": database["beacons"].find({"report_suite": ""}).sort("captured_at", -1),
+        },
+        {
+            "name": "beacons_by_tracking_server",
+            "cursor": database["beacons"].find({"tracking_server": ""}).sort("captured_at", -1),
+        },
+        {
+            "name": "beacons_by_site",
+            "cursor": database["beacons"].find({"site": ""}).sort("captured_at", -1),
+        },
+        {
+            "name": "beacons_by_scan",
+            "cursor": database["beacons"].find({"scan_id": ""}, {"_id": 1}),
+        },
+        {
+            "name": "stale_running_scans",
+            "cursor": database["scans"].find({"status": "running", "heartbeat_at": {"$lt": 0}}),
+        },
+        {
+            "name": "tag_libraries_by_scan",
+            "cursor": database["pages"].find({"scan_id": "", "tag_libraries.0": {"$exists": True}}, {"tag_libraries.library_id": 1}),
+        },
+        {
+            "name": "scans_by_delete_job",
+            "cursor": database["scans"].find({"delete_job_id": ""}, {"_id": 1, "status_before_delete": 1}),
+        },
+        {
+            "name": "pending_delete_jobs",
+            "cursor": database["delete_jobs"].find({"status": "queued"}).sort("created_at", 1),
+        },
+        {
+            "name": "report_by_id",
+            "cursor": database["reports"].find({"_id": ""}),
+        },
+        {
+            "name": "stale_payload_blobs",
+            "cursor": database["payload_blobs"].find({"last_seen_at": {"$lt": 0}}, {"_id": 1}),
+        },
+    ]
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []) or []:
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def explain_query_paths(database) -> List[Dict[str, Any]]:
+    results = []
+    for path in _query_paths(database):
+        try:
+            explain = path["cursor"].explain()
+        except PyMongoError as e:
+            results.append({"query": path["name"], "stages": [], "collscan": None, "error": str(e)})
+            continue
+
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = [s for s in _plan_stages(winning) if s]
+        results.append({"query": path["name"], "stages": stages, "collscan": "COLLSCAN" in stages})
+    return results
@@ -0,0 +1,67 @@
+import os
+from typing import List, Optional
+
+
+def _read_rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    # Each thread has its own children list; scans launch their browsers
+    # from scan-worker threads, not the main thread.
+    children: List[int] = []
+    try:
+        tids = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return children
+    for tid in tids:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as fh:
+                children.extend(int(c) for c in fh.read().split())
+        except (OSError, ValueError):
+            continue
+    return children
+
+
+def _cmdline(pid: int) -> List[str]:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as fh:
+            return fh.read().decode("utf-8", errors="replace").split("\0")
+    except OSError:
+        return []
+
+
+def find_descendant(arg: str, pid: Optional[int] = None) -> Optional[int]:
+    # Parents are checked before their children, so this returns the topmost
+    # process started with arg.
+    stack = [pid or os.getpid()]
+    while stack:
+        current = stack.pop()
+        if arg in _cmdline(current):
+            return current
+        stack.extend(_children(current))
+    return None
+
+
+def process_rss_mb(pid: Optional[int] = None) -> float:
+    return _read_rss_kb(pid or os.getpid()) / 1024.0
+
+
+def process_tree_rss_mb(pid: Optional[int] = None) -> float:
+    # The Playwright driver and every Chromium browser, GPU and renderer
+    # process are descendants of this one.
+    pid = pid or os.getpid()
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total_kb += _read_rss_kb(current)
+        stack.extend(_children(current))
+    return total_kb / 1024.0
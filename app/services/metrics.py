@@ -0,0 +1,103 @@
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from app import db
+
+
+logger = logging.getLogger(__name__)
+
+PAGE_LOAD_SECONDS = Histogram(
+    "scanner_page_load_seconds",
+    "Wall-clock time to scan one page including click tests",
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300),
+)
+PAGE_PHASE_SECONDS = Histogram(
+    "scanner_page_phase_seconds",
+    "Time spent in each phase of a page scan",
+    ["phase"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+)
+BEACONS_PER_PAGE = Histogram(
+    "scanner_beacons_per_page",
+    "Adobe beacons captured per page (load and click beacons)",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+SCAN_QUEUE_WAIT_SECONDS = Histogram(
+    "scanner_scan_queue_wait_seconds",
+    "Time between a scan being created and starting",
+    buckets=(0.1, 1, 5, 15, 60, 300, 900, 3600),
+)
+SCAN_DURATION_SECONDS = Histogram(
+    "scanner_scan_duration_seconds",
+    "Total scan duration by final status",
+    ["status"],
+    buckets=(10, 30, 60, 300, 900, 1800, 3600, 7200),
+)
+DB_OPERATION_SECONDS = Histogram(
+    "scanner_db_operation_seconds",
+    "MongoDB operation latency",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+REPORT_PHASE_SECONDS = Histogram(
+    "scanner_report_phase_seconds",
+    "Time spent in each phase of report generation",
+    ["phase"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60),
+)
+SCANS_FINISHED = Counter("scanner_scans_finished_total", "Scans finished by final status", ["status"])
+ACTIVE_BROWSERS = Gauge("scanner_active_browsers", "Chromium browsers currently launched by this process")
+BROWSER_RECYCLES = Counter("scanner_browser_recycles_total", "Browser contexts recycled mid-scan", ["reason"])
+PROCESS_TREE_RSS_MB = Gauge("scanner_process_tree_rss_mb", "Resident memory of this process and its browsers at the last scanner check")
+ASSET_CACHE_REQUESTS = Counter("scanner_asset_cache_requests_total", "Static asset requests served through the shared asset cache", ["result"])
+ASSET_CACHE_BYTES = Gauge("scanner_asset_cache_bytes", "Bytes stored in the shared asset cache")
+QUEUED_SCANS = Gauge("scanner_queued_scans", "Scans waiting to start")
+
+
+def _count_queued_scans() -> float:
+    if db.scans_col is None:
+        return 0
+    try:
+        return db.scans_col.count_documents({"status": "queued"})
+    except Exception as e:
+        logger.warning(f"Could not count queued scans: {e}")
+        return 0
+
+
+QUEUED_SCANS.set_function(_count_queued_scans)
+
+
+class PhaseTimer:
+    def __init__(self, histogram: Histogram = PAGE_PHASE_SECONDS):
+        self.histogram = histogram
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            self.histogram.labels(name).observe(elapsed)
+
+    def rounded(self) -> Dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.timings.items()}
+
+
+@contextmanager
+def db_timer(operation: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_OPERATION_SECONDS.labels(operation).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
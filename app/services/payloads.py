@@ -0,0 +1,81 @@
+import os
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List
+
+from pymongo import UpdateOne
+
+from app import db
+from app.services.compression import compress_value, decompress_value
+
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_BLOB_MIN_CHARS = int(os.getenv("PAYLOAD_BLOB_MIN_CHARS", "64"))
+PAYLOAD_BLOB_LOOKUP_BATCH = 1000
+PAYLOAD_REF_FIELD = "_response_payload_ref"
+
+
+def payload_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def externalize_response_payloads(beacons: List[Dict[str, Any]]) -> None:
+    if db.blobs_col is None:
+        return
+
+    blobs: Dict[str, str] = {}
+    for beacon in beacons:
+        body = beacon.get("response_payload")
+        if not isinstance(body, str) or len(body) < PAYLOAD_BLOB_MIN_CHARS:
+            continue
+        ref = payload_hash(body)
+        blobs[ref] = body
+        beacon["response_payload"] = ""
+        beacon["response_payload_ref"] = ref
+
+    if not blobs:
+        return
+
+    now = time.time()
+    ops = [
+        UpdateOne(
+            {"_id": ref},
+            {"$setOnInsert": {"body": compress_value(body), "size": len(body), "created_at": now}, "$set": {"last_seen_at": now}},
+            upsert=True,
+        )
+        for ref, body in blobs.items()
+    ]
+    try:
+        db.blobs_col.bulk_write(ops, ordered=False)
+    except Exception as e:
+        logger.warning(f"Could not store payload blobs, keeping payloads inline: {e}")
+        for beacon in beacons:
+            ref = beacon.pop("response_payload_ref", None)
+            if ref:
+                beacon["response_payload"] = blobs[ref]
+
+
+def resolve_payload_blobs(refs: Iterable[str]) -> Dict[str, str]:
+    refs = list(refs)
+    if not refs or db.blobs_col is None:
+        return {}
+
+    bodies: Dict[str, str] = {}
+    for i in range(0, len(refs), PAYLOAD_BLOB_LOOKUP_BATCH):
+        chunk = refs[i:i + PAYLOAD_BLOB_LOOKUP_BATCH]
+        for doc in db.blobs_col.find({"_id": {"$in": chunk}}, {"body": 1}):
+            bodies[doc["_id"]] = decompress_value(doc.get("body", ""))
+    return bodies
+
+
+def hydrate_report_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    refs = {row[PAYLOAD_REF_FIELD] for row in rows if row.get(PAYLOAD_REF_FIELD)}
+    blobs = resolve_payload_blobs(refs)
+
+    for row in rows:
+        ref = row.pop(PAYLOAD_REF_FIELD, None)
+        if ref:
+            row["Response Payload"] = blobs.get(ref, "")
+    return rows
@@ -0,0 +1,103 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import db
+from app.services.reporting import load_report_rows
+
+
+REPORT_VIEW_CACHE_SIZE = int(os.getenv("REPORT_VIEW_CACHE_SIZE", "4"))
+REPORT_CELL_PREVIEW_CHARS = int(os.getenv("REPORT_CELL_PREVIEW_CHARS", "200"))
+_SEARCH_CACHE_SIZE = 8
+
+_cache: "OrderedDict[Tuple[str, Any], Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _columns(rows: List[Dict[str, Any]]) -> List[str]:
+    seen: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            if key not in seen:
+                seen[key] = None
+    return list(seen)
+
+
+def cached_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    # Decoding and hydrating a large report costs seconds, and the viewer asks
+    # for many small pages of the same report, so keep a few decoded reports.
+    # Callers may pass the report without its data; it is only read on a miss.
+    key = (report["_id"], report.get("generated_at"))
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            return entry
+
+    if "data" not in report:
+        report = db.reports_col.find_one({"_id": report["_id"]}) or report
+        key = (report["_id"], report.get("generated_at"))
+    rows = load_report_rows(report)
+    entry = {"rows": rows, "columns": _columns(rows), "search_text": None, "searches": OrderedDict(), "lock": threading.Lock()}
+    with _cache_lock:
+        for stale in [k for k in _cache if k[0] == key[0]]:
+            del _cache[stale]
+        _cache[key] = entry
+        while len(_cache) > REPORT_VIEW_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return entry
+
+
+def _matching_indexes(entry: Dict[str, Any], q: str) -> Optional[List[int]]:
+    needle = (q or "").strip().lower()
+    if not needle:
+        return None
+
+    with entry["lock"]:
+        cached = entry["searches"].get(needle)
+        if cached is not None:
+            entry["searches"].move_to_end(needle)
+            return cached
+        if entry["search_text"] is None:
+            entry["search_text"] = ["\x1f".join(str(v) for v in row.values()).lower() for row in entry["rows"]]
+
+    matches = [i for i, text in enumerate(entry["search_text"]) if needle in text]
+    with entry["lock"]:
+        entry["searches"][needle] = matches
+        while len(entry["searches"]) > _SEARCH_CACHE_SIZE:
+            entry["searches"].popitem(last=False)
+    return matches
+
+
+def _preview(value: Any, max_chars: int) -> Tuple[Any, bool]:
+    if value is None or isinstance(value, (int, float, bool)):
+        return value, False
+    text = str(value)
+    if len(text) <= max_chars:
+        return text, False
+    return text[:max_chars], True
+
+
+def page_rows(entry: Dict[str, Any], offset: int, limit: int, q: str = "", max_chars: int = REPORT_CELL_PREVIEW_CHARS) -> Dict[str, Any]:
+    rows = entry["rows"]
+    matches = _matching_indexes(entry, q)
+    indexes = matches[offset:offset + limit] if matches is not None else range(offset, min(offset + limit, len(rows)))
+
+    page = []
+    for i in indexes:
+        cells, truncated = {}, []
+        for column, value in rows[i].items():
+            cells[column], cut = _preview(value, max_chars)
+            if cut:
+                truncated.append(column)
+        page.append({"index": i, "cells": cells, "truncated": truncated})
+
+    return {
+        "total_rows": len(rows),
+        "matched": len(matches) if matches is not None else len(rows),
+        "offset": offset,
+        "limit": limit,
+        "columns": entry["columns"],
+        "rows": page,
+    }
@@ -2,50 +2,36 @@ import time
 import json
 import logging
 from datetime import datetime
-from typing import List, Dict, Any
-from urllib.parse import urlparse, parse_qs
+from typing import List, Dict, Any, Iterable, Optional
+from urllib.parse import urlparse
 
 from app import db
+from app.services.compression import compress_value, decompress_value
+from app.services.detectors import detect_beacon
+from app.services.metrics import REPORT_PHASE_SECONDS, db_timer
+from app.services.payloads import PAYLOAD_REF_FIELD, hydrate_report_rows
 
 
 logger = logging.getLogger(__name__)
 
 
-def extract_adobe_analytics_info(beacon_url: str) -> Dict[str, Any]:
+def extract_adobe_analytics_info(beacon_url: str, payload: Any = None, detector_name: Optional[str] = None) -> Dict[str, Any]:
     result = {
         'beacon_type': 'unknown',
         'report_suite': None,
         'tracking_server': None,
         'version': None,
-        'parameters': {}
+        'parameters': {},
+        'analytics': False,
     }
 
     try:
-        parsed = urlparse(beacon_url)
-
-        if '/b/ss/' in beacon_url:
-            result['beacon_type'] = 'legacy'
-            parts = parsed.path.split('/')
-            if len(parts) > 3:
-                result['report_suite'] = parts[3].split(',')[0]
-        elif 'interact' in beacon_url:
-            result['beacon_type'] = 'aam'
-            params = parse_qs(parsed.query)
-            if 'configId' in params:
-                result['config_id'] = params['configId'][0]
-            if 'requestId' in params:
-                result['request_id'] = params['requestId'][0]
-
-        result['tracking_server'] = parsed.netloc
-
-        params = parse_qs(parsed.query)
-        result['parameters'] = {k: v[0] if len(v) == 1 else v for k, v in params.items()}
-
-        if '/b/ss/' in beacon_url:
-            path_parts = parsed.path.split('/')
-            if len(path_parts) > 5 and path_parts[5].isdigit():
-                result['version'] = path_parts[5]
-
+        detector = detect_beacon(beacon_url, detector_name)
+        if detector is not None:
+            result.update(detector.extract(beacon_url, payload))
+            result['analytics'] = detector.analytics
+        else:
+            result['tracking_server'] = urlparse(beacon_url).netloc
     except Exception as e:
         logger.warning(f"Error extracting Adobe Analytics info from {beacon_url}: {str(e)}")
 
@@ -60,11 +46,22 @@ def generate_report_data(scan_id: str) -> List[Dict[str, Any]]:
         logger.error(f"Scan not found: {scan_id}")
         return []
 
-    page_docs = list(db.pages_col.find({"scan_id": scan_id}))
+    load_start = time.perf_counter()
+    with db_timer("load_report_pages"):
+        page_docs = list(db.pages_col.find({"scan_id": scan_id}))
+    REPORT_PHASE_SECONDS.labels("load_pages").observe(time.perf_counter() - load_start)
     if not page_docs:
         logger.warning(f"No pages found for scan: {scan_id}")
         return []
 
+    build_start = time.perf_counter()
+    rows = build_report_rows(scan_id, scan, page_docs)
+    REPORT_PHASE_SECONDS.labels("build_rows").observe(time.perf_counter() - build_start)
+    logger.info(f"Generated {len(rows)} rows of report data for scan: {scan_id}")
+    return rows
+
+
+def build_report_rows(scan_id: str, scan: Dict[str, Any], page_docs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
     rows = []
     scan_start_time = scan.get('started_at', time.time())
     scan_end_time = scan.get('completed_at')
@@ -90,16 +87,17 @@ def generate_report_data(scan_id: str) -> List[Dict[str, Any]]:
             "Adobe Analytics Detected": "Yes" if has_tagging else "No",
             "Beacon Count": len(page.get('load_beacons', [])),
             "Click Events Scanned": len(page.get('click_events', [])),
-            "Page Scan Duration (s)": round(page.get('scan_duration', 0), 2)
+            "Page Scan Duration (s)": round(page.get('scan_duration', 0), 2),
+            "Template Cluster": page.get('template_key') or ""
         })
 
         for beacon in page.get('load_beacons', []):
             beacon_url = beacon.get('request_url', '')
             method = beacon.get('method', 'GET')
-            payload = beacon.get('payload', '')
-            response_payload = beacon.get('response_payload', '')
+            payload = decompress_value(beacon.get('payload', ''))
+            response_payload = decompress_value(beacon.get('response_payload', ''))
 
-            aa_info = extract_adobe_analytics_info(beacon_url)
+            aa_info = extract_adobe_analytics_info(beacon_url, payload, beacon.get('detector'))
 
             rows.append({
                 "Scan ID": scan_id,
@@ -114,7 +112,8 @@ def generate_report_data(scan_id: str) -> List[Dict[str, Any]]:
                 "Request Method": method,
                 "Request Payload": json.dumps(payload, indent=2) if isinstance(payload, dict) else str(payload),
                 "Response Payload": json.dumps(response_payload, indent=2) if isinstance(response_payload, (dict, list)) else str(response_payload),
-                "Adobe Analytics Detected": "Yes" if aa_info['beacon_type'] in ['legacy', 'aam'] else "No",
+                PAYLOAD_REF_FIELD: beacon.get('response_payload_ref'),
+                "Adobe Analytics Detected": "Yes" if aa_info['analytics'] else "No",
                 "Report Suite ID": aa_info.get('report_suite', 'N/A'),
                 "Tracking Server": aa_info.get('tracking_server', 'N/A'),
                 "Config ID": aa_info.get('config_id', 'N/A'),
@@ -147,10 +146,10 @@ def generate_report_data(scan_id: str) -> List[Dict[str, Any]]:
             for beacon in click.get('beacons', []):
                 beacon_url = beacon.get('request_url', '')
                 method = beacon.get('method', 'GET')
-                payload = beacon.get('payload', '')
-                response_payload = beacon.get('response_payload', '')
+                payload = decompress_value(beacon.get('payload', ''))
+                response_payload = decompress_value(beacon.get('response_payload', ''))
 
-                aa_info = extract_adobe_analytics_info(beacon_url)
+                aa_info = extract_adobe_analytics_info(beacon_url, payload, beacon.get('detector'))
 
                 rows.append({
                     "Scan ID": scan_id,
@@ -166,7 +165,8 @@ def generate_report_data(scan_id: str) -> List[Dict[str, Any]]:
                     "Request Method": method,
                     "Request Payload": json.dumps(payload, indent=2) if isinstance(payload, dict) else str(payload),
                     "Response Payload": json.dumps(response_payload, indent=2) if isinstance(response_payload, (dict, list)) else str(response_payload),
-                    "Adobe Analytics Detected": "Yes" if aa_info['beacon_type'] in ['legacy', 'aam'] else "No",
+                    PAYLOAD_REF_FIELD: beacon.get('response_payload_ref'),
+                    "Adobe Analytics Detected": "Yes" if aa_info['analytics'] else "No",
                     "Report Suite ID": aa_info.get('report_suite', 'N/A'),
                     "Tracking Server": aa_info.get('tracking_server', 'N/A'),
                     "Config ID": aa_info.get('config_id', 'N/A'),
@@ -174,7 +174,6 @@ def generate_report_data(scan_id: str) -> List[Dict[str, Any]]:
                     "Version": aa_info.get('version', 'N/A'),
                 })
 
-    logger.info(f"Generated {len(rows)} rows of report data for scan: {scan_id}")
     return rows
 
 
@@ -186,8 +185,22 @@ def store_report_in_mongo(scan_id: str):
         "scan_id": scan_id,
         "generated_at": time.time(),
         "total_rows": len(report_data),
-        "data": report_data
+        "data": compress_value(report_data)
     }
 
-    db.reports_col.replace_one({"_id": scan_id}, report_doc, upsert=True)
+    scan = db.scans_col.find_one({"_id": scan_id}, {"template_coverage": 1})
+    if scan and scan.get("template_coverage"):
+        report_doc["template_coverage"] = scan["template_coverage"]
+
+    write_start = time.perf_counter()
+    with db_timer("store_report"):
+        db.reports_col.replace_one({"_id": scan_id}, report_doc, upsert=True)
+    REPORT_PHASE_SECONDS.labels("write_report").observe(time.perf_counter() - write_start)
     return report_doc
+
+
+def load_report_rows(report: Dict[str, Any]) -> List[Dict[str, Any]]:
+    start = time.perf_counter()
+    rows = hydrate_report_rows(decompress_value(report.get("data", [])))
+    REPORT_PHASE_SECONDS.labels("load_rows").observe(time.perf_counter() - start)
+    return rows
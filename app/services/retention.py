@@ -0,0 +1,197 @@
+import os
+import gzip
+import json
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app import db
+from app.services.archives import delete_archive
+from app.services.changes import bump_scans_version
+from app.services.checkpoints import delete_checkpoint
+from app.services.diffs import delete_scan_diffs
+from app.services.reporting import load_report_rows
+
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS_BY_STATUS = {
+    "completed": float(os.getenv("RETENTION_DAYS_COMPLETED", "0")),
+    "failed": float(os.getenv("RETENTION_DAYS_FAILED", "0")),
+    "cancelled": float(os.getenv("RETENTION_DAYS_CANCELLED", os.getenv("RETENTION_DAYS_FAILED", "0"))),
+}
+RETENTION_SWEEP_INTERVAL_SECONDS = float(os.getenv("RETENTION_SWEEP_INTERVAL_SECONDS", "3600"))
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "")
+RETENTION_SWEEP_LIMIT = int(os.getenv("RETENTION_SWEEP_LIMIT", "100"))
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "500"))
+DELETE_BATCH_PAUSE_SECONDS = float(os.getenv("DELETE_BATCH_PAUSE_SECONDS", "0.1"))
+
+_sweeper_thread: Optional[threading.Thread] = None
+_sweeper_stop = threading.Event()
+
+
+def _delete_in_batches(col, query: Dict[str, Any], on_batch: Optional[Callable[[int], None]] = None) -> int:
+    deleted = 0
+    while True:
+        ids = [doc["_id"] for doc in col.find(query, {"_id": 1}).limit(DELETE_BATCH_SIZE)]
+        if not ids:
+            return deleted
+        count = col.delete_many({"_id": {"$in": ids}}).deleted_count
+        deleted += count
+        if on_batch is not None:
+            on_batch(count)
+        if len(ids) < DELETE_BATCH_SIZE:
+            return deleted
+        time.sleep(DELETE_BATCH_PAUSE_SECONDS)
+
+
+def delete_scan_data(scan_id: str, on_pages_deleted: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    pages_deleted = _delete_in_batches(db.pages_col, {"scan_id": scan_id}, on_pages_deleted)
+    if db.beacons_col is not None:
+        _delete_in_batches(db.beacons_col, {"scan_id": scan_id})
+    report_deleted = db.reports_col.delete_one({"_id": scan_id}).deleted_count
+    delete_scan_diffs(scan_id)
+    delete_checkpoint(scan_id)
+    delete_archive(scan_id)
+    scan_deleted = db.scans_col.delete_one({"_id": scan_id}).deleted_count
+    bump_scans_version()
+    logger.info(f"Deleted scan {scan_id}: {pages_deleted} pages, {report_deleted} report")
+    return {"scans_deleted": scan_deleted, "pages_deleted": pages_deleted, "reports_deleted": report_deleted}
+
+
+def _orphaned_scan_ids(col, field: str) -> List[str]:
+    scan_ids = [scan_id for scan_id in col.distinct(field) if scan_id is not None]
+    orphaned = []
+    for start in range(0, len(scan_ids), DELETE_BATCH_SIZE):
+        chunk = scan_ids[start:start + DELETE_BATCH_SIZE]
+        existing = {doc["_id"] for doc in db.scans_col.find({"_id": {"$in": chunk}}, {"_id": 1})}
+        orphaned.extend(scan_id for scan_id in chunk if scan_id not in existing)
+    return orphaned
+
+
+def _delete_orphans(col, field: str, on_batch: Optional[Callable[[int], None]] = None) -> int:
+    # Scoped to scans that no longer exist, so a scan created while this runs
+    # keeps its data, and pages written by a scan after it was deleted go.
+    deleted = 0
+    orphaned = _orphaned_scan_ids(col, field)
+    for start in range(0, len(orphaned), DELETE_BATCH_SIZE):
+        deleted += _delete_in_batches(col, {field: {"$in": orphaned[start:start + DELETE_BATCH_SIZE]}}, on_batch)
+    return deleted
+
+
+def delete_orphaned_data() -> Dict[str, int]:
+    totals = {"pages_deleted": _delete_orphans(db.pages_col, "scan_id"), "reports_deleted": _delete_orphans(db.reports_col, "_id")}
+    if db.diffs_col is not None:
+        _delete_orphans(db.diffs_col, "base_scan_id")
+        _delete_orphans(db.diffs_col, "target_scan_id")
+    if db.beacons_col is not None:
+        _delete_orphans(db.beacons_col, "scan_id")
+    if db.checkpoints_col is not None:
+        _delete_orphans(db.checkpoints_col, "_id")
+    return totals
+
+
+def archive_report(scan: Dict[str, Any]) -> Optional[str]:
+    if not RETENTION_ARCHIVE_DIR:
+        return None
+
+    report = db.reports_col.find_one({"_id": scan["_id"]})
+    if not report:
+        return None
+
+    os.makedirs(RETENTION_ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(RETENTION_ARCHIVE_DIR, f"report_{scan['_id']}.json.gz")
+    archive = {
+        "scan": scan,
+        "generated_at": report.get("generated_at"),
+        "total_rows": report.get("total_rows"),
+        "template_coverage": report.get("template_coverage", []),
+        "data": load_report_rows(report),
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        json.dump(archive, fh, default=str)
+    return path
+
+
+def prune_payload_blobs() -> int:
+    if db.blobs_col is None:
+        return 0
+
+    retention_days = list(RETENTION_DAYS_BY_STATUS.values())
+    if not retention_days or min(retention_days) <= 0:
+        return 0
+
+    cutoff = time.time() - max(retention_days) * 86400
+    return _delete_in_batches(db.blobs_col, {"last_seen_at": {"$lt": cutoff}})
+
+
+def sweep_expired_scans() -> int:
+    if db.scans_col is None or db.pages_col is None or db.reports_col is None:
+        return 0
+
+    swept = 0
+    # Blobs are only pruned once no expired scan is left to reference them.
+    finished = True
+    now = time.time()
+    for status, days in RETENTION_DAYS_BY_STATUS.items():
+        if days <= 0:
+            continue
+
+        cutoff = now - days * 86400
+        expired = list(
+            db.scans_col.find({"status": status, "created_at": {"$lt": cutoff}}).limit(RETENTION_SWEEP_LIMIT)
+        )
+        if len(expired) >= RETENTION_SWEEP_LIMIT:
+            finished = False
+        for scan in expired:
+            if _sweeper_stop.is_set():
+                return swept
+            try:
+                path = archive_report(scan)
+                if path:
+                    logger.info(f"Archived report for scan {scan['_id']} to {path}")
+                delete_scan_data(scan["_id"])
+                swept += 1
+            except Exception as e:
+                finished = False
+                logger.warning(f"Retention sweep failed for scan {scan['_id']}: {e}")
+
+    if not finished:
+        return swept
+    try:
+        pruned = prune_payload_blobs()
+        if pruned:
+            logger.info(f"Pruned {pruned} unused payload blobs")
+    except Exception as e:
+        logger.warning(f"Could not prune payload blobs: {e}")
+
+    return swept
+
+
+def _sweeper_loop() -> None:
+    # Sweep once at startup, then every interval.
+    while not _sweeper_stop.is_set():
+        try:
+            swept = sweep_expired_scans()
+            if swept:
+                logger.info(f"Retention sweep removed {swept} scans")
+        except Exception as e:
+            logger.error(f"Retention sweep failed: {e}")
+        _sweeper_stop.wait(RETENTION_SWEEP_INTERVAL_SECONDS)
+
+
+def start_retention_sweeper() -> None:
+    global _sweeper_thread
+    if not any(days > 0 for days in RETENTION_DAYS_BY_STATUS.values()):
+        return
+    if _sweeper_thread is not None and _sweeper_thread.is_alive():
+        return
+
+    _sweeper_stop.clear()
+    _sweeper_thread = threading.Thread(target=_sweeper_loop, name="retention-sweeper", daemon=True)
+    _sweeper_thread.start()
+
+
+def stop_retention_sweeper() -> None:
+    _sweeper_stop.set()
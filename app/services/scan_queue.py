@@ -0,0 +1,203 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+
+from app import db
+from app.services.changes import bump_scans_version
+
+
+logger = logging.getLogger(__name__)
+
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "2"))
+
+
+class ScanQueue:
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._cond = threading.Condition()
+        self._by_domain: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._active_domains: Dict[str, int] = {}
+        self._queued_ids: set[str] = set()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def _ensure_workers(self) -> None:
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"scan-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def enqueue(self, scan_id: str, start_url: str, max_pages: int, max_clicks_per_page: int, **options: Any) -> bool:
+        domain = urlparse(start_url).netloc.lower()
+        job = {
+            "scan_id": scan_id,
+            "start_url": start_url,
+            "max_pages": max_pages,
+            "max_clicks_per_page": max_clicks_per_page,
+            "options": options,
+            "domain": domain,
+        }
+        with self._cond:
+            if scan_id in self._queued_ids:
+                return False
+            self._queued_ids.add(scan_id)
+            self._by_domain.setdefault(domain, deque()).append(job)
+            self._stopping = False
+            self._ensure_workers()
+            self._cond.notify()
+        return True
+
+    def _take_next(self) -> Optional[Dict[str, Any]]:
+        # Round-robin across domains and never run two scans against the same
+        # origin at once, so a large batch for one site cannot starve others.
+        for domain in list(self._by_domain.keys()):
+            if self._active_domains.get(domain):
+                continue
+            jobs = self._by_domain.pop(domain)
+            job = jobs.popleft()
+            if jobs:
+                self._by_domain[domain] = jobs
+            self._active_domains[domain] = self._active_domains.get(domain, 0) + 1
+            return job
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = self._take_next()
+                while job is None:
+                    if self._stopping:
+                        return
+                    self._cond.wait()
+                    job = self._take_next()
+
+            try:
+                from app.services.scanner import run_scan
+
+                run_scan(job["scan_id"], job["start_url"], job["max_pages"], job["max_clicks_per_page"], **job["options"])
+            except Exception as e:
+                logger.error(f"Scan worker failed for {job['scan_id']}: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._queued_ids.discard(job["scan_id"])
+                    remaining = self._active_domains.get(job["domain"], 1) - 1
+                    if remaining > 0:
+                        self._active_domains[job["domain"]] = remaining
+                    else:
+                        self._active_domains.pop(job["domain"], None)
+                    self._cond.notify_all()
+
+    def remove(self, scan_id: str) -> bool:
+        with self._cond:
+            if scan_id not in self._queued_ids:
+                return False
+            for domain, jobs in list(self._by_domain.items()):
+                for job in jobs:
+                    if job["scan_id"] == scan_id:
+                        jobs.remove(job)
+                        if not jobs:
+                            del self._by_domain[domain]
+                        self._queued_ids.discard(scan_id)
+                        return True
+            # Already picked up by a worker.
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "pending": sum(len(jobs) for jobs in self._by_domain.values()),
+                "pending_domains": len(self._by_domain),
+                "active_domains": sorted(self._active_domains.keys()),
+            }
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+
+scan_queue = ScanQueue(SCAN_WORKERS)
+
+
+def enqueue_scan(scan_id: str, start_url: str, max_pages: int, max_clicks_per_page: int, **options: Any) -> bool:
+    return scan_queue.enqueue(scan_id, start_url, max_pages, max_clicks_per_page, **options)
+
+
+def create_scan(start_url: str, max_pages: int, max_clicks_per_page: int, samples_per_template: int = 0, **extra: Any) -> str:
+    scan_id = str(uuid.uuid4())
+    db.scans_col.insert_one({
+        "_id": scan_id,
+        "start_url": start_url,
+        "status": "queued",
+        "pages_scanned": 0,
+        "total_pages": 0,
+        "max_pages": max_pages,
+        "max_clicks_per_page": max_clicks_per_page,
+        "samples_per_template": samples_per_template,
+        "created_at": time.time(),
+        **extra,
+    })
+    bump_scans_version()
+    enqueue_scan(scan_id, start_url, max_pages, max_clicks_per_page, samples_per_template=samples_per_template)
+    return scan_id
+
+
+def cancel_scan_run(scan_id: str, reason: str = "cancelled") -> str:
+    from app.services.cancellation import clear_cancel, request_cancel
+
+    request_cancel(scan_id, reason)
+    removed = scan_queue.remove(scan_id)
+    if removed:
+        # It will never reach run_scan, which is what normally clears the flag.
+        clear_cancel(scan_id)
+    if removed or db.scans_col.find_one({"_id": scan_id, "status": "queued"}, {"_id": 1}):
+        db.scans_col.update_one(
+            {"_id": scan_id, "status": "queued"},
+            {"$set": {"status": "cancelled", "stop_reason": reason, "completed_at": time.time()}},
+        )
+        bump_scans_version()
+        return "cancelled"
+    return "cancelling"
+
+
+def scan_options(scan: Dict[str, Any], resume: bool = True) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"samples_per_template": int(scan.get("samples_per_template") or 0)}
+    for key, value in (scan.get("budgets") or {}).items():
+        if value:
+            options[key] = value
+    # A new scan copied from this one (a retry) must not resume its checkpoint.
+    if resume and scan.get("resume_requested"):
+        options["resume"] = True
+    if scan.get("record"):
+        options["record"] = True
+    if scan.get("replay_of"):
+        options["replay_of"] = scan["replay_of"]
+    return options
+
+
+def requeue_pending_scans() -> int:
+    if db.scans_col is None:
+        return 0
+
+    requeued = 0
+    for scan in db.scans_col.find({"status": "queued"}).sort("created_at", 1):
+        if not scan.get("start_url"):
+            continue
+        if enqueue_scan(
+            scan["_id"],
+            scan["start_url"],
+            int(scan.get("max_pages") or 10),
+            int(scan.get("max_clicks_per_page") or 5),
+            **scan_options(scan),
+        ):
+            requeued += 1
+    if requeued:
+        logger.info(f"Re-queued {requeued} scans left in queued state")
+    return requeued
@@ -1,175 +1,399 @@
+import os
 import asyncio
-import json
+import hashlib
 import time
 import logging
 from typing import List, Dict, Any
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse
 
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import Request, async_playwright, TimeoutError as PlaywrightTimeoutError
 
 from app import db
+from app.services.archives import archive_info, archive_parts, next_archive_part
+from app.services.asset_cache import get_asset_cache
+from app.services.beacon_index import index_page_beacons
+from app.services.cancellation import ScanBudget, clear_cancel
+from app.services.changes import bump_scans_version
+from app.services.checkpoints import ScanCheckpointer, delete_checkpoint, heartbeat_loop, load_checkpoint
+from app.services.compression import compress_beacons
+from app.services.detectors import BeaconDetector, compile_matcher
+from app.services.diffs import page_fingerprint
+from app.services.memory import find_descendant, process_rss_mb, process_tree_rss_mb
+from app.services.metrics import (
+    ACTIVE_BROWSERS,
+    BEACONS_PER_PAGE,
+    BROWSER_RECYCLES,
+    PAGE_LOAD_SECONDS,
+    PROCESS_TREE_RSS_MB,
+    SCAN_DURATION_SECONDS,
+    SCAN_QUEUE_WAIT_SECONDS,
+    SCANS_FINISHED,
+    PhaseTimer,
+    db_timer,
+)
+from app.services.payloads import externalize_response_payloads
 from app.services.reporting import store_report_in_mongo
+from app.services.retention import delete_scan_data
+from app.services.tag_libraries import TAG_REQUEST_PATTERN, describe_libraries, is_tag_library, is_tag_request
+from app.services.templates import DOM_SIGNATURE_JS, TemplateSampler, dom_signature, url_template_key
 
 
 logger = logging.getLogger(__name__)
 
 
-def run_scan(scan_id: str, start_url: str, max_pages: int, max_clicks_per_page: int):
-    def _is_adobe_beacon_url(req_url: str) -> bool:
-        if not req_url:
-            return False
-        return ("b/ss/" in req_url) or ("interact" in req_url)
+SCANNER_CAPTURE_MODE = os.getenv("SCANNER_CAPTURE_MODE", "events").strip().lower()
+RESPONSE_BODY_TIMEOUT_SECONDS = 5
+RESPONSE_BODY_MAX_CHARS = 10000
+RESPONSE_BODY_CONCURRENCY = int(os.getenv("SCANNER_RESPONSE_BODY_CONCURRENCY", "8"))
+DEFER_RESPONSE_BODIES = os.getenv("SCANNER_DEFER_RESPONSE_BODIES", "").strip().lower() in ("1", "true", "yes")
+RECYCLE_AFTER_NAVIGATIONS = int(os.getenv("SCANNER_RECYCLE_AFTER_NAVIGATIONS", "100"))
+MAX_RSS_MB = float(os.getenv("SCANNER_MAX_RSS_MB", "1536"))
+# A context that was just recycled is not recycled again for memory until it
+# has done some work, so memory held by other scans cannot cause a loop.
+RECYCLE_MIN_NAVIGATIONS = 10
 
-    def _payload_from_playwright_request(request) -> Any:
-        try:
-            post_data = request.post_data
-        except Exception:
-            post_data = None
-
-        if post_data:
-            try:
-                return request.post_data_json
-            except Exception:
-                return post_data
 
-        parsed = urlparse(request.url)
-        if not parsed.query:
-            return ""
-        params = parse_qs(parsed.query)
-        return {k: v[0] if len(v) == 1 else v for k, v in params.items()}
+def _beacon_key(request) -> str:
+    try:
+        body = request.post_data_buffer or b""
+    except Exception:
+        body = b""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{request.method or 'GET'}|{request.url}|".encode("utf-8", errors="replace"))
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _new_bucket() -> Dict[str, Any]:
+    return {
+        "beacons": [],
+        "index_by_key": {},
+        "sources_by_key": {},
+        "tagged": False,
+        "tag_libraries": [],
+    }
+
+
+def _record_beacon(bucket: Dict[str, Any], request, detector: BeaconDetector) -> None:
+    key = _beacon_key(request)
+    if key in bucket["index_by_key"]:
+        return
 
-    def _beacon_key(req_url: str, method: str, payload: Any) -> str:
+    try:
+        post_data = request.post_data
+    except Exception:
+        post_data = None
+
+    bucket["beacons"].append({
+        "request_url": request.url,
+        "method": request.method or "GET",
+        "payload": detector.parse_payload(request.url, post_data),
+        "response_payload": "",
+        "detector": detector.name,
+    })
+    bucket["index_by_key"][key] = len(bucket["beacons"]) - 1
+    bucket["sources_by_key"][key] = request
+
+
+def _record_tag_request(bucket: Dict[str, Any], url: str) -> None:
+    bucket["tagged"] = True
+    if is_tag_library(url) and url not in bucket["tag_libraries"]:
+        bucket["tag_libraries"].append(url)
+
+
+def _skip_response_body(resp) -> bool:
+    if resp.status in (204, 304):
+        return True
+    content_type = (resp.headers or {}).get("content-type", "")
+    return content_type.startswith("image/")
+
+
+async def _fetch_response_body(bucket: Dict[str, Any], key: str, source, semaphore: asyncio.Semaphore) -> None:
+    idx = bucket["index_by_key"].get(key)
+    if idx is None:
+        return
+    async with semaphore:
         try:
-            payload_s = json.dumps(payload, sort_keys=True, default=str)
+            resp = source
+            if isinstance(source, Request):
+                resp = await asyncio.wait_for(source.response(), RESPONSE_BODY_TIMEOUT_SECONDS)
+            if resp is None or _skip_response_body(resp):
+                return
+            body = await resp.text()
+            if isinstance(body, str) and len(body) > RESPONSE_BODY_MAX_CHARS:
+                body = body[:RESPONSE_BODY_MAX_CHARS]
+            bucket["beacons"][idx]["response_payload"] = body
         except Exception:
-            payload_s = str(payload)
-        return f"{method.upper()}|{req_url}|{payload_s}"
-
+            return
+
+
+async def _fill_response_bodies(bucket: Dict[str, Any]) -> None:
+    sources = list(bucket["sources_by_key"].items())
+    if not sources:
+        return
+    semaphore = asyncio.Semaphore(RESPONSE_BODY_CONCURRENCY)
+    await asyncio.gather(*(_fetch_response_body(bucket, key, source, semaphore) for key, source in sources))
+    bucket["sources_by_key"].clear()
+
+
+def _browser_arg(scan_id: str) -> str:
+    # Chromium ignores unknown switches; this one finds the scan's own browser
+    # among those of the other scan workers.
+    return f"--scanner-scan-id={scan_id}"
+
+
+def _browser_rss_mb(scan_id: str) -> float:
+    pid = find_descendant(_browser_arg(scan_id))
+    return process_tree_rss_mb(pid) if pid else 0.0
+
+
+def _recycle_reason(scan_id: str, navigations: int) -> str:
+    if RECYCLE_AFTER_NAVIGATIONS and navigations >= RECYCLE_AFTER_NAVIGATIONS:
+        return "navigations"
+    if MAX_RSS_MB and navigations >= RECYCLE_MIN_NAVIGATIONS:
+        PROCESS_TREE_RSS_MB.set(process_tree_rss_mb())
+        if _browser_rss_mb(scan_id) >= MAX_RSS_MB:
+            return "memory"
+    return ""
+
+
+def _finish(scan_id: str, fields: Dict[str, Any]) -> bool:
+    # A delete job, possibly in another process, may have cleared the scan's
+    # data while it ran; whatever was written since is removed here.
+    if db.scans_col.update_one({"_id": scan_id, "status": {"$ne": "deleting"}}, {"$set": fields}).matched_count:
+        return True
+    delete_scan_data(scan_id)
+    return False
+
+
+def run_scan(
+    scan_id: str,
+    start_url: str,
+    max_pages: int,
+    max_clicks_per_page: int,
+    samples_per_template: int = 0,
+    resume: bool = False,
+    max_duration_seconds: float = 0,
+    max_navigations: int = 0,
+    max_bytes: int = 0,
+    record: bool = False,
+    replay_of: str = "",
+):
     async def _run_scan_playwright() -> None:
         parsed_start = urlparse(start_url)
         base_domain = parsed_start.netloc
+        sampler = TemplateSampler(samples_per_template)
+        matcher = compile_matcher()
+        # Replays must not touch the network, so they skip the asset cache too.
+        asset_cache = None if replay_of else get_asset_cache()
+        replay_parts = archive_parts(replay_of) if replay_of else []
+        if replay_of and not replay_parts:
+            raise RuntimeError(f"No traffic archive recorded for scan {replay_of}")
 
         collector_state: Dict[str, Any] = {"active": None}
 
-        def on_request(request) -> None:
+        async def on_beacon_route(route, request) -> None:
             bucket = collector_state.get("active")
-            if bucket is None:
-                return
-
-            req_url = request.url
-            if not _is_adobe_beacon_url(req_url):
-                return
-
-            method = request.method or "GET"
-            payload = _payload_from_playwright_request(request)
-            key = _beacon_key(req_url, method, payload)
-            if key in bucket["seen"]:
+            if bucket is not None:
+                detector = matcher.match(request.url)
+                if detector is not None:
+                    _record_beacon(bucket, request, detector)
+            # fallback() rather than continue_() so a replayed archive still answers.
+            await route.fallback()
+
+        async def on_tag_route(route, request) -> None:
+            bucket = collector_state.get("active")
+            if bucket is not None:
+                _record_tag_request(bucket, request.url)
+            await route.fallback()
+
+        async def on_asset_route(route, request) -> None:
+            # Beacon endpoints always go to the network, whatever their headers say.
+            if matcher.match(request.url) is not None or not asset_cache.cacheable(request):
+                await route.fallback()
                 return
-            bucket["seen"].add(key)
+            await asset_cache.handle(route, request)
 
-            bucket["beacons"].append({
-                "request_url": req_url,
-                "method": method,
-                "payload": payload,
-                "response_payload": "",
-            })
-            bucket["index_by_key"][key] = len(bucket["beacons"]) - 1
-
-        def on_response(response) -> None:
+        def on_request(request) -> None:
             bucket = collector_state.get("active")
             if bucket is None:
                 return
+            detector = matcher.match(request.url)
+            if detector is not None:
+                _record_beacon(bucket, request, detector)
+            elif is_tag_request(request.url):
+                _record_tag_request(bucket, request.url)
 
-            resp_url = response.url
-            if not _is_adobe_beacon_url(resp_url):
+        def on_response(response) -> None:
+            bucket = collector_state.get("active")
+            if bucket is None or matcher.match(response.url) is None:
                 return
-
             try:
-                req = response.request
-                method = req.method or "GET"
-                payload = _payload_from_playwright_request(req)
+                key = _beacon_key(response.request)
             except Exception:
-                method = "GET"
-                payload = ""
-
-            key = _beacon_key(resp_url, method, payload)
-            bucket["responses_by_key"][key] = response
-
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
+                return
+            if key in bucket["index_by_key"]:
+                bucket["sources_by_key"][key] = response
+
+        # asyncio.run cancels this if the crawl raises.
+        heartbeat_task = asyncio.create_task(heartbeat_loop(scan_id))
+
+        async def open_page(browser):
+            options: Dict[str, Any] = {}
+            if record:
+                options["record_har_path"] = next_archive_part(scan_id)
+            if record or replay_of:
+                # Requests answered by a service worker bypass HAR recording and routing.
+                options["service_workers"] = "block"
             context = await browser.new_context(
                 user_agent="Mozilla/5.0 (compatible; AdobeAnalyticsScanner/1.0)",
                 viewport={"width": 1280, "height": 800},
+                **options,
             )
+            if replay_of:
+                # Context routes run last registered first: archives, then the abort.
+                await context.route("**/*", lambda route: route.abort("internetdisconnected"))
+                for path in replay_parts:
+                    await context.route_from_har(path, not_found="fallback")
             page = await context.new_page()
             page.set_default_navigation_timeout(30000)
 
-            page.on("request", on_request)
-            page.on("response", on_response)
+            if budget.max_bytes:
+                # encodedDataLength is the transfer size, including responses
+                # served to pages we navigate away from before reading them.
+                cdp = await context.new_cdp_session(page)
+                await cdp.send("Network.enable")
+                cdp.on("Network.loadingFinished", lambda event: budget.add_bytes(event.get("encodedDataLength", 0)))
+
+            if asset_cache is not None:
+                # Registered first so the beacon route below runs before it.
+                await page.route("**/*", on_asset_route)
+            if SCANNER_CAPTURE_MODE == "route":
+                # A regex route is matched inside the browser driver, so only
+                # beacon requests ever reach Python. Routing disables the HTTP cache.
+                await page.route(matcher.route_pattern, on_beacon_route)
+                await page.route(TAG_REQUEST_PATTERN, on_tag_route)
+            else:
+                page.on("request", on_request)
+                page.on("response", on_response)
+            return context, page
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, args=[_browser_arg(scan_id)])
+            context, page = await open_page(browser)
+            navigations = 0
 
             visited: set[str] = set()
+            # URLs the template sampler turned down; kept out of the queue so
+            # each is judged and counted once.
+            skipped: set[str] = set()
             queue: List[str] = [start_url]
+            checkpointer = ScanCheckpointer(scan_id, budget)
+            if resume:
+                checkpoint = load_checkpoint(scan_id)
+                if checkpoint:
+                    visited.update(checkpoint.get("visited", []))
+                    queue = list(checkpoint.get("queue", [])) or queue
+                    sampler.load_state(checkpoint.get("sampler"))
+                    budget.restore(checkpoint.get("budget_usage"))
+                # Pages stored after the last checkpoint are not in its visited set.
+                visited.update(p["url"] for p in db.pages_col.find({"scan_id": scan_id}, {"url": 1}))
+                logger.info(f"Resuming scan {scan_id} with {len(visited)} visited and {len(queue)} queued URLs")
 
             while queue and len(visited) < max_pages:
+                if budget.check():
+                    break
                 url = queue.pop(0)
-                if not url or url in visited:
+                if not url or url in visited or url in skipped:
                     continue
                 if not url.startswith(("http://", "https://")):
                     continue
                 if urlparse(url).netloc != base_domain:
                     continue
+                if not sampler.should_visit(url):
+                    skipped.add(url)
+                    continue
+
+                # Closing the context frees the renderer and every Request and
+                # Response object Playwright holds for it; crawl state lives here.
+                reason = _recycle_reason(scan_id, navigations)
+                if reason:
+                    logger.info(
+                        f"Recycling browser context for scan {scan_id} after {navigations} navigations "
+                        f"({reason}, browser {_browser_rss_mb(scan_id):.0f} MB, rss {process_rss_mb():.0f} MB, tree {process_tree_rss_mb():.0f} MB)"
+                    )
+                    await context.close()
+                    context, page = await open_page(browser)
+                    navigations = 0
+                    recycles[reason] = recycles.get(reason, 0) + 1
+                    BROWSER_RECYCLES.labels(reason).inc()
 
                 page_start = time.time()
+                timer = PhaseTimer()
                 visited.add(url)
 
-                load_bucket = {
-                    "beacons": [],
-                    "seen": set(),
-                    "index_by_key": {},
-                    "responses_by_key": {},
-                }
+                load_bucket = _new_bucket()
                 collector_state["active"] = load_bucket
 
                 title = ""
-                content = ""
+                budget.add_navigation()
+                navigations += 1
                 try:
-                    await page.goto(url, wait_until="networkidle")
-                    await page.wait_for_timeout(1000)
-                    title = await page.title()
-                    content = await page.content()
+                    with timer.phase("navigation"):
+                        await page.goto(url, wait_until="networkidle")
+                    with timer.phase("settle"):
+                        await page.wait_for_timeout(1000)
+                    with timer.phase("title"):
+                        title = await page.title()
                 except PlaywrightTimeoutError:
                     try:
-                        title = await page.title()
-                        content = await page.content()
+                        with timer.phase("title"):
+                            title = await page.title()
                     except Exception:
                         title = ""
-                        content = ""
                 except Exception:
                     collector_state["active"] = None
                     continue
 
                 collector_state["active"] = None
 
-                for key, resp in list(load_bucket["responses_by_key"].items()):
-                    idx = load_bucket["index_by_key"].get(key)
-                    if idx is None:
-                        continue
+                # Deferred bodies are read while the scan moves on; bodies the
+                # browser has already evicted after a navigation stay empty.
+                body_tasks: List[asyncio.Task] = []
+                if DEFER_RESPONSE_BODIES:
+                    body_tasks.append(asyncio.create_task(_fill_response_bodies(load_bucket)))
+                else:
+                    with timer.phase("response_bodies"):
+                        await _fill_response_bodies(load_bucket)
+
+                # Tagging is detected from the Launch/DTM requests the page made,
+                # so the DOM is never serialized into Python.
+                has_tagging = load_bucket["tagged"]
+                tag_libraries: List[Dict[str, Any]] = []
+                if load_bucket["tag_libraries"]:
+                    with timer.phase("tag_libraries"):
+                        # Each library build is fetched and parsed once, then cached across scans.
+                        tag_libraries = await asyncio.to_thread(describe_libraries, load_bucket["tag_libraries"], not replay_of)
+
+                signature = None
+                if sampler.enabled:
                     try:
-                        body = await resp.text()
-                        if isinstance(body, str) and len(body) > 10000:
-                            body = body[:10000]
-                        load_bucket["beacons"][idx]["response_payload"] = body
+                        with timer.phase("dom_signature"):
+                            signature = dom_signature(await page.evaluate(DOM_SIGNATURE_JS))
                     except Exception:
-                        continue
-
-                has_tagging = "assets.adobedtm.com" in (content or "")
+                        signature = None
+                clicks_limit = max(0, int(max_clicks_per_page))
+                if sampler.dom_cluster_saturated(signature):
+                    clicks_limit = 0
+                sampler.record_page(url, signature)
 
                 internal_links: List[str] = []
                 try:
-                    hrefs = await page.eval_on_selector_all(
-                        "a[href]",
-                        "elements => elements.map(el => el.href)",
-                    )
+                    with timer.phase("link_extraction"):
+                        hrefs = await page.eval_on_selector_all(
+                            "a[href]",
+                            "elements => elements.map(el => el.href)",
+                        )
                 except Exception:
                     hrefs = []
 
@@ -180,40 +404,35 @@ def run_scan(scan_id: str, start_url: str, max_pages: int, max_clicks_per_page:
                         continue
                     if urlparse(href).netloc != base_domain:
                         continue
-                    if href in visited or href in queue:
+                    if href in visited or href in skipped or href in queue:
                         continue
                     internal_links.append(href)
                     queue.append(href)
 
                 click_events: List[Dict[str, Any]] = []
-                for link in internal_links[: max(0, int(max_clicks_per_page))]:
-                    click_bucket = {
-                        "beacons": [],
-                        "seen": set(),
-                        "index_by_key": {},
-                        "responses_by_key": {},
-                    }
+                for link in internal_links[:clicks_limit]:
+                    if budget.check():
+                        break
+                    click_bucket = _new_bucket()
                     collector_state["active"] = click_bucket
 
+                    budget.add_navigation()
+                    navigations += 2
                     try:
-                        await page.goto(link, wait_until="networkidle")
-                        await page.wait_for_timeout(750)
+                        with timer.phase("click_navigation"):
+                            await page.goto(link, wait_until="networkidle")
+                        with timer.phase("click_settle"):
+                            await page.wait_for_timeout(750)
                     except Exception:
                         pass
 
                     collector_state["active"] = None
 
-                    for key, resp in list(click_bucket["responses_by_key"].items()):
-                        idx = click_bucket["index_by_key"].get(key)
-                        if idx is None:
-                            continue
-                        try:
-                            body = await resp.text()
-                            if isinstance(body, str) and len(body) > 10000:
-                                body = body[:10000]
-                            click_bucket["beacons"][idx]["response_payload"] = body
-                        except Exception:
-                            continue
+                    if DEFER_RESPONSE_BODIES:
+                        body_tasks.append(asyncio.create_task(_fill_response_bodies(click_bucket)))
+                    else:
+                        with timer.phase("response_bodies"):
+                            await _fill_response_bodies(click_bucket)
 
                     click_events.append({
                         "element": link[:100],
@@ -222,43 +441,138 @@ def run_scan(scan_id: str, start_url: str, max_pages: int, max_clicks_per_page:
                     })
 
                     try:
-                        await page.goto(url, wait_until="domcontentloaded")
+                        with timer.phase("click_return"):
+                            await page.goto(url, wait_until="domcontentloaded")
                     except Exception:
                         pass
 
-                db.pages_col.insert_one({
-                    "scan_id": scan_id,
-                    "url": url,
-                    "title": title,
-                    "has_tagging": has_tagging,
-                    "load_beacons": load_bucket["beacons"],
-                    "click_events": click_events,
-                    "scan_duration": time.time() - page_start,
-                })
-
-                db.scans_col.update_one({"_id": scan_id}, {"$inc": {"pages_scanned": 1}})
+                if body_tasks:
+                    with timer.phase("response_bodies_wait"):
+                        await asyncio.gather(*body_tasks)
+
+                if budget.check() == "deleted":
+                    break
+
+                page_beacons = load_bucket["beacons"] + [b for click in click_events for b in click["beacons"]]
+                with timer.phase("fingerprint"):
+                    fingerprint = page_fingerprint(has_tagging, load_bucket["beacons"], click_events)
+
+                with timer.phase("db_write"):
+                    with db_timer("store_payload_blobs"):
+                        externalize_response_payloads(page_beacons)
+                    compress_beacons(page_beacons)
+
+                    scan_duration = time.time() - page_start
+                    with db_timer("insert_page"):
+                        db.pages_col.insert_one({
+                            "scan_id": scan_id,
+                            "url": url,
+                            "title": title,
+                            "has_tagging": has_tagging,
+                            "tag_libraries": tag_libraries,
+                            "load_beacons": load_bucket["beacons"],
+                            "click_events": click_events,
+                            "scan_duration": scan_duration,
+                            "phase_timings": timer.rounded(),
+                            "template_key": url_template_key(url),
+                            "dom_signature": signature,
+                            "fingerprint": fingerprint,
+                        })
+
+                    with db_timer("index_beacons"):
+                        index_page_beacons(scan_id, base_domain.lower(), url, fingerprint)
+
+                    with db_timer("update_scan_progress"):
+                        progress = db.scans_col.update_one({"_id": scan_id, "status": {"$ne": "deleting"}}, {"$inc": {"pages_scanned": 1}})
+                        bump_scans_version()
+                    if progress.matched_count == 0:
+                        # Deleted from another process; its data is cleared below.
+                        budget.stop_reason = "deleted"
+                        break
+
+                    with db_timer("checkpoint"):
+                        checkpointer.page_done(queue, visited, sampler.to_state() if sampler.enabled else None)
+
+                PAGE_LOAD_SECONDS.observe(scan_duration)
+                BEACONS_PER_PAGE.observe(len(page_beacons))
 
             await context.close()
             await browser.close()
 
+            if sampler.enabled:
+                db.scans_col.update_one({"_id": scan_id}, {"$set": {"template_coverage": sampler.coverage()}})
+
+        heartbeat_task.cancel()
+
     started_at = time.time()
-    db.scans_col.update_one(
-        {"_id": scan_id},
-        {"$set": {"status": "running", "total_pages": int(max_pages), "started_at": started_at, "pages_scanned": 0}},
-    )
+    scan = db.scans_col.find_one({"_id": scan_id}, {"created_at": 1, "started_at": 1, "cancel_requested": 1})
+    if scan is None or scan.get("cancel_requested"):
+        logger.info(f"Not starting scan {scan_id}: deleted or cancelled while queued")
+        clear_cancel(scan_id)
+        return
+    if resume and scan and scan.get("started_at"):
+        started_at = scan["started_at"]
+        running = {"pages_scanned": db.pages_col.count_documents({"scan_id": scan_id}), "resumed_at": time.time()}
+    else:
+        running = {"pages_scanned": 0}
+    # Several processes can re-queue the same scan on startup; only the one
+    # that moves it out of queued runs it.
+    claim = {"_id": scan_id, "status": "queued"}
+    if resume:
+        claim["resume_requested"] = True
+    claimed = db.scans_col.update_one(
+        claim,
+        {
+            "$set": {"status": "running", "total_pages": int(max_pages), "started_at": started_at, "heartbeat_at": time.time(), **running},
+            "$unset": {"resume_requested": ""},
+        },
+    ).modified_count
+    if claimed == 0:
+        logger.info(f"Not starting scan {scan_id}: already claimed or no longer queued")
+        return
+    if scan.get("created_at"):
+        SCAN_QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - scan["created_at"]))
+    bump_scans_version()
+    budget = ScanBudget(scan_id, max_duration_seconds, max_navigations, max_bytes)
+    recycles: Dict[str, int] = {}
 
     try:
-        asyncio.run(_run_scan_playwright())
+        with ACTIVE_BROWSERS.track_inprogress():
+            asyncio.run(_run_scan_playwright())
+
+        if budget.stop_reason == "deleted":
+            logger.info(f"Scan {scan_id} was deleted while running")
+            delete_scan_data(scan_id)
+            SCANS_FINISHED.labels("cancelled").inc()
+            return
+
         store_report_in_mongo(scan_id)
 
+        # Budgets end a scan cleanly with what it has; only an explicit
+        # cancel marks it as cancelled.
+        status = "cancelled" if budget.stop_reason == "cancelled" else "completed"
         completed_at = time.time()
-        db.scans_col.update_one(
-            {"_id": scan_id},
-            {"$set": {"status": "completed", "completed_at": completed_at, "duration_seconds": round(completed_at - started_at, 2)}},
-        )
+        finished = {"status": status, "completed_at": completed_at, "duration_seconds": round(completed_at - started_at, 2), "budget_usage": budget.usage()}
+        if budget.stop_reason:
+            finished["stop_reason"] = budget.stop_reason
+        if recycles:
+            finished["browser_recycles"] = recycles
+        if record:
+            finished["archive"] = archive_info(scan_id)
+        if not _finish(scan_id, finished):
+            logger.info(f"Scan {scan_id} was deleted while running")
+            SCANS_FINISHED.labels("cancelled").inc()
+            return
+        bump_scans_version()
+        if status == "completed":
+            delete_checkpoint(scan_id)
+        SCANS_FINISHED.labels(status).inc()
+        SCAN_DURATION_SECONDS.labels(status).observe(completed_at - started_at)
     except Exception as e:
         completed_at = time.time()
-        db.scans_col.update_one(
-            {"_id": scan_id},
-            {"$set": {"status": "failed", "error": str(e), "completed_at": completed_at, "duration_seconds": round(completed_at - started_at, 2)}},
-        )
+        _finish(scan_id, {"status": "failed", "error": str(e), "completed_at": completed_at, "duration_seconds": round(completed_at - started_at, 2)})
+        bump_scans_version()
+        SCANS_FINISHED.labels("failed").inc()
+        SCAN_DURATION_SECONDS.labels("failed").observe(completed_at - started_at)
+    finally:
+        clear_cancel(scan_id)
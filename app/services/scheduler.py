@@ -0,0 +1,123 @@
+import os
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app import db
+from app.services.checkpoints import recover_stale_scans
+from app.services.cron import CronError, CronExpression
+from app.services.scan_queue import create_scan
+
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+SCHEDULER_INTERVAL_SECONDS = float(os.getenv("SCHEDULER_INTERVAL_SECONDS", "30"))
+ACTIVE_SCAN_STATUSES = ("queued", "running")
+
+_scheduler_thread: Optional[threading.Thread] = None
+_scheduler_stop = threading.Event()
+
+
+def _zone(name: str):
+    try:
+        return ZoneInfo(name or "UTC")
+    except ZoneInfoNotFoundError:
+        raise CronError(f"Unknown timezone: {name}")
+
+
+def next_run_at(cron: str, tz_name: str, jitter_seconds: float, after: Optional[float] = None) -> float:
+    after_dt = datetime.fromtimestamp(after if after is not None else time.time(), tz=timezone.utc).astimezone(_zone(tz_name))
+    fire_at = CronExpression(cron).next_after(after_dt).timestamp()
+    if jitter_seconds > 0:
+        fire_at += random.uniform(0, jitter_seconds)
+    return fire_at
+
+
+def validate_schedule(cron: str, tz_name: str) -> None:
+    CronExpression(cron)
+    _zone(tz_name)
+
+
+def _previous_run_active(schedule: Dict[str, Any]) -> bool:
+    last_scan_id = schedule.get("last_scan_id")
+    if not last_scan_id:
+        return False
+    last_scan = db.scans_col.find_one({"_id": last_scan_id}, {"status": 1})
+    return bool(last_scan) and last_scan.get("status") in ACTIVE_SCAN_STATUSES
+
+
+def run_due_schedules(now: Optional[float] = None) -> int:
+    if db.schedules_col is None or db.scans_col is None:
+        return 0
+
+    now = now if now is not None else time.time()
+    started = 0
+    for schedule in db.schedules_col.find({"enabled": True, "next_run_at": {"$lte": now}}).sort("next_run_at", 1):
+        try:
+            upcoming = next_run_at(schedule["cron"], schedule.get("timezone", "UTC"), float(schedule.get("jitter_seconds") or 0), now)
+        except CronError as e:
+            logger.error(f"Disabling schedule {schedule['_id']}: {e}")
+            db.schedules_col.update_one({"_id": schedule["_id"]}, {"$set": {"enabled": False, "error": str(e)}})
+            continue
+
+        # Claim the run by moving next_run_at forward; another process that
+        # already claimed it will have changed the value and this update no-ops.
+        claimed = db.schedules_col.update_one(
+            {"_id": schedule["_id"], "next_run_at": schedule["next_run_at"]},
+            {"$set": {"next_run_at": upcoming}},
+        ).modified_count
+        if not claimed:
+            continue
+
+        if _previous_run_active(schedule):
+            logger.info(f"Skipping schedule {schedule['_id']}: previous scan {schedule['last_scan_id']} still running")
+            db.schedules_col.update_one(
+                {"_id": schedule["_id"]},
+                {"$set": {"last_skipped_at": now}, "$inc": {"skipped_runs": 1}},
+            )
+            continue
+
+        scan_id = create_scan(
+            schedule["start_url"],
+            int(schedule.get("max_pages") or 10),
+            int(schedule.get("max_clicks_per_page") or 5),
+            int(schedule.get("samples_per_template") or 0),
+            schedule_id=schedule["_id"],
+        )
+        db.schedules_col.update_one(
+            {"_id": schedule["_id"]},
+            {"$set": {"last_scan_id": scan_id, "last_run_at": now}, "$inc": {"runs": 1}},
+        )
+        logger.info(f"Schedule {schedule['_id']} started scan {scan_id}")
+        started += 1
+    return started
+
+
+def _scheduler_loop() -> None:
+    while not _scheduler_stop.wait(SCHEDULER_INTERVAL_SECONDS):
+        try:
+            run_due_schedules()
+            recover_stale_scans()
+        except Exception as e:
+            logger.error(f"Scheduler tick failed: {e}")
+
+
+def start_scheduler() -> None:
+    global _scheduler_thread
+    if not SCHEDULER_ENABLED:
+        return
+    if _scheduler_thread is not None and _scheduler_thread.is_alive():
+        return
+
+    _scheduler_stop.clear()
+    _scheduler_thread = threading.Thread(target=_scheduler_loop, name="scan-scheduler", daemon=True)
+    _scheduler_thread.start()
+
+
+def stop_scheduler() -> None:
+    _scheduler_stop.set()
@@ -0,0 +1,204 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from app import db
+
+
+logger = logging.getLogger(__name__)
+
+TAG_LIBRARY_TTL_SECONDS = float(os.getenv("TAG_LIBRARY_TTL_SECONDS", "3600"))
+TAG_LIBRARY_MAX_BYTES = int(os.getenv("TAG_LIBRARY_MAX_BYTES", str(10 * 1024 * 1024)))
+TAG_LIBRARY_FETCH_TIMEOUT_SECONDS = float(os.getenv("TAG_LIBRARY_FETCH_TIMEOUT_SECONDS", "10"))
+_MEMORY_CACHE_SIZE = 256
+
+# Any request to the Launch/DTM CDN means the page is tagged; only the embed
+# libraries themselves are fingerprinted.
+TAG_REQUEST_PATTERN = re.compile(r"^https?://[^?#]*adobedtm\.com/", re.IGNORECASE)
+_LAUNCH_LIBRARY = re.compile(r"/launch-(?P<env>[A-Za-z0-9]+)(?:-(?P<stage>development|staging))?(?:\.min)?\.js$", re.IGNORECASE)
+_DTM_LIBRARY = re.compile(r"/satelliteLib-(?P<env>[0-9a-f]+)(?P<stage>-staging)?\.js$", re.IGNORECASE)
+
+_STRING = r"[\"']((?:[^\"'\\]|\\.)*)[\"']"
+_BUILD_DATE = re.compile(r"[\"']?buildDate[\"']?\s*:\s*" + _STRING)
+_TURBINE_VERSION = re.compile(r"[\"']?turbineVersion[\"']?\s*:\s*" + _STRING)
+_STAGE = re.compile(r"[\"']?stage[\"']?\s*:\s*[\"'](production|staging|development)[\"']")
+_PROPERTY_NAME = re.compile(r"[\"']?property[\"']?\s*:\s*\{\s*[\"']?name[\"']?\s*:\s*" + _STRING)
+_RULE = re.compile(r"[\"']?id[\"']?\s*:\s*[\"'](RL[0-9a-fA-F]+)[\"']\s*,\s*[\"']?name[\"']?\s*:\s*" + _STRING)
+_MODULE_PATH = re.compile(r"[\"']?modulePath[\"']?\s*:\s*[\"']([^/\"']+)/")
+_DATA_ELEMENT = re.compile(_STRING + r"\s*:\s*\{\s*[\"']?(?:defaultValue|storageDuration|forceLowerCase|cleanText|modulePath)[\"']?\s*:")
+
+_memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def is_tag_request(url: str) -> bool:
+    return bool(url) and "adobedtm.com" in url.lower() and TAG_REQUEST_PATTERN.match(url) is not None
+
+
+def is_tag_library(url: str) -> bool:
+    path = urlparse(url or "").path
+    return bool(_LAUNCH_LIBRARY.search(path) or _DTM_LIBRARY.search(path))
+
+
+def library_id(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8", errors="replace")).hexdigest()[:32]
+
+
+def parse_library_url(url: str) -> Dict[str, Any]:
+    parsed = urlparse(url)
+    info: Dict[str, Any] = {"url": url, "host": parsed.netloc.lower()}
+    m = _LAUNCH_LIBRARY.search(parsed.path)
+    if m:
+        segments = [s for s in parsed.path.split("/") if s]
+        info.update({
+            "kind": "launch",
+            "environment_id": m.group("env"),
+            "environment": (m.group("stage") or "production").lower(),
+            # assets.adobedtm.com/{company}/{property}/launch-{env}.min.js
+            "company_id": segments[-3] if len(segments) >= 3 else None,
+            "property_id": segments[-2] if len(segments) >= 2 else None,
+        })
+        return info
+    m = _DTM_LIBRARY.search(parsed.path)
+    if m:
+        info.update({"kind": "dtm", "environment_id": m.group("env"), "environment": "staging" if m.group("stage") else "production"})
+    return info
+
+
+def _first(pattern: "re.Pattern[str]", text: str) -> Optional[str]:
+    m = pattern.search(text)
+    return m.group(1) if m else None
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(v for v in values if v))
+
+
+def parse_library(text: str) -> Dict[str, Any]:
+    # Launch builds inline their container as an object literal; keys may or
+    # may not be quoted depending on minification.
+    data_elements_text = ""
+    start = text.find("dataElements")
+    if start != -1:
+        end = text.find("extensions", start)
+        data_elements_text = text[start:end if end != -1 else len(text)]
+
+    stage = _first(_STAGE, text)
+    rules = [{"id": rule_id, "name": name} for rule_id, name in dict(_RULE.findall(text)).items()]
+    return {
+        "build_date": _first(_BUILD_DATE, text),
+        "turbine_version": _first(_TURBINE_VERSION, text),
+        "property_name": _first(_PROPERTY_NAME, text),
+        "extensions": _unique(_MODULE_PATH.findall(text)),
+        "data_elements": _unique(_DATA_ELEMENT.findall(data_elements_text)),
+        "rules": rules,
+        **({"environment": stage} if stage else {}),
+    }
+
+
+def _fetch(url: str, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    import requests
+
+    headers = {"User-Agent": "Mozilla/5.0 (compatible; AdobeAnalyticsScanner/1.0)"}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    with requests.get(url, headers=headers, timeout=TAG_LIBRARY_FETCH_TIMEOUT_SECONDS, stream=True) as resp:
+        if resp.status_code == 304 and cached:
+            return {**cached, "checked_at": time.time()}
+        resp.raise_for_status()
+        body = resp.raw.read(TAG_LIBRARY_MAX_BYTES + 1, decode_content=True)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+
+    if len(body) > TAG_LIBRARY_MAX_BYTES:
+        logger.warning(f"Tag library {url} is larger than {TAG_LIBRARY_MAX_BYTES} bytes; not analyzing it")
+        return None
+    content_hash = hashlib.sha256(body).hexdigest()
+    now = time.time()
+    if cached and cached.get("content_hash") == content_hash:
+        return {**cached, "etag": etag, "last_modified": last_modified, "checked_at": now}
+
+    doc = {
+        "_id": library_id(url),
+        **parse_library_url(url),
+        **parse_library(body.decode("utf-8", errors="replace")),
+        "size": len(body),
+        "content_hash": content_hash,
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": now,
+        "checked_at": now,
+    }
+    logger.info(f"Analyzed tag library {url}: build {doc.get('build_date')}, {len(doc['rules'])} rules")
+    return doc
+
+
+def _remember(doc: Dict[str, Any]) -> None:
+    with _memory_lock:
+        _memory[doc["_id"]] = doc
+        _memory.move_to_end(doc["_id"])
+        while len(_memory) > _MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def describe_library(url: str, fetch: bool = True) -> Dict[str, Any]:
+    key = library_id(url)
+    with _memory_lock:
+        cached = _memory.get(key)
+    if cached is None and db.tag_libraries_col is not None:
+        cached = db.tag_libraries_col.find_one({"_id": key})
+        if cached is not None:
+            _remember(cached)
+
+    fresh = cached is not None and time.time() - cached.get("checked_at", 0) < TAG_LIBRARY_TTL_SECONDS
+    if fresh or not fetch:
+        return cached or {"_id": key, **parse_library_url(url)}
+
+    try:
+        doc = _fetch(url, cached)
+    except Exception as e:
+        logger.warning(f"Could not fetch tag library {url}: {e}")
+        doc = None
+    if doc is None:
+        return cached or {"_id": key, **parse_library_url(url)}
+
+    _remember(doc)
+    if db.tag_libraries_col is not None:
+        db.tag_libraries_col.replace_one({"_id": key}, doc, upsert=True)
+    return doc
+
+
+def describe_libraries(urls: Iterable[str], fetch: bool = True) -> List[Dict[str, Any]]:
+    refs = []
+    for url in _unique(urls):
+        doc = describe_library(url, fetch)
+        refs.append({
+            "library_id": doc["_id"],
+            "url": url,
+            "kind": doc.get("kind"),
+            "environment": doc.get("environment"),
+            "build_date": doc.get("build_date"),
+        })
+    return refs
+
+
+def scan_tag_libraries(scan_id: str) -> List[Dict[str, Any]]:
+    pipeline = [
+        {"$match": {"scan_id": scan_id, "tag_libraries.0": {"$exists": True}}},
+        {"$project": {"tag_libraries.library_id": 1}},
+        {"$unwind": "$tag_libraries"},
+        {"$group": {"_id": "$tag_libraries.library_id", "pages": {"$sum": 1}}},
+        {"$sort": {"pages": -1}},
+    ]
+    counts = {doc["_id"]: doc["pages"] for doc in db.pages_col.aggregate(pipeline)}
+    libraries = {doc["_id"]: doc for doc in db.tag_libraries_col.find({"_id": {"$in": list(counts)}}, {"etag": 0, "last_modified": 0})}
+    return [{**libraries.get(key, {"_id": key}), "pages": pages} for key, pages in counts.items()]
@@ -0,0 +1,157 @@
+import re
+import hashlib
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+_NUMERIC_RE = re.compile(r"^\d+$")
+_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+_HEX_RE = re.compile(r"^[0-9a-f]{12,}$", re.IGNORECASE)
+_SLUG_WITH_ID_RE = re.compile(r"^[a-z0-9]+(?:[-_][a-z0-9]+)*[-_.]\d{3,}[a-z0-9]*$|^[a-z]*\d{4,}[a-z0-9-]*$", re.IGNORECASE)
+
+DOM_SIGNATURE_JS = """
+() => {
+  const parts = new Set();
+  const walk = (node, depth) => {
+    if (!node || depth > 5) return;
+    for (const child of node.children) {
+      const tag = child.tagName.toLowerCase();
+      if (tag === 'script' || tag === 'style' || tag === 'noscript') continue;
+      const cls = (child.classList && child.classList.length) ? child.classList[0] : '';
+      parts.add(depth + ':' + tag + '.' + cls);
+      walk(child, depth + 1);
+    }
+  };
+  walk(document.body, 0);
+  return Array.from(parts).sort().join('|');
+}
+"""
+
+
+def _normalize_segment(segment: str) -> str:
+    if not segment:
+        return segment
+    if _NUMERIC_RE.match(segment):
+        return "{id}"
+    if _UUID_RE.match(segment):
+        return "{uuid}"
+    if _HEX_RE.match(segment):
+        return "{hash}"
+    if _SLUG_WITH_ID_RE.match(segment):
+        return "{slug-id}"
+    return segment
+
+
+def url_template_key(url: str) -> str:
+    parsed = urlparse(url)
+    segments = [_normalize_segment(s) for s in parsed.path.split("/")]
+    path = "/".join(segments) or "/"
+    return f"{parsed.netloc}{path}"
+
+
+def sibling_template_key(url: str) -> str:
+    key = url_template_key(url)
+    head, sep, _tail = key.rstrip("/").rpartition("/")
+    if not sep:
+        return key
+    return f"{head}/*"
+
+
+def dom_signature(structure: str) -> str:
+    return hashlib.sha1((structure or "").encode("utf-8")).hexdigest()[:16]
+
+
+class TemplateSampler:
+    def __init__(self, samples_per_template: int):
+        self.samples_per_template = max(0, int(samples_per_template or 0))
+        self.url_clusters: Dict[str, Dict[str, Any]] = {}
+        self.dom_clusters: Dict[str, int] = {}
+        self.sibling_doms: Dict[str, Dict[str, int]] = {}
+        self.saturated_siblings: set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.samples_per_template > 0
+
+    def _cluster(self, key: str) -> Dict[str, Any]:
+        cluster = self.url_clusters.get(key)
+        if cluster is None:
+            cluster = {"template": key, "sampled": 0, "skipped": 0, "sample_urls": [], "dom_signatures": set()}
+            self.url_clusters[key] = cluster
+        return cluster
+
+    def should_visit(self, url: str) -> bool:
+        if not self.enabled:
+            return True
+
+        cluster = self._cluster(url_template_key(url))
+        sibling = sibling_template_key(url)
+        if cluster["sampled"] >= self.samples_per_template or (sibling in self.saturated_siblings and cluster["sampled"] == 0):
+            cluster["skipped"] += 1
+            return False
+        return True
+
+    def dom_cluster_saturated(self, signature: Optional[str]) -> bool:
+        if not self.enabled or not signature:
+            return False
+        return self.dom_clusters.get(signature, 0) >= self.samples_per_template
+
+    def record_page(self, url: str, signature: Optional[str]) -> None:
+        if not self.enabled:
+            return
+
+        cluster = self._cluster(url_template_key(url))
+        cluster["sampled"] += 1
+        if len(cluster["sample_urls"]) < self.samples_per_template:
+            cluster["sample_urls"].append(url)
+
+        if not signature:
+            return
+
+        cluster["dom_signatures"].add(signature)
+        self.dom_clusters[signature] = self.dom_clusters.get(signature, 0) + 1
+
+        sibling = sibling_template_key(url)
+        doms = self.sibling_doms.setdefault(sibling, {})
+        doms[signature] = doms.get(signature, 0) + 1
+        if len(doms) == 1 and doms[signature] >= max(2, self.samples_per_template):
+            self.saturated_siblings.add(sibling)
+        elif len(doms) > 1:
+            self.saturated_siblings.discard(sibling)
+
+    def to_state(self) -> Dict[str, Any]:
+        # Lists of pairs rather than dicts: template keys contain dots, which
+        # are awkward as MongoDB field names.
+        return {
+            "url_clusters": [
+                {**c, "dom_signatures": sorted(c["dom_signatures"])} for c in self.url_clusters.values()
+            ],
+            "dom_clusters": [[sig, n] for sig, n in self.dom_clusters.items()],
+            "sibling_doms": [[sib, [[sig, n] for sig, n in doms.items()]] for sib, doms in self.sibling_doms.items()],
+            "saturated_siblings": sorted(self.saturated_siblings),
+        }
+
+    def load_state(self, state: Optional[Dict[str, Any]]) -> None:
+        if not state:
+            return
+        self.url_clusters = {
+            c["template"]: {**c, "dom_signatures": set(c.get("dom_signatures", []))} for c in state.get("url_clusters", [])
+        }
+        self.dom_clusters = {sig: n for sig, n in state.get("dom_clusters", [])}
+        self.sibling_doms = {sib: {sig: n for sig, n in doms} for sib, doms in state.get("sibling_doms", [])}
+        self.saturated_siblings = set(state.get("saturated_siblings", []))
+
+    def coverage(self) -> List[Dict[str, Any]]:
+        out = []
+        for cluster in self.url_clusters.values():
+            if not cluster["sampled"] and not cluster["skipped"]:
+                continue
+            out.append({
+                "template": cluster["template"],
+                "sampled": cluster["sampled"],
+                "skipped": cluster["skipped"],
+                "sample_urls": list(cluster["sample_urls"]),
+                "dom_signatures": sorted(cluster["dom_signatures"]),
+            })
+        out.sort(key=lambda c: (-(c["sampled"] + c["skipped"]), c["template"]))
+        return out
@@ -11,7 +11,7 @@ UI_HTML = """<!doctype html>
     label{display:block; font-size:12px; color:#374151; margin-bottom:6px;}
     input{width:100%; padding:12px 14px; border:1px solid #d1d5db; border-radius:10px; font-size:14px; background:#fff; transition:border .2s ease, box-shadow .2s ease;}
     input:focus{border-color:#4f46e5; box-shadow:0 0 0 3px rgba(79,70,229,.2); outline:none;}
-    .row{display:grid; grid-template-columns: 1fr 160px 160px 140px; gap:12px; align-items:start;}
+    .row{display:grid; grid-template-columns: 1fr 160px 160px 160px 140px; gap:12px; align-items:start;}
     .exampleBar{display:flex; gap:8px; flex-wrap:wrap; align-items:center; margin-top:8px;}
     .row > div{display:flex; flex-direction:column;}
     .btn{display:inline-flex; align-items:center; justify-content:center; gap:6px; padding:8px 10px; border-radius:10px; border:1px solid #d1d5db; background:#111827; color:#fff; cursor:pointer; font-size:13px; line-height:1; text-decoration:none;}
@@ -32,6 +32,15 @@ UI_HTML = """<!doctype html>
     .modalHeader{display:flex; justify-content:space-between; align-items:center; padding:12px 14px; border-bottom:1px solid #e5e7eb;}
     .modalTitle{font-weight:600; font-size:14px;}
     .modalBody{padding:12px 14px; overflow:auto;}
+    .vscroll{height:68vh; overflow:auto; position:relative; border:1px solid #e5e7eb; border-radius:8px;}
+    .vhead{position:sticky; top:0; z-index:1; display:flex; background:#f3f4f6; border-bottom:1px solid #e5e7eb;}
+    .vbody{position:relative;}
+    .vrow{position:absolute; left:0; display:flex; height:32px; border-bottom:1px solid #f1f5f9;}
+    .vrow:hover{background:#f8fafc;}
+    .vcell,.vth{flex:0 0 220px; width:220px; padding:0 8px; line-height:32px; font-size:12px; white-space:nowrap; overflow:hidden; text-overflow:ellipsis; cursor:pointer;}
+    .vth{font-weight:600; color:#374151; cursor:default;}
+    .vcell.more{color:#4338ca;}
+    .vcell.more::after{content:' …';}
     pre{white-space:pre-wrap; word-break:break-word; font-size:12px; line-height:1.45; margin:0;}
     svg{display:block;}
     @media (max-width: 860px){
@@ -61,6 +70,10 @@ UI_HTML = """<!doctype html>
         <label>Max Clicks/Page</label>
         <input id=\"maxClicks\" type=\"number\" min=\"0\" value=\"3\" />
       </div>
+      <div>
+        <label>Samples/Template</label>
+        <input id=\"samplesPerTemplate\" type=\"number\" min=\"0\" value=\"0\" title=\"0 scans every page\" />
+      </div>
       <div>
         <button id=\"startBtn\">Start Scan</button>
       </div>
@@ -98,6 +111,26 @@ UI_HTML = """<!doctype html>
     </div>
   </div>
 
+  <div class=\"overlay\" id=\"reportOverlay\" role=\"dialog\" aria-modal=\"true\">
+    <div class=\"modal\" style=\"width:min(1400px, 98vw);\">
+      <div class=\"modalHeader\">
+        <div class=\"modalTitle\" id=\"reportTitle\">Report</div>
+        <div class=\"actions\">
+          <input id=\"reportSearch\" placeholder=\"Search all columns\" style=\"width:260px; padding:8px 10px;\" />
+          <span class=\"muted\" id=\"reportCount\"></span>
+          <button class=\"btn secondary\" id=\"reportCloseBtn\">Close</button>
+        </div>
+      </div>
+      <div class=\"modalBody\">
+        <div class=\"vscroll\" id=\"reportScroll\">
+          <div class=\"vhead\" id=\"reportHeader\"></div>
+          <div class=\"vbody\" id=\"reportBody\"></div>
+        </div>
+        <div class=\"muted\" style=\"margin-top:8px;\">Click a cell to see its full value.</div>
+      </div>
+    </div>
+  </div>
+
   <div class=\"overlay\" id=\"overlay\" role=\"dialog\" aria-modal=\"true\">
     <div class=\"modal\">
       <div class=\"modalHeader\">
@@ -157,11 +190,13 @@ UI_HTML = """<!doctype html>
       const completedAt = fmtTs(s.completed_at);
       const duration = (s.duration_seconds !== null && s.duration_seconds !== undefined) ? String(s.duration_seconds) : '';
 
-      const canDownload = status === 'completed';
+      const canDownload = status === 'completed' || (status === 'cancelled' && !!s.started_at);
       const dlFull = canDownload ? `<a class=\"btn secondary\" href=\"/report/${scanId}\" target=\"_blank\" rel=\"noopener\">Full XLSX</a>` : `<span class=\"btn secondary disabled\">Full XLSX</span>`;
       const dlSimple = canDownload ? `<a class=\"btn secondary\" href=\"/report/${scanId}/simple\" target=\"_blank\" rel=\"noopener\">Simple XLSX</a>` : `<span class=\"btn secondary disabled\">Simple XLSX</span>`;
-      const viewJson = canDownload ? `<button class=\"btn secondary icon\" title=\"View JSON\" data-view=\"${scanId}\">${eyeSvg}</button>` : `<span class=\"btn secondary icon disabled\">${eyeSvg}</span>`;
-      const retryBtn = (status === 'running' || status === 'queued') ? `<span class=\"btn secondary disabled\">Retry</span>` : `<button class=\"btn secondary\" data-retry=\"${scanId}\">Retry</button>`;
+      const viewJson = canDownload ? `<button class=\"btn secondary icon\" title=\"View report\" data-view=\"${scanId}\">${eyeSvg}</button>` : `<span class=\"btn secondary icon disabled\">${eyeSvg}</span>`;
+      const retryBtn = (status === 'running' || status === 'queued' || status === 'deleting') ? `<span class=\"btn secondary disabled\">Retry</span>` : `<button class=\"btn secondary\" data-retry=\"${scanId}\">Retry</button>`;
+      const cancelBtn = (status === 'running' || status === 'queued') ? `<button class=\"btn secondary\" data-cancel=\"${scanId}\">Cancel</button>` : '';
+      const resumeBtn = (status === 'failed' || status === 'cancelled') ? `<button class=\"btn secondary\" data-resume=\"${scanId}\">Resume</button>` : '';
 
       return `
         <tr>
@@ -176,9 +211,11 @@ UI_HTML = """<!doctype html>
             <div class=\"actions\">
               ${viewJson}
               ${retryBtn}
+              ${resumeBtn}
+              ${cancelBtn}
               ${dlSimple}
               ${dlFull}
-              <button class=\"btn danger\" data-del=\"${scanId}\">Delete</button>
+              ${status === 'deleting' ? `<span class=\"btn danger disabled\">Deleting</span>` : `<button class=\"btn danger\" data-del=\"${scanId}\">Delete</button>`}
             </div>
           </td>
         </tr>
@@ -210,8 +247,7 @@ UI_HTML = """<!doctype html>
         if (!id) return;
         btn.disabled = true;
         try {
-          const data = await api(`/report/${id}/data`);
-          openModal(`Report JSON - ${id}`, data);
+          await openReport(id);
         } catch (e) {
           alert(e.message);
         } finally {
@@ -238,11 +274,46 @@ UI_HTML = """<!doctype html>
         }
       });
     });
+
+    document.querySelectorAll('button[data-cancel]').forEach(btn => {
+      btn.addEventListener('click', async () => {
+        const id = btn.getAttribute('data-cancel');
+        if (!id) return;
+        if (!confirm(`Cancel scan ${id}? Pages scanned so far are kept.`)) return;
+        btn.disabled = true;
+        try {
+          await api(`/scan/${id}/cancel`, { method: 'POST' });
+          await loadScans();
+        } catch (e) {
+          alert(e.message);
+        } finally {
+          btn.disabled = false;
+        }
+      });
+    });
+
+    document.querySelectorAll('button[data-resume]').forEach(btn => {
+      btn.addEventListener('click', async () => {
+        const id = btn.getAttribute('data-resume');
+        if (!id) return;
+        btn.disabled = true;
+        try {
+          await api(`/scan/${id}/resume`, { method: 'POST' });
+          el('startMsg').textContent = `Resumed: ${id}`;
+          setTimeout(() => { el('startMsg').textContent = ''; }, 2500);
+          await loadScans();
+        } catch (e) {
+          alert(e.message);
+        } finally {
+          btn.disabled = false;
+        }
+      });
+    });
   }
 
   function openModal(title, jsonObj) {
     el('modalTitle').textContent = title || 'JSON Data';
-    el('jsonPre').textContent = JSON.stringify(jsonObj, null, 2);
+    el('jsonPre').textContent = typeof jsonObj === 'string' ? jsonObj : JSON.stringify(jsonObj, null, 2);
     el('overlay').style.display = 'flex';
   }
 
@@ -251,6 +322,96 @@ UI_HTML = """<!doctype html>
     el('jsonPre').textContent = '';
   }
 
+  // Report viewer: rows are fetched from the server in blocks and only the
+  // rows inside the scroll viewport (plus a small margin) are in the DOM.
+  const ROW_HEIGHT = 32;
+  const COL_WIDTH = 220;
+  const BLOCK_SIZE = 200;
+  let viewer = null;
+
+  function esc(value) {
+    return String(value).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+  }
+
+  async function openReport(scanId) {
+    viewer = { scanId, q: '', total: 0, columns: [], blocks: new Map(), pending: new Set(), generation: 0 };
+    el('reportTitle').textContent = `Report - ${scanId}`;
+    el('reportSearch').value = '';
+    el('reportOverlay').style.display = 'flex';
+    await resetReport();
+  }
+
+  function closeReport() {
+    viewer = null;
+    el('reportOverlay').style.display = 'none';
+    el('reportHeader').innerHTML = '';
+    el('reportBody').innerHTML = '';
+  }
+
+  async function resetReport() {
+    viewer.generation += 1;
+    viewer.blocks = new Map();
+    viewer.pending = new Set();
+    el('reportScroll').scrollTop = 0;
+    await loadReportBlock(0);
+    renderReportHeader();
+    renderReportRows();
+  }
+
+  async function loadReportBlock(n) {
+    const v = viewer;
+    if (!v || v.blocks.has(n) || v.pending.has(n)) return;
+    const generation = v.generation;
+    v.pending.add(n);
+    try {
+      const qs = new URLSearchParams({ offset: n * BLOCK_SIZE, limit: BLOCK_SIZE });
+      if (v.q) qs.set('q', v.q);
+      const data = await api(`/report/${v.scanId}/rows?${qs.toString()}`);
+      if (viewer !== v || v.generation !== generation) return;
+      v.total = data.matched;
+      v.columns = data.columns || [];
+      v.blocks.set(n, data.rows || []);
+      el('reportCount').textContent = v.q ? `${data.matched} of ${data.total_rows} rows` : `${data.total_rows} rows`;
+    } finally {
+      v.pending.delete(n);
+    }
+  }
+
+  function renderReportHeader() {
+    const v = viewer;
+    if (!v) return;
+    el('reportHeader').style.width = `${v.columns.length * COL_WIDTH}px`;
+    el('reportHeader').innerHTML = v.columns.map(c => `<div class=\"vth\" title=\"${esc(c)}\">${esc(c)}</div>`).join('');
+  }
+
+  function renderReportRows() {
+    const v = viewer;
+    if (!v) return;
+    const scroller = el('reportScroll');
+    const body = el('reportBody');
+    body.style.height = `${v.total * ROW_HEIGHT}px`;
+    body.style.width = `${v.columns.length * COL_WIDTH}px`;
+
+    const first = Math.max(0, Math.floor(scroller.scrollTop / ROW_HEIGHT) - 10);
+    const last = Math.min(v.total, Math.ceil((scroller.scrollTop + scroller.clientHeight) / ROW_HEIGHT) + 10);
+    const missing = new Set();
+    const html = [];
+    for (let i = first; i < last; i++) {
+      const block = v.blocks.get(Math.floor(i / BLOCK_SIZE));
+      if (!block) { missing.add(Math.floor(i / BLOCK_SIZE)); continue; }
+      const row = block[i % BLOCK_SIZE];
+      if (!row) continue;
+      const cells = v.columns.map(c => {
+        const value = row.cells[c];
+        const more = (row.truncated || []).includes(c);
+        return `<div class=\"vcell${more ? ' more' : ''}\" data-row=\"${row.index}\" data-col=\"${esc(c)}\">${esc(value === null || value === undefined ? '' : value)}</div>`;
+      }).join('');
+      html.push(`<div class=\"vrow\" style=\"top:${i * ROW_HEIGHT}px\">${cells}</div>`);
+    }
+    body.innerHTML = html.join('');
+    missing.forEach(n => loadReportBlock(n).then(renderReportRows).catch(() => {}));
+  }
+
   async function loadScans() {
     const data = await api('/scans?limit=50');
     renderRows(data.scans || []);
@@ -280,7 +441,8 @@ UI_HTML = """<!doctype html>
       const start_url = el('startUrl').value.trim();
       const max_pages = parseInt(el('maxPages').value, 10);
       const max_clicks_per_page = parseInt(el('maxClicks').value, 10);
-      const qs = new URLSearchParams({ start_url, max_pages, max_clicks_per_page });
+      const samples_per_template = parseInt(el('samplesPerTemplate').value, 10) || 0;
+      const qs = new URLSearchParams({ start_url, max_pages, max_clicks_per_page, samples_per_template });
       const out = await api(`/scan?${qs.toString()}`, { method: 'POST' });
       el('startMsg').textContent = `Scan started: ${out.scan_id}`;
       el('startUrl').value = '';
@@ -295,6 +457,43 @@ UI_HTML = """<!doctype html>
   });
 
   el('closeBtn').addEventListener('click', closeModal);
+  el('reportCloseBtn').addEventListener('click', closeReport);
+
+  let reportScrollFrame = null;
+  el('reportScroll').addEventListener('scroll', () => {
+    if (reportScrollFrame) return;
+    reportScrollFrame = requestAnimationFrame(() => {
+      reportScrollFrame = null;
+      renderReportRows();
+    });
+  });
+
+  let reportSearchTimer = null;
+  el('reportSearch').addEventListener('input', () => {
+    clearTimeout(reportSearchTimer);
+    reportSearchTimer = setTimeout(() => {
+      if (!viewer) return;
+      viewer.q = el('reportSearch').value.trim();
+      resetReport().catch(e => alert(e.message));
+    }, 300);
+  });
+
+  el('reportBody').addEventListener('click', async (evt) => {
+    const cell = evt.target.closest('.vcell');
+    if (!cell || !viewer) return;
+    const row = cell.getAttribute('data-row');
+    const column = cell.getAttribute('data-col');
+    try {
+      const data = await api(`/report/${viewer.scanId}/rows/${row}?column=${encodeURIComponent(column)}`);
+      let value = data.value;
+      if (typeof value === 'string') {
+        try { value = JSON.parse(value); } catch { }
+      }
+      openModal(`${column} - row ${row}`, value === null || value === undefined ? '' : value);
+    } catch (e) {
+      alert(e.message);
+    }
+  });
 
   el('exampleSkyrizi').addEventListener('click', () => {
     el('startUrl').value = 'https://www.skyrizi.com/';
@@ -307,8 +506,13 @@ UI_HTML = """<!doctype html>
   el('overlay').addEventListener('click', (evt) => {
     if (evt.target && evt.target.id === 'overlay') closeModal();
   });
+  el('reportOverlay').addEventListener('click', (evt) => {
+    if (evt.target && evt.target.id === 'reportOverlay') closeReport();
+  });
   document.addEventListener('keydown', (evt) => {
-    if (evt.key === 'Escape') closeModal();
+    if (evt.key !== 'Escape') return;
+    if (el('overlay').style.display === 'flex') closeModal();
+    else closeReport();
   });
   el('copyBtn').addEventListener('click', async () => {
     try {
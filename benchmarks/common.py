@@ -0,0 +1,77 @@
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from app import db
+from app.services.memory import process_tree_rss_mb
+
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class RssSampler:
+    def __init__(self, interval_seconds: float = 0.25):
+        self.interval_seconds = interval_seconds
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, process_tree_rss_mb())
+            self._stop.wait(self.interval_seconds)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, process_tree_rss_mb())
+
+
+def use_benchmark_database(mongo_uri: str = "") -> None:
+    if mongo_uri:
+        from pymongo import MongoClient
+
+        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+        database = client[f"adobe_scanner_bench_{int(time.time())}"]
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("Install mongomock or pass --mongo-uri pointing at a local mongod")
+        client = mongomock.MongoClient()
+        database = client["adobe_scanner_bench"]
+
+    db.client = client
+    db.db = database
+    db.scans_col = database["scans"]
+    db.pages_col = database["pages"]
+    db.reports_col = database["reports"]
+    db.blobs_col = database["payload_blobs"]
+    db.checkpoints_col = database["scan_checkpoints"]
+
+
+def drop_benchmark_database() -> None:
+    if db.client is not None and db.db is not None:
+        db.client.drop_database(db.db.name)
+
+
+def write_results(results: Dict[str, Any], output: str) -> None:
+    text = json.dumps(results, indent=2, default=str)
+    if output:
+        with open(output, "w") as fh:
+            fh.write(text + "\n")
+    print(text)
@@ -0,0 +1,86 @@
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Any, Dict, List
+
+
+HEAVY_MODULES = ("pandas", "openpyxl", "playwright", "bs4", "requests")
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def _slowest_imports(stderr: str, top: int) -> List[Dict[str, Any]]:
+    entries = []
+    for line in stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # Nested imports are indented by two extra spaces per level.
+        if parts[2].startswith("   "):
+            continue
+        entries.append({"module": parts[2].strip(), "cumulative_ms": round(int(parts[1]) / 1000, 1)})
+    return sorted(entries, key=lambda e: -e["cumulative_ms"])[:top]
+
+
+def measure(module: str, runs: int) -> Dict[str, Any]:
+    samples = []
+    loaded: List[str] = []
+    slowest: List[Dict[str, Any]] = []
+    for i in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise SystemExit(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        loaded = result["loaded"]
+        if i == 0:
+            slowest = _slowest_imports(proc.stderr, 10)
+    return {
+        "module": module,
+        "runs": runs,
+        "best_seconds": round(min(samples), 3),
+        "median_seconds": round(sorted(samples)[len(samples) // 2], 3),
+        "heavy_modules_loaded": loaded,
+        "slowest_imports": slowest,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time", description="Check the API import time stays within budget")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-seconds", type=float, default=0.5, help="Maximum median import time")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    result = measure(args.module, args.runs)
+    result["timestamp"] = time.time()
+    result["budget_seconds"] = args.budget_seconds
+    print(json.dumps(result, indent=2))
+
+    failures = []
+    if result["median_seconds"] > args.budget_seconds:
+        failures.append(f"import of {args.module} took {result['median_seconds']}s (budget {args.budget_seconds}s)")
+    if result["heavy_modules_loaded"]:
+        failures.append(f"heavy modules imported eagerly: {', '.join(result['heavy_modules_loaded'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import time
+import gc
+import argparse
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.services.exports import report_to_xlsx, simple_report_to_xlsx
+from app.services.reporting import build_report_rows, extract_adobe_analytics_info
+from benchmarks.common import write_results
+
+
+# Baselines are machine-specific; a runner can keep its own file elsewhere.
+DEFAULT_BASELINE = os.getenv(
+    "BENCH_REPORTING_BASELINE", os.path.join(os.path.dirname(__file__), "baselines", "reporting.json")
+)
+# Timings are the best of TIMING_MIN_REPEATS to TIMING_REPEATS runs, stopping
+# once the runs together take TIMING_BUDGET_SECONDS, so fast steps get enough
+# samples without repeating slow exports many times.
+TIMING_MIN_REPEATS = 3
+TIMING_REPEATS = 7
+TIMING_BUDGET_SECONDS = 2.0
+# Timings below this are scheduler noise at a 25% threshold.
+MIN_COMPARED_SECONDS = 0.05
+# A fixed pure-Python workload timed next to every size. Timings are compared
+# relative to it, so a slower runner or a busy host does not read as a
+# regression.
+CALIBRATION_KEY = "calibration_seconds"
+LOAD_BEACONS_PER_PAGE = 6
+CLICKS_PER_PAGE = 2
+BEACONS_PER_CLICK = 2
+BEACONS_PER_PAGE = LOAD_BEACONS_PER_PAGE + CLICKS_PER_PAGE * BEACONS_PER_CLICK
+
+
+def _legacy_beacon(page: int, i: int) -> Dict[str, Any]:
+    url = (
+        f"https://metrics.example.com/b/ss/benchrsid,benchglobal/1/JS-2.22.0/s{page}{i}"
+        f"?AQB=1&pageName=page%20{page}&g=https%3A%2F%2Fwww.example.com%2Fp%2F{page}"
+        f"&v1=value{i}&v2=segment{page % 7}&c1=prop{i}&events=event{i % 5 + 1}&AQE=1"
+    )
+    return {
+        "request_url": url,
+        "method": "GET",
+        "payload": {"pageName": f"page {page}", "v1": f"value{i}", "events": f"event{i % 5 + 1}"},
+        "response_payload": "GIF89a",
+    }
+
+
+def _interact_beacon(page: int, i: int) -> Dict[str, Any]:
+    return {
+        "request_url": f"https://edge.adobedc.net/ee/v1/interact?configId=bench-config&requestId={page}-{i}",
+        "method": "POST",
+        "payload": {
+            "event": {
+                "xdm": {
+                    "eventType": "web.webpagedetails.pageViews",
+                    "web": {"webPageDetails": {"name": f"page {page}", "URL": f"https://www.example.com/p/{page}"}},
+                    "_experience": {"analytics": {"customDimensions": {"eVars": {"eVar1": f"value{i}"}}}},
+                }
+            }
+        },
+        "response_payload": json.dumps({"requestId": f"{page}-{i}", "handle": [{"type": "state:store", "payload": [{"key": "kndctr", "value": "x" * 120}]}]}),
+    }
+
+
+def synthetic_pages(total_beacons: int) -> List[Dict[str, Any]]:
+    pages = []
+    page_count = max(1, total_beacons // BEACONS_PER_PAGE)
+    for n in range(page_count):
+        load_beacons = [
+            _interact_beacon(n, i) if i % 3 == 0 else _legacy_beacon(n, i)
+            for i in range(LOAD_BEACONS_PER_PAGE)
+        ]
+        click_events = [
+            {
+                "element": f"https://www.example.com/p/{n}/link/{c}",
+                "element_type": "link",
+                "beacons": [_legacy_beacon(n, 100 + c * BEACONS_PER_CLICK + b) for b in range(BEACONS_PER_CLICK)],
+            }
+            for c in range(CLICKS_PER_PAGE)
+        ]
+        pages.append({
+            "scan_id": "bench",
+            "url": f"https://www.example.com/p/{n}",
+            "title": f"Synthetic product {n}",
+            "has_tagging": True,
+            "load_beacons": load_beacons,
+            "click_events": click_events,
+            "scan_duration": 1.5,
+            "template_key": "www.example.com/p/{id}",
+        })
+    return pages
+
+
+def _best_time(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    # Like timeit, with the garbage collector off while timing.
+    elapsed = float("inf")
+    spent = 0.0
+    for run in range(TIMING_REPEATS):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = fn()
+            took = time.perf_counter() - start
+        finally:
+            gc.enable()
+        elapsed = min(elapsed, took)
+        spent += took
+        if run + 1 >= TIMING_MIN_REPEATS and spent >= TIMING_BUDGET_SECONDS:
+            break
+    return result, elapsed
+
+
+def _calibration_workload() -> str:
+    rows = [{"index": i, "url": f"https://www.example.com/p/{i}", "value": str(i) * 8} for i in range(20000)]
+    return json.dumps([row for row in rows if row["url"].endswith(row["value"][-1])])
+
+
+def _measure(fn: Callable[[], Any]) -> Tuple[Any, float, float]:
+    # tracemalloc slows allocation-heavy code several times over, so timing
+    # and peak memory come from separate runs.
+    result, elapsed = _best_time(fn)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def run_size(total_beacons: int, include_xlsx: bool) -> Dict[str, Any]:
+    pages = synthetic_pages(total_beacons)
+    scan = {"_id": "bench", "started_at": time.time() - 60, "completed_at": time.time(), "duration_seconds": 60}
+    beacon_urls = [b["request_url"] for p in pages for b in p["load_beacons"]]
+    _, calibration_before = _best_time(_calibration_workload)
+
+    _, extract_seconds, _ = _measure(lambda: [extract_adobe_analytics_info(u) for u in beacon_urls])
+    rows, build_seconds, build_peak_mb = _measure(lambda: build_report_rows("bench", scan, pages))
+    _, json_seconds, json_peak_mb = _measure(lambda: json.dumps(rows))
+
+    result = {
+        "beacons": total_beacons,
+        "pages": len(pages),
+        "rows": len(rows),
+        "extract_seconds": round(extract_seconds, 4),
+        "extract_per_second": round(len(beacon_urls) / extract_seconds, 1) if extract_seconds else None,
+        "build_rows_seconds": round(build_seconds, 4),
+        "build_rows_per_second": round(len(rows) / build_seconds, 1) if build_seconds else None,
+        "build_rows_peak_mb": round(build_peak_mb, 2),
+        "json_export_seconds": round(json_seconds, 4),
+        "json_export_peak_mb": round(json_peak_mb, 2),
+    }
+
+    if include_xlsx:
+        _, xlsx_seconds, xlsx_peak_mb = _measure(lambda: report_to_xlsx(rows))
+        _, simple_seconds, simple_peak_mb = _measure(lambda: simple_report_to_xlsx(rows))
+        result.update({
+            "xlsx_export_seconds": round(xlsx_seconds, 4),
+            "xlsx_export_peak_mb": round(xlsx_peak_mb, 2),
+            "simple_xlsx_export_seconds": round(simple_seconds, 4),
+            "simple_xlsx_export_peak_mb": round(simple_peak_mb, 2),
+        })
+
+    # The slower of the two readings, so a busy spell during the size does
+    # not count against the code.
+    _, calibration_after = _best_time(_calibration_workload)
+    result[CALIBRATION_KEY] = round(max(calibration_before, calibration_after), 4)
+    return result
+
+
+def compare_to_baseline(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float, min_seconds: float = MIN_COMPARED_SECONDS
+) -> List[str]:
+    regressions = []
+    by_size = {b["beacons"]: b for b in baseline}
+    for result in results:
+        base = by_size.get(result["beacons"])
+        if not base:
+            continue
+        # Only ever more lenient: a quiet run must not make the check stricter.
+        speed = 1.0
+        if result.get(CALIBRATION_KEY) and base.get(CALIBRATION_KEY):
+            speed = max(1.0, result[CALIBRATION_KEY] / base[CALIBRATION_KEY])
+        for key, value in result.items():
+            if key == CALIBRATION_KEY:
+                continue
+            if not isinstance(value, (int, float)) or not isinstance(base.get(key), (int, float)) or not base[key]:
+                continue
+            # Rates are informational; they are derived from the timings.
+            if key.endswith("_per_second"):
+                continue
+            if key.endswith("_seconds"):
+                if base[key] < min_seconds:
+                    continue
+                worse = value > base[key] * speed * (1 + threshold)
+            elif key.endswith("_peak_mb"):
+                worse = value > base[key] * (1 + threshold)
+            else:
+                continue
+            if worse:
+                regressions.append(f"{result['beacons']} beacons: {key} {value} vs baseline {base[key]} (runner speed {speed:.2f}x)")
+    return regressions
+
+
+def _merge_runs(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(first)
+    for key, value in second.items():
+        if not isinstance(value, (int, float)) or not isinstance(first.get(key), (int, float)):
+            continue
+        if key == CALIBRATION_KEY:
+            merged[key] = max(first[key], value)
+        elif key.endswith("_seconds") or key.endswith("_peak_mb"):
+            merged[key] = min(first[key], value)
+    return merged
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.reporting", description="Reporting pipeline micro-benchmarks")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated beacon counts")
+    parser.add_argument("--skip-xlsx", action="store_true", help="Skip the pandas/openpyxl exports")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression as a fraction of the baseline")
+    parser.add_argument("--min-seconds", type=float, default=MIN_COMPARED_SECONDS, help="Timings with a shorter baseline are not compared")
+    parser.add_argument("--confirm-runs", type=int, default=2, help="Re-measure sizes that regressed up to this many times before failing")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = [run_size(size, include_xlsx=not args.skip_xlsx) for size in sizes]
+
+    if args.update_baseline:
+        write_results({"benchmark": "reporting", "timestamp": time.time(), "results": results}, args.output)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as fh:
+            json.dump(results, fh, indent=2)
+            fh.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 1
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    # Shared runners slow down for seconds at a time; a size only fails if it
+    # is still slower after being measured again.
+    for _ in range(args.confirm_runs):
+        failing = [i for i, r in enumerate(results) if compare_to_baseline([r], baseline, args.threshold, args.min_seconds)]
+        if not failing:
+            break
+        for i in failing:
+            results[i] = _merge_runs(results[i], run_size(results[i]["beacons"], include_xlsx=not args.skip_xlsx))
+    write_results({"benchmark": "reporting", "timestamp": time.time(), "results": results}, args.output)
+
+    regressions = compare_to_baseline(results, baseline, args.threshold, args.min_seconds)
+    for line in regressions:
+        print(f"REGRESSION: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+from typing import Any, Dict
+
+from app import db
+from app.services.crawler import collect_urls
+from app.services.exports import report_to_xlsx, simple_report_to_xlsx
+from app.services.reporting import load_report_rows
+from app.services.scanner import run_scan
+from benchmarks.common import RssSampler, drop_benchmark_database, percentile, use_benchmark_database, write_results
+from benchmarks.synthetic_site import SiteConfig, SyntheticSite, describe
+
+
+logger = logging.getLogger(__name__)
+
+
+def _count_beacons() -> int:
+    total = 0
+    for page in db.pages_col.find({}, {"load_beacons": 1, "click_events": 1}):
+        total += len(page.get("load_beacons", []))
+        total += sum(len(c.get("beacons", [])) for c in page.get("click_events", []))
+    return total
+
+
+def _bench_scan(base_url: str, max_pages: int, max_clicks_per_page: int) -> Dict[str, Any]:
+    scan_id = str(uuid.uuid4())
+    db.scans_col.insert_one({
+        "_id": scan_id,
+        "start_url": base_url,
+        "status": "queued",
+        "pages_scanned": 0,
+        "total_pages": 0,
+        "max_pages": max_pages,
+        "max_clicks_per_page": max_clicks_per_page,
+        "created_at": time.time(),
+    })
+
+    start = time.perf_counter()
+    run_scan(scan_id, base_url, max_pages, max_clicks_per_page)
+    elapsed = time.perf_counter() - start
+
+    scan = db.scans_col.find_one({"_id": scan_id})
+    if scan.get("status") != "completed":
+        raise SystemExit(f"Benchmark scan did not complete: {scan.get('status')} {scan.get('error', '')}")
+
+    pages = list(db.pages_col.find({"scan_id": scan_id}, {"scan_duration": 1, "phase_timings": 1}))
+    beacons = _count_beacons()
+    phases: Dict[str, list] = {}
+    for page in pages:
+        for phase, seconds in (page.get("phase_timings") or {}).items():
+            phases.setdefault(phase, []).append(seconds)
+
+    return {
+        "scan_id": scan_id,
+        "seconds": round(elapsed, 3),
+        "pages": len(pages),
+        "beacons": beacons,
+        "pages_per_second": round(len(pages) / elapsed, 3) if elapsed else None,
+        "beacons_per_second": round(beacons / elapsed, 3) if elapsed else None,
+        "page_p50_seconds": percentile([p.get("scan_duration", 0) for p in pages], 50),
+        "page_p95_seconds": percentile([p.get("scan_duration", 0) for p in pages], 95),
+        "phase_p95_seconds": {phase: percentile(values, 95) for phase, values in sorted(phases.items())},
+    }
+
+
+def _bench_collect_urls(base_url: str, max_pages: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    urls = collect_urls(base_url, max_pages, delay_seconds=0)
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 3),
+        "urls": len(urls),
+        "urls_per_second": round(len(urls) / elapsed, 3) if elapsed else None,
+    }
+
+
+def _bench_exports(scan_id: str) -> Dict[str, Any]:
+    report = db.reports_col.find_one({"_id": scan_id})
+    timings = {}
+
+    start = time.perf_counter()
+    rows = load_report_rows(report)
+    json.dumps(rows)
+    timings["json_seconds"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    report_to_xlsx(load_report_rows(report), report.get("template_coverage"))
+    timings["xlsx_seconds"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    simple_report_to_xlsx(load_report_rows(report))
+    timings["simple_xlsx_seconds"] = round(time.perf_counter() - start, 3)
+
+    timings["rows"] = len(rows)
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.scan_throughput", description="End-to-end scanner benchmark against a local synthetic site")
+    parser.add_argument("--pages", type=int, default=30, help="Pages in the synthetic site")
+    parser.add_argument("--fanout", type=int, default=5, help="Internal links per page")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Artificial server latency per request")
+    parser.add_argument("--beacons-per-page", type=int, default=1)
+    parser.add_argument("--no-interact", action="store_true", help="Do not send Web SDK interact calls")
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--max-clicks-per-page", type=int, default=2)
+    parser.add_argument("--mongo-uri", default="", help="Use a local mongod instead of mongomock")
+    parser.add_argument("--output", default="", help="Write results JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    config = SiteConfig(
+        pages=args.pages,
+        fanout=args.fanout,
+        latency_ms=args.latency_ms,
+        beacons_per_page=args.beacons_per_page,
+        interact=not args.no_interact,
+    )
+
+    use_benchmark_database(args.mongo_uri)
+    try:
+        with SyntheticSite(config) as site, RssSampler() as rss:
+            scan = _bench_scan(site.base_url, args.max_pages, args.max_clicks_per_page)
+            crawl = _bench_collect_urls(site.base_url, args.max_pages)
+            exports = _bench_exports(scan["scan_id"])
+    finally:
+        drop_benchmark_database()
+
+    results = {
+        "benchmark": "scan_throughput",
+        "timestamp": time.time(),
+        "site": describe(config),
+        "scan": scan,
+        "collect_urls": crawl,
+        "exports": exports,
+        "peak_rss_mb": round(rss.peak_mb, 1),
+    }
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import json
+import time
+import base64
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+
+TRANSPARENT_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+LAUNCH_LIBRARY_JS = """
+(function () {
+  var cfg = window.__benchConfig || {};
+  var send = function (label) {
+    for (var i = 0; i < (cfg.beaconsPerPage || 1); i++) {
+      var img = new Image();
+      img.src = '/b/ss/' + cfg.reportSuite + '/1/JS-2.22.0/s' + Date.now() + i +
+        '?pageName=' + encodeURIComponent(document.title) + '&events=' + label + '&v1=' + i;
+    }
+    if (cfg.interact) {
+      fetch('/ee/v1/interact?configId=bench-config&requestId=' + Date.now(), {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({event: {xdm: {eventType: label, web: {webPageDetails: {name: document.title}}}}})
+      });
+    }
+  };
+  send('event1');
+  document.addEventListener('click', function () { send('event2'); });
+})();
+"""
+
+
+class SiteConfig:
+    def __init__(
+        self,
+        pages: int = 50,
+        fanout: int = 5,
+        latency_ms: float = 0,
+        beacons_per_page: int = 1,
+        interact: bool = True,
+        tagged: bool = True,
+        report_suite: str = "benchrsid",
+    ):
+        self.pages = pages
+        self.fanout = fanout
+        self.latency_ms = latency_ms
+        self.beacons_per_page = beacons_per_page
+        self.interact = interact
+        self.tagged = tagged
+        self.report_suite = report_suite
+
+
+def render_page(config: SiteConfig, n: int) -> str:
+    links = []
+    for i in range(1, config.fanout + 1):
+        target = (n * config.fanout + i) % config.pages
+        links.append(f'<li><a href="/page/{target}">Page {target}</a></li>')
+
+    head = ""
+    if config.tagged:
+        bench_config = json.dumps({
+            "beaconsPerPage": config.beacons_per_page,
+            "interact": config.interact,
+            "reportSuite": config.report_suite,
+        })
+        head = (
+            f"<script>window.__benchConfig = {bench_config};</script>"
+            '<script src="/assets.adobedtm.com/bench/launch-bench.min.js" async></script>'
+        )
+
+    return (
+        "<!doctype html><html><head>"
+        f"<title>Synthetic page {n}</title>{head}</head>"
+        f'<body><main class="product"><h1>Synthetic page {n}</h1><ul class="links">{"".join(links)}</ul></main></body></html>'
+    )
+
+
+def _make_handler(config: SiteConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            return
+
+        def _send(self, status: int, content_type: str, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self) -> None:
+            path = urlparse(self.path).path
+            if config.latency_ms:
+                time.sleep(config.latency_ms / 1000.0)
+
+            if path.startswith("/b/ss/"):
+                self._send(200, "image/gif", TRANSPARENT_GIF)
+            elif path.startswith("/ee/") and path.endswith("/interact"):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                body = json.dumps({"requestId": "bench", "handle": [{"type": "state:store", "payload": []}]})
+                self._send(200, "application/json", body.encode("utf-8"))
+            elif path.endswith("launch-bench.min.js"):
+                self._send(200, "application/javascript", LAUNCH_LIBRARY_JS.encode("utf-8"))
+            elif path == "/" or path.startswith("/page/"):
+                try:
+                    n = int(path.rsplit("/", 1)[-1]) if path.startswith("/page/") else 0
+                except ValueError:
+                    n = 0
+                if n >= config.pages:
+                    self._send(404, "text/plain", b"not found")
+                    return
+                self._send(200, "text/html; charset=utf-8", render_page(config, n).encode("utf-8"))
+            else:
+                self._send(404, "text/plain", b"not found")
+
+        def do_GET(self):
+            self._route()
+
+        def do_POST(self):
+            self._route()
+
+    return Handler
+
+
+class SyntheticSite:
+    def __init__(self, config: SiteConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.server = ThreadingHTTPServer((host, port), _make_handler(config))
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self) -> "SyntheticSite":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="synthetic-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def describe(config: SiteConfig) -> Dict[str, Any]:
+    return dict(vars(config))
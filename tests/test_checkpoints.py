@@ -0,0 +1,33 @@
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from app import db
+from app.services.cancellation import ScanBudget
+from app.services.checkpoints import ScanCheckpointer, load_checkpoint
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = mongomock.MongoClient()["scanner_test"]
+    monkeypatch.setattr(db, "scans_col", database["scans"])
+    monkeypatch.setattr(db, "checkpoints_col", database["scan_checkpoints"])
+    return database
+
+
+def test_resumed_scan_keeps_spent_budget(database):
+    database["scans"].insert_one({"_id": "scan-1", "status": "running"})
+    budget = ScanBudget("scan-1", max_duration_seconds=3600, max_navigations=5)
+    for _ in range(4):
+        budget.add_navigation()
+    budget.started_at -= 600
+    ScanCheckpointer("scan-1", budget).save(["https://example.com/b"], {"https://example.com/a"})
+
+    resumed = ScanBudget("scan-1", max_duration_seconds=3600, max_navigations=5)
+    resumed.restore(load_checkpoint("scan-1")["budget_usage"])
+    assert resumed.navigations == 4
+    assert resumed.usage()["elapsed_seconds"] >= 600
+    assert resumed.check() is None
+
+    resumed.add_navigation()
+    assert resumed.check() == "max_navigations"
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.cron import CronError, CronExpression
+
+
+def _next(expr: str, after: datetime) -> datetime:
+    return CronExpression(expr).next_after(after)
+
+
+def test_every_fifteen_minutes():
+    assert _next("*/15 * * * *", datetime(2024, 1, 1, 10, 7, 30)) == datetime(2024, 1, 1, 10, 15)
+
+
+def test_daily_rolls_over_to_next_day():
+    assert _next("30 2 * * *", datetime(2024, 1, 1, 3, 0)) == datetime(2024, 1, 2, 2, 30)
+
+
+def test_weekday_names_and_sunday_as_seven():
+    # 2024-01-01 is a Monday.
+    assert _next("0 9 * * fri", datetime(2024, 1, 1)) == datetime(2024, 1, 5, 9, 0)
+    assert _next("0 9 * * 7", datetime(2024, 1, 1)) == datetime(2024, 1, 7, 9, 0)
+
+
+def test_day_and_weekday_are_ored_when_both_restricted():
+    # The 15th or any Monday, whichever comes first.
+    assert _next("0 0 15 * mon", datetime(2024, 1, 2)) == datetime(2024, 1, 8, 0, 0)
+    assert _next("0 0 15 * mon", datetime(2024, 1, 9)) == datetime(2024, 1, 15, 0, 0)
+
+
+def test_stepped_wildcard_day_is_anded_with_weekday():
+    # Odd days that are also Mondays; 2024-01-01 is excluded by "after".
+    assert _next("0 0 */2 * mon", datetime(2024, 1, 1, 12, 0)) == datetime(2024, 1, 15, 0, 0)
+    # Every other weekday field, on days 1 and 15 only.
+    assert _next("0 0 1,15 * */2", datetime(2024, 1, 2)) == datetime(2024, 2, 1, 0, 0)
+
+
+def test_month_names_and_ranges():
+    assert _next("0 0 1 jun-aug *", datetime(2024, 1, 1)) == datetime(2024, 6, 1, 0, 0)
+
+
+@pytest.mark.parametrize("expr", ["* * * *", "60 * * * *", "* * * * mon-", "*/0 * * * *", "0 0 31 2 *"])
+def test_invalid_expressions(expr):
+    with pytest.raises(CronError):
+        _next(expr, datetime(2024, 1, 1))
@@ -0,0 +1,59 @@
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from app import db, migrate
+from app.services import compression
+from app.services.compression import decompress_value, is_compressed
+
+
+def _apply_one_by_one(col, ops) -> int:
+    for op in ops:
+        col.update_one(op._filter, op._doc)
+    count = len(ops)
+    ops.clear()
+    return count
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = mongomock.MongoClient()["scanner_test"]
+
+    def connect_to_mongo():
+        db.pages_col = database["pages"]
+        db.blobs_col = database["payload_blobs"]
+        db.reports_col = database["reports"]
+
+    monkeypatch.setattr(db, "pages_col", None)
+    monkeypatch.setattr(db, "blobs_col", None)
+    monkeypatch.setattr(db, "reports_col", None)
+    monkeypatch.setattr(db, "connect_to_mongo", connect_to_mongo)
+    monkeypatch.setattr(db, "close_mongo_connection", lambda: None)
+    # mongomock's bulk_write does not accept UpdateOne from newer pymongo.
+    monkeypatch.setattr(migrate, "_flush", _apply_one_by_one)
+    # As if STORAGE_COMPRESSION was unset when the app was imported.
+    monkeypatch.setattr(compression, "STORAGE_COMPRESSION", "")
+    monkeypatch.setattr(compression, "_ACTIVE_CODEC", None)
+    return database
+
+
+def test_compress_storage_uses_codec_argument(database):
+    payload = {"pageName": "home", "v1": "x" * 4000}
+    body = "y" * 4000
+    database["pages"].insert_one({
+        "_id": "page-1",
+        "load_beacons": [{"payload": payload, "response_payload": body}],
+        "click_events": [{"beacons": [{"payload": payload, "response_payload": ""}]}],
+    })
+    database["payload_blobs"].insert_one({"_id": "blob-1", "body": body})
+    database["reports"].insert_one({"_id": "scan-1", "data": [{"Request Payload": body}]})
+
+    assert migrate.main(["compress-storage", "--codec", "zlib"]) == 0
+
+    page = database["pages"].find_one({"_id": "page-1"})
+    beacon = page["load_beacons"][0]
+    assert is_compressed(beacon["payload"]) and is_compressed(beacon["response_payload"])
+    assert decompress_value(beacon["payload"]) == payload
+    assert is_compressed(page["click_events"][0]["beacons"][0]["payload"])
+    assert decompress_value(database["payload_blobs"].find_one({"_id": "blob-1"})["body"]) == body
+    assert decompress_value(database["reports"].find_one({"_id": "scan-1"})["data"]) == [{"Request Payload": body}]
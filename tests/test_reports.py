@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+mongomock = pytest.importorskip("mongomock")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import db
+from app.routes.reports import router
+from app.services.reporting import store_report_in_mongo
+
+
+@pytest.fixture
+def client(monkeypatch):
+    database = mongomock.MongoClient()["scanner_test"]
+    monkeypatch.setattr(db, "scans_col", database["scans"])
+    monkeypatch.setattr(db, "pages_col", database["pages"])
+    monkeypatch.setattr(db, "reports_col", database["reports"])
+    monkeypatch.setattr(db, "blobs_col", database["blobs"])
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_download_cancelled_scan_report(client):
+    started_at = time.time() - 30
+    db.scans_col.insert_one({
+        "_id": "scan-1",
+        "start_url": "https://example.com/",
+        "status": "cancelled",
+        "created_at": started_at,
+        "started_at": started_at,
+        "completed_at": started_at + 10,
+    })
+    db.pages_col.insert_one({
+        "scan_id": "scan-1",
+        "url": "https://example.com/",
+        "title": "Example",
+        "has_tagging": True,
+        "load_beacons": [],
+        "click_events": [],
+    })
+    store_report_in_mongo("scan-1")
+
+    resp = client.get("/report/scan-1/data")
+    assert resp.status_code == 200
+    assert resp.json()["data"][0]["Page URL"] == "https://example.com/"
+
+    pytest.importorskip("openpyxl")
+    resp = client.get("/report/scan-1")
+    assert resp.status_code == 200
+    assert resp.content[:2] == b"PK"
+
+
+def test_report_rows_read_report_data_once(client, monkeypatch):
+    db.scans_col.insert_one({"_id": "scan-2", "start_url": "https://example.com/", "status": "completed", "started_at": time.time()})
+    db.pages_col.insert_one({"scan_id": "scan-2", "url": "https://example.com/", "title": "Example", "load_beacons": [], "click_events": []})
+    store_report_in_mongo("scan-2")
+
+    projections = []
+    find_one = db.reports_col.find_one
+
+    def recording_find_one(query, projection=None, *args, **kwargs):
+        projections.append(projection)
+        return find_one(query, projection, *args, **kwargs)
+
+    monkeypatch.setattr(db.reports_col, "find_one", recording_find_one)
+    for offset in (0, 0, 0):
+        resp = client.get(f"/report/scan-2/rows?offset={offset}&limit=10")
+        assert resp.status_code == 200
+        assert resp.json()["rows"][0]["cells"]["Page URL"] == "https://example.com/"
+
+    assert projections.count(None) == 1
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from app import db
+from app.services import retention
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = mongomock.MongoClient()["scanner_test"]
+    monkeypatch.setattr(db, "scans_col", database["scans"])
+    monkeypatch.setattr(db, "pages_col", database["pages"])
+    monkeypatch.setattr(db, "reports_col", database["reports"])
+    monkeypatch.setattr(db, "beacons_col", database["beacons"])
+    monkeypatch.setattr(db, "checkpoints_col", database["scan_checkpoints"])
+    monkeypatch.setattr(db, "diffs_col", None)
+    return database
+
+
+def test_delete_orphaned_data_keeps_data_of_existing_scans(database):
+    database["scans"].insert_one({"_id": "live", "status": "running"})
+    database["pages"].insert_many([
+        {"scan_id": "live", "url": "https://example.com/"},
+        {"scan_id": "gone", "url": "https://example.com/"},
+        {"scan_id": "gone", "url": "https://example.com/about"},
+    ])
+    database["reports"].insert_many([{"_id": "live", "scan_id": "live"}, {"_id": "gone", "scan_id": "gone"}])
+    database["beacons"].insert_many([{"scan_id": "live"}, {"scan_id": "gone"}])
+    database["scan_checkpoints"].insert_many([{"_id": "live"}, {"_id": "gone"}])
+
+    assert retention.delete_orphaned_data() == {"pages_deleted": 2, "reports_deleted": 1}
+
+    assert [p["scan_id"] for p in database["pages"].find()] == ["live"]
+    assert [r["_id"] for r in database["reports"].find()] == ["live"]
+    assert [b["scan_id"] for b in database["beacons"].find()] == ["live"]
+    assert [c["_id"] for c in database["scan_checkpoints"].find()] == ["live"]
+
+
+def test_payload_blobs_pruned_only_after_a_complete_sweep(database, monkeypatch):
+    monkeypatch.setattr(db, "blobs_col", database["payload_blobs"])
+    monkeypatch.setattr(db, "meta_col", None)
+    monkeypatch.setattr(retention, "RETENTION_DAYS_BY_STATUS", {"completed": 1, "failed": 1, "cancelled": 1})
+    monkeypatch.setattr(retention, "RETENTION_ARCHIVE_DIR", "")
+    monkeypatch.setattr(retention, "RETENTION_SWEEP_LIMIT", 1)
+
+    old = 10 * 86400
+    now = time.time()
+    database["scans"].insert_many([
+        {"_id": "old-1", "status": "completed", "created_at": now - old},
+        {"_id": "old-2", "status": "completed", "created_at": now - old},
+    ])
+    database["payload_blobs"].insert_one({"_id": "blob", "body": "{}", "last_seen_at": now - old})
+
+    # Each of the first two sweeps hits the limit, so old-2 may still need the blob.
+    assert retention.sweep_expired_scans() == 1
+    assert database["payload_blobs"].count_documents({}) == 1
+    assert retention.sweep_expired_scans() == 1
+    assert database["payload_blobs"].count_documents({}) == 1
+
+    assert retention.sweep_expired_scans() == 0
+    assert database["payload_blobs"].count_documents({}) == 0
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("fastapi")
+mongomock = pytest.importorskip("mongomock")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import db
+from app.routes import scans
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    database = mongomock.MongoClient()["scanner_test"]
+    monkeypatch.setattr(db, "scans_col", database["scans"])
+    monkeypatch.setattr(db, "pages_col", database["pages"])
+    monkeypatch.setattr(db, "reports_col", database["reports"])
+    monkeypatch.setattr(db, "meta_col", database["meta"])
+
+    jobs = []
+    monkeypatch.setattr(scans, "enqueue_scan", lambda scan_id, *args, **options: jobs.append((scan_id, options)) or True)
+    return jobs
+
+
+def test_retry_of_resumed_scan_does_not_resume(enqueued):
+    db.scans_col.insert_one({
+        "_id": "scan-1",
+        "start_url": "https://example.com/",
+        "status": "queued",
+        "resume_requested": True,
+        "max_pages": 3,
+        "max_clicks_per_page": 1,
+    })
+
+    app = FastAPI()
+    app.include_router(scans.router)
+    resp = TestClient(app).post("/scan/scan-1/retry")
+    assert resp.status_code == 200
+
+    new_scan_id, options = enqueued[0]
+    assert new_scan_id == resp.json()["scan_id"]
+    assert "resume" not in options
+    assert "resume_requested" not in db.scans_col.find_one({"_id": new_scan_id})